@@ -11,6 +11,7 @@ from django.db.models.signals import post_save
 from django.utils.dateparse import parse_datetime
 from django.utils.translation import gettext_lazy as _
 
+from AKModel.availability.intervals import IntervalSet
 from AKModel.availability.models import Availability
 from AKModel.availability.serializers import AvailabilityFormSerializer
 from AKModel.models import Event
@@ -153,14 +154,15 @@ class AvailabilitiesFormMixin(forms.Form):
             return None
 
         rawavailabilities = self._parse_availabilities_json(data)
-        availabilities = []
+        intervals = []
 
         for rawavail in rawavailabilities:
             self._validate_availability(rawavail)
-            availabilities.append(Availability(event_id=self.event.id, **rawavail))
-        if not availabilities and required:
+            intervals.append((rawavail['start'], rawavail['end']))
+        if not intervals and required:
             raise forms.ValidationError(_('Please fill in your availabilities!'))
-        availabilities = Availability.union(availabilities)
+        # Adaption: Merge overlapping availabilities without constructing and comparing intermediate model instances
+        availabilities = IntervalSet.from_datetimes(intervals).to_availabilities(event_id=self.event.id)
         return availabilities
 
     def _set_foreignkeys(self, instance, availabilities):
@@ -0,0 +1,469 @@
+from array import array
+from bisect import bisect_right
+from datetime import datetime, timedelta, timezone
+from typing import Any, Iterable, Iterator, Sequence
+
+from django.db.models import QuerySet
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+"""Reference point of the integer timestamps used by :class:`IntervalSet`."""
+
+MICROSECOND = timedelta(microseconds=1)
+
+
+def to_timestamp(dt: datetime) -> int:
+    """
+    Convert an aware datetime into an integer timestamp (microseconds since the epoch)
+
+    Integer arithmetic is used to make the conversion exact.
+
+    :param dt: datetime to convert
+    :return: microseconds since the epoch
+    :rtype: int
+    """
+    return (dt - EPOCH) // MICROSECOND
+
+
+def from_timestamp(timestamp: int) -> datetime:
+    """
+    Convert an integer timestamp (microseconds since the epoch) into an aware datetime in UTC
+
+    :param timestamp: microseconds since the epoch
+    :return: corresponding datetime
+    :rtype: datetime
+    """
+    return EPOCH + timedelta(microseconds=timestamp)
+
+
+class IntervalSet:
+    """
+    Lightweight, immutable set of time intervals detached from the ORM
+
+    The set is stored as two sorted int64 arrays of start and end timestamps (microseconds since the epoch).
+    Intervals are always normalized, i.e., overlapping or touching intervals are merged,
+    which corresponds to the semantics of :meth:`Availability.union`.
+
+    This allows to run the availability algebra (union, intersection, difference, coverage checks)
+    without creating and comparing :class:`Availability` model instances.
+    """
+
+    __slots__ = ('starts', 'ends')
+
+    def __init__(self, intervals: Iterable[tuple[int, int]] = ()):
+        """
+        Create a new set from (start, end) pairs of integer timestamps
+
+        The pairs do not need to be sorted or disjoint, intervals with start > end are ignored.
+
+        :param intervals: iterable of (start, end) timestamp pairs
+        """
+        self.starts = array('q')
+        self.ends = array('q')
+        for start, end in sorted(interval for interval in intervals if interval[0] <= interval[1]):
+            if self.ends and start <= self.ends[-1]:
+                if end > self.ends[-1]:
+                    self.ends[-1] = end
+            else:
+                self.starts.append(start)
+                self.ends.append(end)
+
+    @classmethod
+    def _from_normalized(cls, starts: Iterable[int], ends: Iterable[int]) -> 'IntervalSet':
+        """
+        Create a new set from already sorted and merged start and end timestamps (skipping normalization)
+        """
+        interval_set = cls.__new__(cls)
+        interval_set.starts = array('q', starts)
+        interval_set.ends = array('q', ends)
+        return interval_set
+
+    @classmethod
+    def from_datetimes(cls, intervals: Iterable[tuple[datetime, datetime]]) -> 'IntervalSet':
+        """
+        Create a new set from (start, end) pairs of aware datetimes
+
+        :param intervals: iterable of (start, end) datetime pairs
+        :return: normalized interval set
+        :rtype: IntervalSet
+        """
+        return cls((to_timestamp(start), to_timestamp(end)) for start, end in intervals)
+
+    @classmethod
+    def from_availabilities(cls, availabilities: Iterable[Any]) -> 'IntervalSet':
+        """
+        Create a new set from availabilities
+
+        Querysets are evaluated using `values_list` to not construct model instances at all.
+
+        :param availabilities: queryset or iterable of availabilities (or other objects with start and end)
+        :return: normalized interval set
+        :rtype: IntervalSet
+        """
+        if isinstance(availabilities, QuerySet):
+            return cls.from_datetimes(availabilities.order_by().values_list('start', 'end'))
+        return cls.from_datetimes((avail.start, avail.end) for avail in availabilities)
+
+    @classmethod
+    def group_by(cls, availabilities: QuerySet, field: str) -> dict[Any, 'IntervalSet']:
+        """
+        Load the availabilities of many entities at once and create one set per entity
+
+        Uses a single query. Availabilities for which the field is not set are ignored.
+
+        :param availabilities: queryset of availabilities
+        :param field: name of the field to group by, e.g., 'room_id'
+        :return: dictionary mapping the value of the field to the interval set of that entity
+        :rtype: dict[Any, IntervalSet]
+        """
+        grouped: dict[Any, list[tuple[int, int]]] = {}
+        for key, start, end in availabilities.filter(**{f'{field}__isnull': False}).order_by().values_list(
+                field, 'start', 'end'):
+            grouped.setdefault(key, []).append((to_timestamp(start), to_timestamp(end)))
+        return {key: cls(intervals) for key, intervals in grouped.items()}
+
+    def to_availabilities(self, **kwargs) -> list:
+        """
+        Create (unsaved) availabilities for all intervals of this set, e.g., for usage with `bulk_create`
+
+        :param kwargs: further attributes of the created availabilities, e.g., event or room
+        :return: list of availabilities
+        :rtype: list[Availability]
+        """
+        # local import to prevent cyclic import
+        # pylint: disable=import-outside-toplevel
+        from AKModel.availability.models import Availability
+        return [Availability(start=start, end=end, **kwargs) for start, end in self]
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __bool__(self) -> bool:
+        return len(self.starts) > 0
+
+    def __iter__(self) -> Iterator[tuple[datetime, datetime]]:
+        """
+        Iterate over all intervals as (start, end) pairs of datetimes in UTC
+        """
+        for start, end in zip(self.starts, self.ends):
+            yield from_timestamp(start), from_timestamp(end)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, IntervalSet):
+            return NotImplemented
+        return self.starts == other.starts and self.ends == other.ends
+
+    def __repr__(self) -> str:
+        intervals = ", ".join(f"{start.isoformat()}/{end.isoformat()}" for start, end in self)
+        return f"IntervalSet([{intervals}])"
+
+    def union(self, other: 'IntervalSet') -> 'IntervalSet':
+        """
+        Return the set of all points covered by at least one of both sets
+        """
+        return IntervalSet(zip(self.starts + other.starts, self.ends + other.ends))
+
+    def __or__(self, other: 'IntervalSet') -> 'IntervalSet':
+        return self.union(other)
+
+    def intersection(self, other: 'IntervalSet') -> 'IntervalSet':
+        """
+        Return the set of all points covered by both sets
+
+        Uses two pointers over both sorted sets (linear time). Only touching intervals do not intersect.
+        """
+        starts, ends = [], []
+        i = j = 0
+        while i < len(self.starts) and j < len(other.starts):
+            start = max(self.starts[i], other.starts[j])
+            end = min(self.ends[i], other.ends[j])
+            if start < end:
+                starts.append(start)
+                ends.append(end)
+            # advance the interval that ends first
+            if self.ends[i] < other.ends[j]:
+                i += 1
+            else:
+                j += 1
+        return IntervalSet._from_normalized(starts, ends)
+
+    def __and__(self, other: 'IntervalSet') -> 'IntervalSet':
+        return self.intersection(other)
+
+    def difference(self, other: 'IntervalSet') -> 'IntervalSet':
+        """
+        Return the set of all points covered by this set but not by the other one
+
+        Uses two pointers over both sorted sets (linear time).
+        """
+        starts, ends = [], []
+        j = 0
+        for start, end in zip(self.starts, self.ends):
+            # skip all intervals of other ending before this interval
+            while j < len(other.starts) and other.ends[j] <= start:
+                j += 1
+            k = j
+            while k < len(other.starts) and other.starts[k] < end:
+                if other.starts[k] > start:
+                    starts.append(start)
+                    ends.append(other.starts[k])
+                start = max(start, other.ends[k])
+                k += 1
+            if start < end:
+                starts.append(start)
+                ends.append(end)
+        return IntervalSet._from_normalized(starts, ends)
+
+    def __sub__(self, other: 'IntervalSet') -> 'IntervalSet':
+        return self.difference(other)
+
+    def contains(self, start: int, end: int) -> bool:
+        """
+        Check whether the interval [start, end] is completely contained in a single interval of this set
+
+        Uses binary search (logarithmic time).
+
+        :param start: start timestamp
+        :param end: end timestamp
+        :return: True if contained, False if not
+        :rtype: bool
+        """
+        idx = bisect_right(self.starts, start) - 1
+        return idx >= 0 and self.ends[idx] >= end
+
+    def contains_datetimes(self, start: datetime, end: datetime) -> bool:
+        """
+        Check whether the interval between the two datetimes is completely contained in a single interval of this set
+
+        :param start: start datetime
+        :param end: end datetime
+        :return: True if contained, False if not
+        :rtype: bool
+        """
+        return self.contains(to_timestamp(start), to_timestamp(end))
+
+    def covers(self, other: 'IntervalSet') -> bool:
+        """
+        Check whether this set covers all points of the other set
+
+        :param other: interval set to check
+        :return: True if all intervals of other are contained in this set
+        :rtype: bool
+        """
+        return all(self.covers_each(other.starts, other.ends))
+
+    def covers_each(self, starts: Sequence[int], ends: Sequence[int]) -> list[bool]:
+        """
+        Check for many intervals at once whether they are contained in this set
+
+        Uses two pointers (linear time in the size of this set and the number of intervals to check)
+        if the intervals to check are sorted by their start, otherwise they are sorted first.
+
+        :param starts: start timestamps of the intervals to check
+        :param ends: end timestamps of the intervals to check
+        :return: list of booleans, one per interval to check (in the given order)
+        :rtype: list[bool]
+        """
+        order = range(len(starts))
+        if any(starts[i] > starts[i + 1] for i in range(len(starts) - 1)):
+            order = sorted(order, key=starts.__getitem__)
+
+        result = [False] * len(starts)
+        idx = 0
+        for position in order:
+            start, end = starts[position], ends[position]
+            # find the last interval of this set starting at or before start
+            while idx + 1 < len(self.starts) and self.starts[idx + 1] <= start:
+                idx += 1
+            result[position] = idx < len(self.starts) and self.starts[idx] <= start and self.ends[idx] >= end
+        return result
+
+
+class ContainmentIndex:
+    """
+    Index over a collection of intervals to check whether a given interval is contained in any single one of them
+
+    In contrast to :class:`IntervalSet`, overlapping or touching intervals are not merged,
+    since an interval spanning two of them is not contained in a single one.
+    Instead, only intervals not contained in another interval of the collection are kept.
+    Sorted by start, these then also have strictly increasing ends, which allows answering queries
+    with a binary search (logarithmic time).
+    """
+
+    __slots__ = ('starts', 'ends')
+
+    def __init__(self, intervals: Iterable[tuple[int, int]] = ()):
+        """
+        Create a new index from (start, end) pairs of integer timestamps
+
+        :param intervals: iterable of (start, end) timestamp pairs
+        """
+        self.starts = array('q')
+        self.ends = array('q')
+        # sort by start and prefer longer intervals for equal starts
+        for start, end in sorted(intervals, key=lambda interval: (interval[0], -interval[1])):
+            # skip intervals contained in a previous one
+            if self.ends and end <= self.ends[-1]:
+                continue
+            if self.starts and start == self.starts[-1]:
+                self.ends[-1] = end
+            else:
+                self.starts.append(start)
+                self.ends.append(end)
+
+    @classmethod
+    def from_availabilities(cls, availabilities: Iterable[Any]) -> 'ContainmentIndex':
+        """
+        Create a new index from availabilities
+
+        Querysets are evaluated using `values_list` to not construct model instances at all.
+
+        :param availabilities: queryset or iterable of availabilities (or other objects with start and end)
+        :return: index over the availabilities
+        :rtype: ContainmentIndex
+        """
+        if isinstance(availabilities, QuerySet):
+            availabilities = availabilities.order_by().values_list('start', 'end')
+        else:
+            availabilities = ((avail.start, avail.end) for avail in availabilities)
+        return cls((to_timestamp(start), to_timestamp(end)) for start, end in availabilities)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def contains(self, start: int, end: int) -> bool:
+        """
+        Check whether the interval [start, end] is completely contained in a single interval of the index
+
+        :param start: start timestamp
+        :param end: end timestamp
+        :return: True if contained, False if not
+        :rtype: bool
+        """
+        idx = bisect_right(self.starts, start) - 1
+        return idx >= 0 and self.ends[idx] >= end
+
+    def contains_datetimes(self, start: datetime, end: datetime) -> bool:
+        """
+        Check whether the interval between the two datetimes is completely contained in a single interval of the index
+
+        :param start: start datetime
+        :param end: end datetime
+        :return: True if contained, False if not
+        :rtype: bool
+        """
+        return self.contains(to_timestamp(start), to_timestamp(end))
+
+    def covered_slot_runs(self, first_start: int, slot_duration: int, count: int) -> list[tuple[int, int]]:
+        """
+        Find the maximal runs of consecutive uniform slots that are each contained in a single interval of the index
+
+        The slots are given implicitly, slot k (0 <= k < count) spans
+        [first_start + k * slot_duration, first_start + (k + 1) * slot_duration].
+        The covered slots are computed per interval of the index using integer arithmetic,
+        hence the runtime does not depend on the number of slots.
+
+        :param first_start: start timestamp of the first slot
+        :param slot_duration: duration of a single slot (in microseconds)
+        :param count: number of slots
+        :return: sorted list of (first, stop) slot positions of the runs (stop exclusive)
+        :rtype: list[tuple[int, int]]
+        """
+        runs = []
+        if count <= 0 or slot_duration <= 0:
+            return runs
+        last_slot_start = first_start + (count - 1) * slot_duration
+
+        # skip all intervals too short to contain the first slot
+        idx = bisect_right(self.ends, first_start + slot_duration - 1)
+        while idx < len(self.starts) and self.starts[idx] <= last_slot_start:
+            # first slot starting at or after the start of the interval
+            first = max(0, -((first_start - self.starts[idx]) // slot_duration))
+            # first slot ending after the end of the interval
+            stop = min(count, (self.ends[idx] - first_start) // slot_duration)
+            if first < stop:
+                if runs and first <= runs[-1][1]:
+                    runs[-1] = (runs[-1][0], max(runs[-1][1], stop))
+                else:
+                    runs.append((first, stop))
+            idx += 1
+        return runs
+
+
+class OverlapIndex:
+    """
+    Index over a collection of intervals carrying arbitrary items to find all intervals intersecting a given one
+
+    The intervals are sorted by start. Additionally, a sparse table holds the position of the interval with the
+    latest end for each range of positions whose length is a power of two, which allows finding the latest end
+    in any range of positions in constant time. A query then first finds all intervals starting before the end
+    of the query interval (binary search) and reports the intervals ending after its start among them by recursively
+    splitting the range at the interval with the latest end. Every split either reports an interval or stops,
+    hence a query takes O(log n + k) time for k reported intervals. Building the index takes O(n log n) time.
+
+    In contrast to :class:`IntervalSet` and :class:`ContainmentIndex`, the index works on any comparable
+    start and end values (e.g., datetimes) and keeps all intervals.
+    """
+
+    __slots__ = ('starts', 'ends', 'items', '_latest_end')
+
+    def __init__(self, intervals: Iterable[tuple[Any, Any, Any]] = ()):
+        """
+        Create a new index from (start, end, item) triples
+
+        :param intervals: iterable of (start, end, item) triples
+        """
+        intervals = sorted(intervals, key=lambda interval: interval[0])
+        self.starts = [interval[0] for interval in intervals]
+        self.ends = [interval[1] for interval in intervals]
+        self.items = [interval[2] for interval in intervals]
+
+        # _latest_end[j][i]: position of the latest end among the positions i, ..., i + 2^j - 1
+        ends = self.ends
+        self._latest_end = [list(range(len(intervals)))]
+        width = 1
+        while 2 * width <= len(intervals):
+            previous = self._latest_end[-1]
+            self._latest_end.append([
+                left if ends[left] >= ends[right] else right
+                for left, right in zip(previous, previous[width:])
+            ])
+            width *= 2
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def _position_of_latest_end(self, lo: int, hi: int) -> int:
+        """
+        Position of the interval with the latest end among the positions lo, ..., hi - 1 (lo < hi)
+        """
+        level = (hi - lo).bit_length() - 1
+        left = self._latest_end[level][lo]
+        right = self._latest_end[level][hi - (1 << level)]
+        return left if self.ends[left] >= self.ends[right] else right
+
+    def overlapping(self, start, end) -> list:
+        """
+        Find the items of all intervals intersecting or touching the interval [start, end]
+
+        The items of intervals that only touch the given interval are included, hence callers with stricter
+        notions of overlap (e.g., half-open intervals) have to filter the (few) touching intervals.
+
+        :param start: start of the query interval
+        :param end: end of the query interval
+        :return: items of all intervals with interval start <= end and interval end >= start, sorted by start
+        :rtype: list
+        """
+        positions = []
+        ranges = [(0, bisect_right(self.starts, end))]
+        while ranges:
+            lo, hi = ranges.pop()
+            if lo >= hi:
+                continue
+            position = self._position_of_latest_end(lo, hi)
+            if self.ends[position] < start:
+                # no interval in this range ends late enough
+                continue
+            positions.append(position)
+            ranges.append((lo, position))
+            ranges.append((position + 1, hi))
+        return [self.items[position] for position in sorted(positions)]
@@ -4,12 +4,16 @@
 # Changes are marked in the code
 
 import datetime
+import itertools
 from typing import List
 
 from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.utils.functional import cached_property
 from django.utils.translation import gettext_lazy as _
 
+from AKModel.availability.intervals import IntervalSet
 from AKModel.models import AK, AKCategory, AKOwner, Event, Room
 # TODO: Decouple from AKPreference app
 from AKPreference.models import EventParticipant
@@ -234,22 +238,57 @@ class Availability(models.Model):
         return result
 
     @classmethod
-    def _pair_intersection(
-            cls,
-            availabilities_a: List['Availability'],
-            availabilities_b: List['Availability'],
+    def _sweep_intersection(
+            cls, availabilitysets: List[List['Availability']]
     ) -> List['Availability']:
-        """return the list of Availabilities, which are covered by each of the
-        given sets."""
-        result = []
-
-        # yay for O(b*a) time! I am sure there is some fancy trick to make this faster,
-        # but we're dealing with less than 100 items in total, sooo.. ¯\_(ツ)_/¯
-        for a in availabilities_a:
-            for b in availabilities_b:
-                if a.overlaps(b, True):
-                    result.append(a.intersect_with(b))
+        """Return the list of Availabilities, which are covered by each of the
+        given sets.
+
+        Uses a sweep line over the sorted endpoints of all sets, which needs
+        O(n log n) time for n availabilities in total.
+        All sets are expected to be free of overlaps (cf. `union`),
+        thus a point in time is covered by all sets iff the number of
+        availabilities open at that point equals the number of sets.
+        Availabilities only touching each other do not intersect.
+
+        :param availabilitysets: list of sets of availabilities, each without overlaps.
+        :return: sorted list of availabilities covered by all sets.
+        :rtype: List[Availability]
+        """
+        required = len(availabilitysets)
+        all_availabilities = [avail for availset in availabilitysets for avail in availset]
+
+        # only keep the event if all availabilities belong to the same one
+        # (compare by id to prevent additional queries, fall back to identity for unsaved events)
+        event_keys = {
+            avail.event_id if avail.event_id is not None else id(getattr(avail, 'event', None))
+            for avail in all_availabilities
+        }
+        event = getattr(all_availabilities[0], 'event', None) if len(event_keys) == 1 else None
+
+        # ends (0) are sorted before starts (1) at the same point in time
+        # so that touching availabilities are not counted as overlap
+        endpoints = sorted(
+                itertools.chain.from_iterable(
+                        ((avail.start, 1), (avail.end, 0)) for avail in all_availabilities
+                )
+        )
 
+        result = []
+        open_count = 0
+        current_start = None
+        for point, is_start in endpoints:
+            if is_start:
+                open_count += 1
+                if open_count == required:
+                    current_start = point
+            else:
+                if open_count == required and point > current_start:
+                    avail = Availability(start=current_start, end=point)
+                    if event is not None:
+                        avail.event = event
+                    result.append(avail)
+                open_count -= 1
         return result
 
     @classmethod
@@ -266,12 +305,9 @@ class Availability(models.Model):
             return []
         if not all(availabilitysets):
             return []
-        # start with the very first set ...
-        result = availabilitysets[0]
-        for availset in availabilitysets[1:]:
-            # ... subtract each of the other sets
-            result = cls._pair_intersection(result, availset)
-        return result
+        if len(availabilitysets) == 1:
+            return availabilitysets[0]
+        return cls._sweep_intersection(availabilitysets)
 
     @property
     def simplified(self):
@@ -319,8 +355,7 @@ class Availability(models.Model):
         :return: whether the availabilities cover full event.
         :rtype: bool
         """
-        avail_union = Availability.union(availabilities)
-        return any(avail.contains(self) for avail in avail_union)
+        return IntervalSet.from_availabilities(availabilities).contains_datetimes(self.start, self.end)
 
     @classmethod
     def is_event_covered(cls, event: Event, availabilities: List['Availability']) -> bool:
@@ -340,3 +375,15 @@ class Availability(models.Model):
         verbose_name = _('Availability')
         verbose_name_plural = _('Availabilities')
         ordering = ['event', 'start']
+
+
+@receiver(post_save, sender=Availability)
+@receiver(post_delete, sender=Availability)
+def availability_changed_handler(sender, instance: Availability, **kwargs):  # pylint: disable=unused-argument
+    """
+    Signal receiver: Invalidate the content fingerprint of an event when an availability is changed,
+    and its cached discretization when the availability of a room is changed
+    """
+    Event.invalidate_content_fingerprint(instance.event_id)
+    if instance.room_id is not None:
+        Event.invalidate_discretization_cache(instance.event_id)
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from AKModel.models import ConstraintViolation
+
+
+class Command(BaseCommand):
+    """
+    Compute and store the signature hashes of existing constraint violations
+
+    Violations created before the hash was introduced have an empty
+    :attr:`AKModel.models.ConstraintViolation.signature_hash`. They are processed in batches ordered by their
+    primary key, the related aks and ak slots of each batch are prefetched.
+    """
+    help = "Compute and store the signature hashes of existing constraint violations"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true',
+                            help="Recompute the hashes of all violations, not only of those without a hash")
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help="Number of violations processed at once")
+
+    def handle(self, *args, **options):
+        violations = ConstraintViolation.objects.order_by("pk")
+        if not options['all']:
+            violations = violations.filter(signature_hash="")
+
+        number_of_violations_updated = 0
+        last_pk = 0
+        while True:
+            batch = list(violations.filter(pk__gt=last_pk).prefetch_related("aks", "ak_slots")
+                         [:options['batch_size']])
+            if not batch:
+                break
+            changed_violations = []
+            for violation in batch:
+                signature_hash = violation.compute_signature_hash()
+                if signature_hash != violation.signature_hash:
+                    violation.signature_hash = signature_hash
+                    changed_violations.append(violation)
+            with transaction.atomic():
+                ConstraintViolation.objects.bulk_update(changed_violations, ["signature_hash"])
+            number_of_violations_updated += len(changed_violations)
+            last_pk = batch[-1].pk
+
+        self.stdout.write(self.style.SUCCESS(
+                f"Updated the signature hashes of {number_of_violations_updated} constraint violation(s)"
+        ))
@@ -0,0 +1,73 @@
+import random
+import timeit
+from datetime import datetime, timedelta, timezone
+
+from django.core.management.base import BaseCommand
+
+from AKModel.availability.models import Availability
+from AKModel.models import Event
+
+
+def _naive_intersection(*availabilitysets):
+    """
+    Reference implementation of the previous pairwise O(a*b) intersection, used for comparison only
+    """
+    availabilitysets = [Availability.union(availset) for availset in availabilitysets]
+    if not availabilitysets or not all(availabilitysets):
+        return []
+    result = availabilitysets[0]
+    for availset in availabilitysets[1:]:
+        result = [a.intersect_with(b) for a in result for b in availset if a.overlaps(b, True)]
+    return result
+
+
+class Command(BaseCommand):
+    """
+    Micro-benchmark for the intersection of availability sets
+
+    Compares the sweep line intersection of :class:`Availability` against the previous pairwise
+    implementation on synthetic sets of availabilities. No database access is needed.
+    """
+    help = "Benchmark the intersection of synthetic availability sets"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000, 10000],
+                            help="Number of availabilities per set")
+        parser.add_argument('--sets', type=int, default=3, help="Number of sets to intersect")
+        parser.add_argument('--repeat', type=int, default=3, help="Number of repetitions per measurement")
+        parser.add_argument('--max-naive', type=int, default=1000,
+                            help="Largest set size the pairwise implementation is measured for")
+        parser.add_argument('--seed', type=int, default=42, help="Seed for the random generator")
+
+    def handle(self, *args, **options):
+        rnd = random.Random(options['seed'])
+        start = datetime(2020, 1, 1, tzinfo=timezone.utc)
+        event = Event(name="Benchmark", slug="benchmark", start=start, end=start + timedelta(days=365))
+
+        def _random_set(size):
+            availabilities = []
+            for _ in range(size):
+                avail_start = start + timedelta(minutes=15 * rnd.randrange(0, 4 * 24 * 365))
+                avail_end = avail_start + timedelta(minutes=15 * rnd.randrange(1, 4 * 12))
+                availabilities.append(Availability(event=event, start=avail_start, end=avail_end))
+            return availabilities
+
+        self.stdout.write(f"{'size':>8} {'sweep [ms]':>12} {'pairwise [ms]':>14} {'speedup':>9}")
+        for size in options['sizes']:
+            sets = [_random_set(size) for _ in range(options['sets'])]
+
+            sweep_time = min(timeit.repeat(lambda: Availability.intersection(*sets),
+                                           number=1, repeat=options['repeat']))
+
+            if size <= options['max_naive']:
+                if Availability.intersection(*sets) != _naive_intersection(*sets):
+                    self.stderr.write(self.style.ERROR(f"Results differ for size {size}"))
+                naive_time = min(timeit.repeat(lambda: _naive_intersection(*sets),
+                                               number=1, repeat=options['repeat']))
+                naive_str = f"{naive_time * 1000:14.2f}"
+                speedup_str = f"{naive_time / sweep_time:8.1f}x"
+            else:
+                naive_str = f"{'-':>14}"
+                speedup_str = f"{'-':>9}"
+
+            self.stdout.write(f"{size:8d} {sweep_time * 1000:12.2f} {naive_str} {speedup_str}")
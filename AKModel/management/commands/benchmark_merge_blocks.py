@@ -0,0 +1,102 @@
+import itertools
+import random
+import timeit
+from datetime import datetime, timedelta, timezone
+
+from django.core.management.base import BaseCommand
+
+from AKModel.availability.intervals import ContainmentIndex, to_timestamp
+from AKModel.models import Event, merge_blocks
+
+
+def _sorting_merge_blocks(blocks):
+    """
+    Reference implementation of the previous merge (full sort and pairwise merge of timeslot objects),
+    used for comparison only
+    """
+    timeslots = sorted(itertools.chain.from_iterable(blocks), key=lambda slot: slot.avail.start)
+    if not timeslots:
+        return []
+
+    all_blocks = []
+    current_block = [timeslots[0]]
+    for slot in timeslots[1:]:
+        if slot.avail.overlaps(current_block[-1].avail, strict=True):
+            if slot.avail.start == current_block[-1].avail.start and slot.avail.end == current_block[-1].avail.end:
+                current_block[-1] = current_block[-1].merge(slot)
+            else:
+                raise ValueError("Partially overlapping timeslots are not supported!")
+        elif slot.avail.overlaps(current_block[-1].avail, strict=False):
+            current_block.append(slot)
+        else:
+            all_blocks.append(current_block)
+            current_block = [slot]
+    all_blocks.append(current_block)
+    return all_blocks
+
+
+def _as_tuples(blocks):
+    """
+    Convert blocks of timeslots into comparable lists of tuples
+    """
+    return [[(slot.idx, slot.avail.start, slot.avail.end, slot.constraints) for slot in block] for block in blocks]
+
+
+class Command(BaseCommand):
+    """
+    Micro-benchmark for merging the timeslot blocks of overlapping default slots
+
+    Compares the k-way merge of :func:`merge_blocks` against the previous implementation
+    (full sort and pairwise merge of timeslot objects) on synthetic default slots. No database access is needed.
+    """
+    help = "Benchmark merging the timeslot blocks of synthetic overlapping default slots"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 500, 1000],
+                            help="Number of default slots")
+        parser.add_argument('--slots-in-an-hour', type=float, default=4.0,
+                            help="Granularity of the discretization")
+        parser.add_argument('--repeat', type=int, default=3, help="Number of repetitions per measurement")
+        parser.add_argument('--seed', type=int, default=42, help="Seed for the random generator")
+
+    def handle(self, *args, **options):
+        rnd = random.Random(options['seed'])
+        start = datetime(2020, 1, 1, tzinfo=timezone.utc)
+        slot_duration = timedelta(hours=1.0 / options['slots_in_an_hour'])
+        categories = [f"availability-cat-{i}" for i in range(10)]
+
+        self.stdout.write(f"{'default slots':>13} {'timeslots':>10} {'k-way [ms]':>11} {'sorting [ms]':>13} "
+                          f"{'speedup':>9}")
+        for size in options['sizes']:
+            event = Event(name="Benchmark", slug="benchmark", start=start, end=start + timedelta(days=size // 10 + 1))
+            room_availability_index = ContainmentIndex([(to_timestamp(event.start), to_timestamp(event.end))])
+
+            # default slots of 1 to 4 hours starting at full hours, many of them overlapping
+            blocks = []
+            slot_index = 0
+            for _ in range(size):
+                block_start = start + timedelta(hours=rnd.randrange(0, 24 * (size // 10 + 1) - 4))
+                # rooms are available for the whole event, hence every default slot results in a single block
+                block = next(event._generate_slots_from_block(  # pylint: disable=protected-access
+                        block_start,
+                        block_start + timedelta(hours=rnd.randrange(1, 5)),
+                        slot_duration,
+                        slot_index=slot_index,
+                        constraints=set(rnd.sample(categories, rnd.randrange(0, 3))),
+                        room_availability_index=room_availability_index,
+                ))
+                blocks.append(block)
+                slot_index += len(block)
+            # the previous implementation worked on lists of timeslot objects
+            object_blocks = [list(block) for block in blocks]
+
+            kway_time = min(timeit.repeat(lambda: list(merge_blocks(blocks)),
+                                          number=1, repeat=options['repeat']))
+            sorting_time = min(timeit.repeat(lambda: _sorting_merge_blocks(object_blocks),
+                                             number=1, repeat=options['repeat']))
+
+            if _as_tuples(merge_blocks(blocks)) != _as_tuples(_sorting_merge_blocks(object_blocks)):
+                self.stderr.write(self.style.ERROR(f"Results differ for {size} default slots"))
+
+            self.stdout.write(f"{size:13d} {slot_index:10d} {kway_time * 1000:11.2f} {sorting_time * 1000:13.2f} "
+                              f"{sorting_time / kway_time:8.1f}x")
@@ -2,6 +2,7 @@ from abc import ABC, abstractmethod
 
 from django.contrib import admin, messages
 from django.contrib.admin.models import CHANGE, LogEntry
+from django.db import transaction
 from django.db.models import Model
 from django.shortcuts import get_object_or_404
 from django.urls import reverse
@@ -215,13 +216,16 @@ class IntermediateAdminActionView(IntermediateAdminView, ABC):
 
     def form_valid(self, form):
         self.entities = self.get_queryset(pks=form.cleaned_data['pks'])
-        self.action(form)
-        LogEntry.objects.log_actions(
-                user_id=self.request.user.id,
-                queryset=self.entities,
-                action_flag=CHANGE,
-                change_message=self.success_message
-        )
+        # Perform the action in a single transaction, such that it is applied completely or not at all
+        # and work triggered by signals for each changed entity (e.g., constraint checks) can be coalesced
+        with transaction.atomic():
+            self.action(form)
+            LogEntry.objects.log_actions(
+                    user_id=self.request.user.id,
+                    queryset=self.entities,
+                    action_flag=CHANGE,
+                    change_message=self.success_message
+            )
         messages.add_message(self.request, messages.SUCCESS, self.success_message)
         return super().form_valid(form)
 
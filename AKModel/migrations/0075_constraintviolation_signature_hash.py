@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('AKModel', '0074_ak_trash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='constraintviolation',
+            name='signature_hash',
+            field=models.CharField(blank=True, editable=False, help_text='Hash of the type, references and comment of this violation, used to find matching violations', max_length=64, verbose_name='Signature'),
+        ),
+        migrations.AddIndex(
+            model_name='constraintviolation',
+            index=models.Index(fields=['event', 'type', 'signature_hash'], name='constraintviolation_signature'),
+        ),
+    ]
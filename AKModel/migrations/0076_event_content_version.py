@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('AKModel', '0075_constraintviolation_signature_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='content_version',
+            field=models.PositiveBigIntegerField(default=0, editable=False, help_text='Incremented whenever exported data of this event changes', verbose_name='Content version'),
+        ),
+    ]
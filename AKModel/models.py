@@ -1,15 +1,23 @@
+import hashlib
+import heapq
 import itertools
 import json
+from array import array
 from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Any, Generator, Iterable
+from operator import itemgetter
+from typing import Any, Generator, Iterable, Sequence
 
 import math
+import uuid
 from django.apps import apps
 from django.conf import settings
+from django.core.cache import cache
 from django.core.validators import RegexValidator
 from django.db import models, transaction
-from django.db.models import Count
+from django.db.models import Count, F, Max, OuterRef, Subquery
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
 from django.urls import reverse_lazy
 from django.utils import timezone
 from django.utils.formats import date_format
@@ -19,6 +27,8 @@ from django.utils.translation import gettext_lazy as _
 from simple_history.models import HistoricalRecords
 from timezone_field import TimeZoneField
 
+from AKModel.availability.intervals import MICROSECOND, ContainmentIndex, from_timestamp, to_timestamp
+
 # Custom validators to be used for some of the fields
 # Prevent inclusion of the quotation marks ' " ´ `
 # This may be necessary to prevent javascript issues
@@ -28,6 +38,9 @@ no_quotation_marks_validator = RegexValidator(regex=r"['\"´`]+", inverse_match=
 # This prevents issues when autogenerating slugs from that field
 slugable_validator = RegexValidator(regex=r"[\w\s]+", message=_('Must contain at least one letter or digit'))
 
+# Number of scheduled AKs from a solver output that are loaded and updated together when importing a schedule
+SCHEDULE_IMPORT_CHUNK_SIZE = 500
+
 
 @dataclass
 class OptimizerTimeslot:
@@ -60,12 +73,89 @@ class OptimizerTimeslot:
         return f"({self.avail.simplified}, {self.idx}, {self.constraints})"
 
 
-TimeslotBlock = list[OptimizerTimeslot]
+class LazyTimeslotBlock(Sequence[OptimizerTimeslot]):
+    """Block of consecutive optimizer timeslots, stored as sequences of integers.
+
+    The timeslots are represented by their start and end timestamps (microseconds since the epoch,
+    cf. :mod:`AKModel.availability.intervals`), indices and constraint sets.
+    The `OptimizerTimeslot` objects (and their availabilities) are only created when a consumer
+    accesses them, which keeps fine discretizations of long events cheap to compute and to cache.
+    """
+
+    __slots__ = ("event", "starts", "ends", "indices", "constraints")
+
+    def __init__(
+            self,
+            *,
+            event: "Event",
+            starts: Sequence[int],
+            ends: Sequence[int],
+            indices: Sequence[int],
+            constraints: Sequence[set[str]],
+    ):
+        """
+        :param event: event the timeslots belong to.
+        :param starts: start timestamps of the timeslots.
+        :param ends: end timestamps of the timeslots.
+        :param indices: unique indices of the timeslots.
+        :param constraints: sets of constraints fulfilled by the timeslots.
+        """
+        self.event = event
+        self.starts = starts
+        self.ends = ends
+        self.indices = indices
+        self.constraints = constraints
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return LazyTimeslotBlock(
+                    event=self.event,
+                    starts=self.starts[item],
+                    ends=self.ends[item],
+                    indices=self.indices[item],
+                    constraints=self.constraints[item],
+            )
+
+        # local import to prevent cyclic import
+        # pylint: disable=import-outside-toplevel
+        from AKModel.availability.models import Availability
+
+        return OptimizerTimeslot(
+                avail=Availability(
+                        event=self.event,
+                        start=from_timestamp(self.starts[item]),
+                        end=from_timestamp(self.ends[item]),
+                ),
+                idx=self.indices[item],
+                constraints=self.constraints[item],
+        )
+
+    def __repr__(self) -> str:
+        return f"LazyTimeslotBlock({list(self)})"
+
+
+TimeslotBlock = Sequence[OptimizerTimeslot]
+
+
+def _timeslot_tuples(block: TimeslotBlock) -> Iterable[tuple[int, int, int, set[str]]]:
+    """Iterate over the timeslots of a block as (start timestamp, end timestamp, index, constraints) tuples.
+
+    For lazy blocks, no timeslot objects are created.
+    """
+    if isinstance(block, LazyTimeslotBlock):
+        return zip(block.starts, block.ends, block.indices, block.constraints)
+    return (
+        (to_timestamp(timeslot.avail.start), to_timestamp(timeslot.avail.end), timeslot.idx, timeslot.constraints)
+        for timeslot in block
+    )
 
 
 def merge_blocks(
         blocks: Iterable[TimeslotBlock]
-) -> Iterable[TimeslotBlock]:
+) -> Generator[LazyTimeslotBlock, None, None]:
     """Merge iterable of blocks together.
 
     The timeslots of all blocks are grouped into maximal blocks.
@@ -74,55 +164,60 @@ def merge_blocks(
     Throws a ValueError if any timeslots are overlapping but do not
     share the same start and end, i.e. partial overlap is not allowed.
 
+    The timeslots of each block have to be sorted by their start (which holds for all generated blocks).
+    The blocks are then combined with a k-way merge in O(n log k) for n timeslots in k blocks,
+    working on timestamps only. Merged blocks are yielded as soon as they are complete.
+
     :param blocks: iterable of blocks to merge.
     :return: iterable of merged blocks.
-    :rtype: iterable over lists of OptimizerTimeslot objects
+    :rtype: iterable over LazyTimeslotBlock objects
     """
+    blocks = [block for block in blocks if block]
     if not blocks:
-        return []
+        return
+    event = blocks[0].event if isinstance(blocks[0], LazyTimeslotBlock) else blocks[0][0].avail.event
 
-    # flatten timeslot iterables to single chain
-    timeslot_chain = itertools.chain.from_iterable(blocks)
+    def _block(starts, ends, indices, constraints):
+        return LazyTimeslotBlock(event=event, starts=starts, ends=ends, indices=indices, constraints=constraints)
 
-    # sort timeslots according to start
-    timeslots = sorted(
-            timeslot_chain,
-            key=lambda slot: slot.avail.start
-    )
-
-    if not timeslots:
-        return []
+    starts, ends, indices, constraints = array("q"), array("q"), array("q"), []
+    # whether the constraint set of the last timeslot is a copy created by a merge
+    # (and hence can be updated in place instead of creating a new set for every merge)
+    merged_constraints = False
 
-    all_blocks = []
-    current_block = [timeslots[0]]
-    timeslots = timeslots[1:]
-
-    for slot in timeslots:
-        if current_block and slot.avail.overlaps(current_block[-1].avail, strict=True):
-            if (
-                    slot.avail.start == current_block[-1].avail.start
-                    and slot.avail.end == current_block[-1].avail.end
-            ):
+    for start, end, idx, slot_constraints in heapq.merge(*map(_timeslot_tuples, blocks), key=itemgetter(0)):
+        if starts and start < ends[-1]:
+            if start == starts[-1] and end == ends[-1]:
                 # the same timeslot -> merge
-                current_block[-1] = current_block[-1].merge(slot)
-            else:
-                # partial overlap of interiors -> not supported
-                raise ValueError(
-                        "Partially overlapping timeslots are not supported!"
-                        f" ({current_block[-1].avail.simplified}, {slot.avail.simplified})"
-                )
-        elif not current_block or slot.avail.overlaps(current_block[-1].avail, strict=False):
-            # only endpoints in intersection -> same block
-            current_block.append(slot)
-        else:
+                if not merged_constraints:
+                    constraints[-1] = set(constraints[-1])
+                    merged_constraints = True
+                constraints[-1] |= slot_constraints
+                continue
+            # partial overlap of interiors -> not supported
+            # local import to prevent cyclic import
+            # pylint: disable=import-outside-toplevel
+            from AKModel.availability.models import Availability
+            last_avail = Availability(event=event, start=from_timestamp(starts[-1]), end=from_timestamp(ends[-1]))
+            avail = Availability(event=event, start=from_timestamp(start), end=from_timestamp(end))
+            raise ValueError(
+                    "Partially overlapping timeslots are not supported!"
+                    f" ({last_avail.simplified}, {avail.simplified})"
+            )
+        if starts and start > ends[-1]:
             # no overlap at all -> new block
-            all_blocks.append(current_block)
-            current_block = [slot]
+            yield _block(starts, ends, indices, constraints)
+            starts, ends, indices, constraints = array("q"), array("q"), array("q"), []
 
-    if current_block:
-        all_blocks.append(current_block)
+        # only endpoints in intersection -> same block
+        starts.append(start)
+        ends.append(end)
+        indices.append(idx)
+        constraints.append(slot_constraints)
+        merged_constraints = False
 
-    return all_blocks
+    if starts:
+        yield _block(starts, ends, indices, constraints)
 
 
 class Event(models.Model):
@@ -180,6 +275,10 @@ class Event(models.Model):
                                       help_text=_("An email address that is displayed on every page "
                                                   "and can be used for all kinds of questions"))
 
+    content_version = models.PositiveBigIntegerField(default=0, editable=False, verbose_name=_("Content version"),
+                                                     help_text=_("Incremented whenever exported data of this event "
+                                                                 "changes"))
+
     class Meta:
         verbose_name = _('Event')
         verbose_name_plural = _('Events')
@@ -188,6 +287,15 @@ class Event(models.Model):
     def __str__(self):
         return self.name
 
+    def save(self, *args, force_insert=False, force_update=False, using=None, update_fields=None):
+        if update_fields is None and not self._state.adding:
+            # the content version is only changed by `invalidate_content_fingerprint`,
+            # hence increments since this instance was loaded must not be overwritten
+            update_fields = [field.name for field in self._meta.concrete_fields
+                             if not field.primary_key and field.name != "content_version"]
+        super().save(*args, force_insert=force_insert, force_update=force_update, using=using,
+                     update_fields=update_fields)
+
     @staticmethod
     def get_by_slug(slug):
         """
@@ -319,6 +427,7 @@ class Event(models.Model):
             *,
             slot_index: int = 0,
             constraints: set[str] | None = None,
+            room_availability_index: ContainmentIndex | None = None,
     ) -> Generator[TimeslotBlock, None, int]:
         """Discretize a time range into timeslots.
 
@@ -327,64 +436,61 @@ class Event(models.Model):
         if (`end` - `start`) is not a whole number multiple of `slot_duration`
         then the last incomplete timeslot is dropped.
 
+        Only timeslots covered by the availability of some room are generated.
+        The blocks are computed from the room availabilities without iterating over all timeslots
+        and the timeslots of a block are only created when it is accessed (cf. `LazyTimeslotBlock`).
+
         :param start: Start of the time range.
         :param end: Start of the time range.
         :param slot_duration: Duration of a single timeslot in the discretization.
         :param slot_index: index of the first timeslot. Defaults to 0.
+        :param room_availability_index: index over the availabilities of all rooms of this event
+            (cf. `_room_availability_index`). Will be constructed if not given.
 
         :yield: Block of optimizer timeslots as the discretization result.
-        :ytype: list of OptimizerTimeslot
+        :ytype: LazyTimeslotBlock
 
         :return: The first slot index after the yielded blocks, i.e.
             `slot_index` + total # generated timeslots
         :rtype: int
         """
-        # local import to prevent cyclic import
-        # pylint: disable=import-outside-toplevel
-        from AKModel.availability.models import Availability
-
-        current_slot_start = start
-        previous_slot_start: datetime | None = None
-
         if constraints is None:
             constraints = set()
 
-        current_block = []
+        if room_availability_index is None:
+            room_availability_index = self._room_availability_index()
 
-        room_availabilities = list({
-            availability
-            for room in Room.objects.filter(event=self)
-            for availability in room.availabilities.all()
-        })
+        first_start = to_timestamp(start)
+        duration = slot_duration // MICROSECOND
+        count = max(0, (to_timestamp(end) - first_start) // duration)
 
-        while current_slot_start + slot_duration <= end:
-            slot = Availability(
+        # maximal runs of consecutive slots covered by some room, each one forms a block
+        for first, stop in room_availability_index.covered_slot_runs(first_start, duration, count):
+            run_start, run_end = first_start + first * duration, first_start + stop * duration
+            yield LazyTimeslotBlock(
                     event=self,
-                    start=current_slot_start,
-                    end=current_slot_start + slot_duration,
+                    starts=range(run_start, run_end, duration),
+                    ends=range(run_start + duration, run_end + duration, duration),
+                    indices=range(slot_index + first, slot_index + stop),
+                    constraints=[constraints] * (stop - first),
             )
 
-            if any((availability.contains(slot) for availability in room_availabilities)):
-                # no gap in a block
-                if (
-                        previous_slot_start is not None
-                        and previous_slot_start + slot_duration < current_slot_start
-                ):
-                    yield current_block
-                    current_block = []
-
-                current_block.append(
-                        OptimizerTimeslot(avail=slot, idx=slot_index, constraints=constraints)
-                )
-                previous_slot_start = current_slot_start
+        return slot_index + count
+
+    def _room_availability_index(self) -> ContainmentIndex:
+        """Construct an index over the availabilities of all rooms of this event.
 
-            slot_index += 1
-            current_slot_start += slot_duration
+        The index allows to check with a binary search whether a timeslot is covered by
+        a single availability of some room. Uses a single query.
 
-        if current_block:
-            yield current_block
+        :return: index over all room availabilities
+        :rtype: ContainmentIndex
+        """
+        # local import to prevent cyclic import
+        # pylint: disable=import-outside-toplevel
+        from AKModel.availability.models import Availability
 
-        return slot_index
+        return ContainmentIndex.from_availabilities(Availability.objects.filter(room__event=self))
 
     def uniform_time_slots(self, *, slots_in_an_hour: float) -> Iterable[TimeslotBlock]:
         """Uniformly discretize the entire event into blocks of timeslots.
@@ -420,6 +526,7 @@ class Event(models.Model):
         """
         slot_duration = timedelta(hours=1.0 / slots_in_an_hour)
         slot_index = 0
+        room_availability_index = self._room_availability_index()
 
         for block_slot in DefaultSlot.objects.filter(event=self).order_by("start", "end"):
             category_constraints = AKCategory.create_category_optimizer_constraints(
@@ -432,12 +539,15 @@ class Event(models.Model):
                     slot_duration=slot_duration,
                     slot_index=slot_index,
                     constraints=category_constraints,
+                    room_availability_index=room_availability_index,
             )
 
     def discretize_timeslots(self, *, slots_in_an_hour: float | None = None) -> Iterable[TimeslotBlock]:
         """"Choose discretization scheme.
 
         Uses default_time_slots if the event has any DefaultSlot, otherwise uniform_time_slots.
+        The result is cached per granularity until the default slots, room availabilities,
+        categories or the event itself change (cf. `invalidate_discretization_cache`).
 
         :param slots_in_an_hour: The percentage of an hour covered by a single slot.
             Determines the discretization granularity.
@@ -448,11 +558,154 @@ class Event(models.Model):
         if slots_in_an_hour is None:
             slots_in_an_hour = 1.0 / float(self.export_slot)
 
-        if DefaultSlot.objects.filter(event=self).exists():
-            # discretize default slots if they exists
-            yield from merge_blocks(self.default_time_slots(slots_in_an_hour=slots_in_an_hour))
-        else:
-            yield from self.uniform_time_slots(slots_in_an_hour=slots_in_an_hour)
+        cache_key = self._discretization_cache_key(slots_in_an_hour)
+        blocks = cache.get(cache_key)
+        if blocks is None:
+            if DefaultSlot.objects.filter(event=self).exists():
+                # discretize default slots if they exists
+                blocks = list(merge_blocks(self.default_time_slots(slots_in_an_hour=slots_in_an_hour)))
+            else:
+                blocks = list(self.uniform_time_slots(slots_in_an_hour=slots_in_an_hour))
+            cache.set(cache_key, blocks, settings.EXPORT_TIMESLOT_CACHE_TIMEOUT)
+        yield from blocks
+
+    @staticmethod
+    def _discretization_cache_version_key(event_pk: int) -> str:
+        return f"akmodel-event-{event_pk}-timeslots-version"
+
+    def _discretization_cache_key(self, slots_in_an_hour: float) -> str:
+        """Get the cache key of the discretization of this event with the given granularity.
+
+        The key contains a version token of the event that is replaced whenever the discretization is invalidated.
+        Thus, entries computed concurrently from outdated data are never read again.
+
+        :param slots_in_an_hour: The percentage of an hour covered by a single slot.
+        :return: cache key
+        :rtype: str
+        """
+        version = self._cache_version_token(self._discretization_cache_version_key(self.pk))
+        return f"akmodel-event-{self.pk}-timeslots-{version}-{slots_in_an_hour!r}"
+
+    @staticmethod
+    def _cache_version_token(version_key: str) -> str:
+        """Get the version token stored under the given cache key, a new token is created if there is none.
+
+        :param version_key: cache key of the version token
+        :return: version token
+        :rtype: str
+        """
+        version = cache.get(version_key)
+        if version is None:
+            cache.add(version_key, uuid.uuid4().hex, timeout=None)
+            version = cache.get(version_key)
+        return version
+
+    @classmethod
+    def invalidate_discretization_cache(cls, event_pk: int | None):
+        """Invalidate the cached discretizations of the event with the given primary key.
+
+        Should be called whenever data the discretization depends on changes
+        (default slots, room availabilities, categories and the event itself).
+        The invalidation is repeated after the current transaction was committed
+        to also discard discretizations computed concurrently from the uncommitted state.
+
+        :param event_pk: primary key of the event, nothing happens if this is None
+        """
+        if event_pk is None:
+            return
+        version_key = cls._discretization_cache_version_key(event_pk)
+        cache.delete(version_key)
+        transaction.on_commit(lambda: cache.delete(version_key))
+
+    @classmethod
+    def invalidate_content_fingerprint(cls, event_pk: int | None):
+        """Change the content fingerprint of the event with the given primary key.
+
+        Should be called whenever data of the event that is exported changes (cf. `content_fingerprint`).
+        The content version of the event is incremented in the database, hence the change becomes visible
+        together with the changed data when the current transaction is committed.
+
+        :param event_pk: primary key of the event, nothing happens if this is None
+        """
+        if event_pk is None:
+            return
+        cls.objects.filter(pk=event_pk).update(content_version=F("content_version") + 1)
+
+    def content_fingerprint(self) -> str:
+        """Compute a cheap fingerprint of the exported content of this event.
+
+        The fingerprint combines the number of rows and the latest change (timestamp of the last update for slots,
+        highest primary key otherwise) of the slots, AKs, rooms, availabilities, default slots, participants
+        and preferences of this event, all loaded with a single query, with the content version of the event.
+        The version is incremented by signal receivers whenever exported data of this event is changed,
+        which also covers changes of relations and rows without timestamps (cf. `invalidate_content_fingerprint`).
+
+        Hence, the fingerprint changes whenever the content changes and can be used as part of cache keys or ETags.
+        Bulk updates bypassing the signals must therefore either call `invalidate_content_fingerprint`
+        or (for slots) set the timestamp of the last update.
+
+        :return: fingerprint as hex digest
+        :rtype: str
+        """
+        # local import to prevent cyclic import
+        # pylint: disable=import-outside-toplevel
+        from AKModel.availability.models import Availability
+
+        tables = {
+            "slots": (AKSlot.objects.all(), "updated"),
+            "aks": (AK.objects_all.all(), "pk"),
+            "rooms": (Room.objects.all(), "pk"),
+            "availabilities": (Availability.objects.all(), "pk"),
+            "default_slots": (DefaultSlot.objects.all(), "pk"),
+        }
+        if apps.is_installed("AKPreference"):
+            # local import to prevent cyclic import
+            # pylint: disable=import-outside-toplevel
+            from AKPreference.models import AKPreference, EventParticipant
+            tables["participants"] = (EventParticipant.objects.all(), "pk")
+            tables["preferences"] = (AKPreference.objects.all(), "pk")
+
+        aggregates = {}
+        for name, (queryset, latest_field) in tables.items():
+            rows_of_event = queryset.filter(event=OuterRef("pk")).order_by().values("event")
+            aggregates[f"{name}_count"] = Subquery(rows_of_event.annotate(count=Count("pk")).values("count"))
+            aggregates[f"{name}_latest"] = Subquery(rows_of_event.annotate(latest=Max(latest_field)).values("latest"))
+        content = Event.objects.filter(pk=self.pk).values("content_version", **aggregates).get()
+
+        return hashlib.sha256(json.dumps(content, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    def check_solver_input_consistency(self, solver_input: dict[str, Any]):
+        """Check that the data of the event did not change since it was exported as solver input.
+
+        If the export hash of the input matches its content and the content fingerprint of the event
+        did not change since the export, no new export is needed. Otherwise, the input is compared
+        to a new export with the same export options (unfiltered if the input has none)
+        and the differences are reported.
+
+        :param solver_input: The solver input as embedded in the output of the solver.
+        :raises ValueError: if the data changed since the export.
+        """
+        if not apps.is_installed("AKSolverInterface"):
+            return
+
+        # pylint: disable=import-outside-toplevel
+        from AKSolverInterface.forms import export_serializer_kwargs
+        from AKSolverInterface.serializers import ExportEventSerializer, export_differences, export_hash
+
+        input_info = solver_input.get("info", {})
+        unchanged = (
+                input_info.get("export_hash") == export_hash(solver_input)
+                and input_info.get("content_fingerprint") == self.content_fingerprint()
+        )
+        if not unchanged:
+            export_options = input_info.get("export_options")
+            serializer_kwargs = export_serializer_kwargs(self, export_options) if export_options is not None else {}
+            differences = export_differences(solver_input, ExportEventSerializer(self, **serializer_kwargs).data)
+            if differences:
+                raise ValueError(
+                        _("Data has changed since the export. Reexport and run the solver again.")
+                        + " " + "; ".join(str(difference) for difference in differences)
+                )
 
     @transaction.atomic
     def schedule_from_json(
@@ -464,6 +717,11 @@ class Event(models.Model):
             the AK schedule. The json data is assumed to be constructed
             following the output specification of the KoMa conference optimizer, cf.
             https://github.com/Die-KoMa/ak-plan-optimierung/wiki/Input-&-output-format
+            Instead of a string, the decoded data can be passed. In this case, the scheduled AKs can
+            be given by any iterable (e.g., a generator parsing them incrementally from an upload),
+            which is consumed only once and in chunks.
+        :param check_for_data_inconsistency: Check that the data of the event did not change since the export
+            (cf. `check_solver_input_consistency`).
         """
         if isinstance(schedule, str):
             schedule = json.loads(schedule)
@@ -471,12 +729,8 @@ class Event(models.Model):
         if "input" not in schedule or "scheduled_aks" not in schedule:
             raise ValueError(_("Cannot parse malformed JSON input."))
 
-        if apps.is_installed("AKSolverInterface") and check_for_data_inconsistency:
-            from AKSolverInterface.serializers import ExportEventSerializer  # pylint: disable=import-outside-toplevel
-            export_dict = ExportEventSerializer(self).data
-
-            if schedule["input"] != export_dict:
-                raise ValueError(_("Data has changed since the export. Reexport and run the solver again."))
+        if check_for_data_inconsistency:
+            self.check_solver_input_consistency(schedule["input"])
 
         slots_in_an_hour = 1.0 / schedule["input"]["timeslots"]["info"]["duration"]
 
@@ -486,10 +740,52 @@ class Event(models.Model):
             for timeslot in block
         }
 
-        slots_updated = 0
-        for scheduled_slot in schedule["scheduled_aks"]:
+        # Apply the schedule in chunks, such that scheduled AKs can be streamed from large solver outputs.
+        # Saving every slot individually would trigger the constraint checks for each of them,
+        # hence update the slots of each chunk at once and recompute the constraint violations of the event afterwards
+        number_of_updated_slots = 0
+        scheduled_slots = iter(schedule["scheduled_aks"])
+        while chunk := list(itertools.islice(scheduled_slots, SCHEDULE_IMPORT_CHUNK_SIZE)):
+            updated_slots = self._schedule_slots(chunk, timeslot_dict)
+            AKSlot.objects.bulk_update(updated_slots, ["room", "start", "updated"])
+            number_of_updated_slots += len(updated_slots)
+
+        if number_of_updated_slots:
+            # bulk updates do not send signals
+            Event.invalidate_content_fingerprint(self.pk)
+            if apps.is_installed("AKScheduling"):
+                # local import to decouple
+                # pylint: disable=import-outside-toplevel
+                from AKScheduling.violations import update_constraint_violations_for_event
+                update_constraint_violations_for_event(self)
+
+        return number_of_updated_slots
+
+    def _schedule_slots(self, scheduled_slots: list[dict[str, Any]], timeslot_dict: dict) -> list["AKSlot"]:
+        """Check a chunk of AKs scheduled by the solver and assign the slots to their rooms and times.
+
+        :param scheduled_slots: The scheduled AKs as in the output of the solver.
+        :param timeslot_dict: The timeslots of the discretization used by the solver, indexed by their ids.
+        :return: The slots that were changed (without saving them).
+        :rtype: list[AKSlot]
+        """
+        # Load all affected slots and rooms of the chunk at once instead of querying them per scheduled AK
+        slots = AKSlot.objects.select_related("ak", "room").in_bulk(
+                [int(scheduled_slot["ak_id"]) for scheduled_slot in scheduled_slots]
+        )
+        rooms = Room.objects.in_bulk([int(scheduled_slot["room_id"]) for scheduled_slot in scheduled_slots])
+
+        updated_slots = []
+        for scheduled_slot in scheduled_slots:
             scheduled_slot["timeslot_ids"] = list(map(int, scheduled_slot["timeslot_ids"]))
-            slot = AKSlot.objects.get(id=int(scheduled_slot["ak_id"]))
+            try:
+                slot = slots[int(scheduled_slot["ak_id"])]
+            except KeyError as e:
+                raise AKSlot.DoesNotExist(f"AKSlot matching id {scheduled_slot['ak_id']} does not exist.") from e
+            try:
+                solver_room = rooms[int(scheduled_slot["room_id"])]
+            except KeyError as e:
+                raise Room.DoesNotExist(f"Room matching id {scheduled_slot['room_id']} does not exist.") from e
 
             if not scheduled_slot["timeslot_ids"]:
                 raise ValueError(
@@ -513,7 +809,6 @@ class Event(models.Model):
                 )
 
             if slot.fixed:
-                solver_room = Room.objects.get(id=int(scheduled_slot["room_id"]))
                 if slot.room != solver_room:
                     raise ValueError(
                             _(
@@ -537,12 +832,12 @@ class Event(models.Model):
                             )
                     )
             else:
-                slot.room = Room.objects.get(id=int(scheduled_slot["room_id"]))
+                slot.room = solver_room
                 slot.start = start_timeslot.start
-                slot.save()
-                slots_updated += 1
+                slot.updated = timezone.now()
+                updated_slots.append(slot)
 
-        return slots_updated
+        return updated_slots
 
     @property
     def rooms(self):
@@ -1312,6 +1607,9 @@ class ConstraintViolation(models.Model):
         verbose_name = _('Constraint Violation')
         verbose_name_plural = _('Constraint Violations')
         ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['event', 'type', 'signature_hash'], name='constraintviolation_signature'),
+        ]
 
     class ViolationType(models.TextChoices):
         """
@@ -1366,6 +1664,9 @@ class ConstraintViolation(models.Model):
     timestamp = models.DateTimeField(auto_now_add=True, verbose_name=_('Timestamp'), help_text=_('Time of creation'))
     manually_resolved = models.BooleanField(verbose_name=_('Manually Resolved'), default=False,
                                             help_text=_('Mark this violation manually as resolved'))
+    signature_hash = models.CharField(verbose_name=_('Signature'), max_length=64, blank=True, editable=False,
+                                      help_text=_('Hash of the type, references and comment of this violation, '
+                                                  'used to find matching violations'))
 
     fields = ['ak_owner', 'room', 'requirement', 'category', 'comment']
     fields_mm = ['_aks', '_ak_slots']
@@ -1374,6 +1675,7 @@ class ConstraintViolation(models.Model):
         super().__init__(*args, **kwargs)
         self.aks_tmp = set()
         self.ak_slots_tmp = set()
+        self._storing_tmp_relations = False
 
     def get_details(self):
         """
@@ -1478,22 +1780,59 @@ class ConstraintViolation(models.Model):
         return ', '.join(str(a) for a in self.ak_slots_tmp)
 
     def save(self, *args, **kwargs):
+        self.signature_hash = self.compute_signature_hash()
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'signature_hash'}
         super().save(*args, **kwargs)
         # Store temporary m2m-relations in db
-        for ak in self.aks_tmp:
-            self.aks.add(ak)
-        for ak_slot in self.ak_slots_tmp:
-            self.ak_slots.add(ak_slot)
+        # (the signature hash already includes them, hence it does not have to be updated afterwards)
+        self._storing_tmp_relations = True
+        try:
+            if self.aks_tmp:
+                self.aks.add(*self.aks_tmp)
+            if self.ak_slots_tmp:
+                self.ak_slots.add(*self.ak_slots_tmp)
+        finally:
+            self._storing_tmp_relations = False
 
     def __str__(self):
         return f"{self.get_level_display()}: {self.get_type_display()} [{self.get_details()}]"
 
+    @property
+    def signature(self) -> tuple:
+        """
+        Canonical signature of this violation, consisting of its type, the primary keys of the related owner, room,
+        requirement and category, its comment and the sorted primary keys of its aks and ak slots.
+
+        Uses the tmp relations for violations that are not persisted yet. For persisted violations,
+        the relations in the db and the tmp relations that will be stored with the next save are combined.
+        Prefetch `aks` and `ak_slots` to compute the signatures of many violations without further queries.
+
+        :return: signature (hashable)
+        :rtype: tuple
+        """
+        return (
+            self.type,
+            *(getattr(self, self._meta.get_field(field).attname) for field in self.fields),
+            tuple(sorted({ak.pk for ak in self._aks} | {ak.pk for ak in self.aks_tmp})),
+            tuple(sorted({ak_slot.pk for ak_slot in self._ak_slots} | {ak_slot.pk for ak_slot in self.ak_slots_tmp})),
+        )
+
+    def compute_signature_hash(self) -> str:
+        """
+        Compute the hash of the signature of this violation (cf. `signature`) as stored in `signature_hash`
+
+        :return: hash as hex digest
+        :rtype: str
+        """
+        return hashlib.sha256(json.dumps(self.signature).encode("utf-8")).hexdigest()
+
     def matches(self, other):
         """
         Check whether one constraint violation instance matches another,
         this means has the same type, room, requirement, owner, category
-        as well as the same lists of aks and ak slots.
-        PK, timestamp, comments and manual resolving are ignored.
+        as well as the same lists of aks and ak slots (cf. `signature`).
+        PK, level, timestamp and manual resolving are ignored.
 
         :param other: second instance to compare to
         :type other: ConstraintViolation
@@ -1502,22 +1841,7 @@ class ConstraintViolation(models.Model):
         """
         if not isinstance(other, ConstraintViolation):
             return False
-        # Check type
-        if self.type != other.type:
-            return False
-        # Make sure both have the same aks and ak slots
-        for field_mm in self.fields_mm:
-            s: set = getattr(self, field_mm)
-            o: set = getattr(other, field_mm)
-            if len(s) != len(o):
-                return False
-            if len(s.intersection(o)) != len(s):
-                return False
-        # Check other "defining" fields
-        for field in self.fields:
-            if getattr(self, field) != getattr(other, field):
-                return False
-        return True
+        return self.signature == other.signature
 
 
 class DefaultSlot(models.Model):
@@ -1571,3 +1895,109 @@ class DefaultSlot(models.Model):
 
     def __str__(self):
         return f"{self.event}: {self.start_simplified} - {self.end_simplified}"
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+def event_changed_handler(sender, instance: Event, **kwargs):  # pylint: disable=unused-argument
+    """
+    Signal receiver: Invalidate the cached discretization and the content fingerprint of an event when it is changed
+    """
+    Event.invalidate_discretization_cache(instance.pk)
+    Event.invalidate_content_fingerprint(instance.pk)
+
+
+@receiver(post_save, sender=DefaultSlot)
+@receiver(post_delete, sender=DefaultSlot)
+@receiver(post_save, sender=AKCategory)
+@receiver(post_delete, sender=AKCategory)
+@receiver(post_save, sender=Room)
+@receiver(post_delete, sender=Room)
+def discretization_input_changed_handler(sender,  # pylint: disable=unused-argument
+                                         instance: DefaultSlot | AKCategory | Room, **kwargs):
+    """
+    Signal receiver: Invalidate the cached discretization and the content fingerprint of an event when
+    one of its default slots, categories or rooms is changed
+    """
+    Event.invalidate_discretization_cache(instance.event_id)
+    Event.invalidate_content_fingerprint(instance.event_id)
+
+
+@receiver(m2m_changed, sender=DefaultSlot.primary_categories.through)
+def default_slot_categories_changed_handler(sender,  # pylint: disable=unused-argument
+                                            instance: DefaultSlot | AKCategory, **kwargs):
+    """
+    Signal receiver: Invalidate the cached discretization and the content fingerprint of an event when
+    the primary categories of one of its default slots are changed
+    """
+    Event.invalidate_discretization_cache(instance.event_id)
+    Event.invalidate_content_fingerprint(instance.event_id)
+
+
+@receiver(post_save, sender=AK)
+@receiver(post_delete, sender=AK)
+@receiver(post_save, sender=AKSlot)
+@receiver(post_delete, sender=AKSlot)
+@receiver(post_save, sender=AKOwner)
+@receiver(post_delete, sender=AKOwner)
+@receiver(post_save, sender=AKTrack)
+@receiver(post_delete, sender=AKTrack)
+@receiver(post_save, sender=AKRequirement)
+@receiver(post_delete, sender=AKRequirement)
+@receiver(post_save, sender=AKType)
+@receiver(post_delete, sender=AKType)
+def export_input_changed_handler(sender,  # pylint: disable=unused-argument
+                                 instance: AK | AKSlot | AKOwner | AKTrack | AKRequirement | AKType, **kwargs):
+    """
+    Signal receiver: Invalidate the content fingerprint of an event when
+    one of its AKs, slots, owners, tracks, requirements or types is changed
+    """
+    Event.invalidate_content_fingerprint(instance.event_id)
+
+
+@receiver(m2m_changed, sender=AK.owners.through)
+@receiver(m2m_changed, sender=AK.requirements.through)
+@receiver(m2m_changed, sender=AK.types.through)
+@receiver(m2m_changed, sender=AK.conflicts.through)
+@receiver(m2m_changed, sender=AK.prerequisites.through)
+@receiver(m2m_changed, sender=Room.properties.through)
+def export_relations_changed_handler(sender,  # pylint: disable=unused-argument
+                                     instance: AK | AKOwner | AKRequirement | AKType | Room, **kwargs):
+    """
+    Signal receiver: Invalidate the content fingerprint of an event when
+    the owners, requirements, types, conflicts or prerequisites of one of its AKs
+    or the properties of one of its rooms are changed
+    """
+    Event.invalidate_content_fingerprint(instance.event_id)
+
+
+@receiver(m2m_changed, sender=ConstraintViolation.aks.through)
+@receiver(m2m_changed, sender=ConstraintViolation.ak_slots.through)
+def constraint_violation_relations_changed_handler(sender, instance: ConstraintViolation | AK | AKSlot, action: str,
+                                                   reverse: bool, pk_set: set | None, **kwargs):
+    """
+    Signal receiver: Update the stored signature hash of constraint violations when their aks or ak slots are changed
+    (e.g., in the admin)
+    """
+    if reverse and action == "pre_clear":
+        # the affected violations are not passed to the post_clear signal, hence remember them
+        relation = "aks" if sender is ConstraintViolation.aks.through else "ak_slots"
+        instance._cleared_constraint_violation_pks = set(  # pylint: disable=protected-access
+            ConstraintViolation.objects.filter(**{relation: instance}).values_list("pk", flat=True)
+        )
+        return
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if reverse:
+        if action == "post_clear":
+            pk_set = getattr(instance, "_cleared_constraint_violation_pks", set())
+        violations = ConstraintViolation.objects.filter(pk__in=pk_set or []).prefetch_related("aks", "ak_slots")
+    elif instance._storing_tmp_relations:  # pylint: disable=protected-access
+        return
+    else:
+        violations = [instance]
+    for violation in violations:
+        signature_hash = violation.compute_signature_hash()
+        if signature_hash != violation.signature_hash:
+            violation.signature_hash = signature_hash
+            ConstraintViolation.objects.filter(pk=violation.pk).update(signature_hash=signature_hash)
@@ -0,0 +1,212 @@
+import random
+from datetime import datetime, timedelta, timezone
+
+from django.test import SimpleTestCase, TestCase
+
+from AKModel.availability.intervals import IntervalSet, OverlapIndex, from_timestamp, to_timestamp
+from AKModel.availability.models import Availability
+from AKModel.management.commands.benchmark_availability import _naive_intersection
+from AKModel.models import Event
+
+
+class AvailabilityIntersectionTests(SimpleTestCase):
+    """
+    Tests for the sweep line intersection of availability sets
+    """
+
+    def setUp(self):
+        self.start = datetime(2020, 1, 1, tzinfo=timezone.utc)
+        self.event = Event(name="Test", slug="test", start=self.start, end=self.start + timedelta(days=7))
+
+    def _avail(self, start_hours: float, end_hours: float) -> Availability:
+        return Availability(event=self.event,
+                            start=self.start + timedelta(hours=start_hours),
+                            end=self.start + timedelta(hours=end_hours))
+
+    def _as_tuples(self, availabilities):
+        return [(a.start, a.end) for a in availabilities]
+
+    def test_simple_cases(self):
+        """
+        Test intersections of hand-crafted sets including touching and empty sets
+        """
+        set_a = [self._avail(0, 4), self._avail(6, 10)]
+        set_b = [self._avail(2, 7), self._avail(9, 12)]
+        self.assertEqual(self._as_tuples(Availability.intersection(set_a, set_b)),
+                         self._as_tuples([self._avail(2, 4), self._avail(6, 7), self._avail(9, 10)]))
+
+        # Touching availabilities do not intersect
+        self.assertEqual(Availability.intersection([self._avail(0, 2)], [self._avail(2, 4)]), [])
+        # Empty and missing sets
+        self.assertEqual(Availability.intersection(), [])
+        self.assertEqual(Availability.intersection(set_a, []), [])
+        # A single set is only unioned
+        self.assertEqual(self._as_tuples(Availability.intersection([self._avail(0, 2), self._avail(1, 3)])),
+                         self._as_tuples([self._avail(0, 3)]))
+
+    def test_event_is_kept(self):
+        """
+        Test that the event is kept if all availabilities belong to the same event
+        """
+        result = Availability.intersection([self._avail(0, 4)], [self._avail(2, 6)])
+        self.assertIs(result[0].event, self.event)
+
+    def test_matches_pairwise_implementation(self):
+        """
+        Test that the sweep line intersection matches the pairwise reference implementation on random sets
+        """
+        rnd = random.Random(1)
+        for number_of_sets in range(2, 5):
+            for size in [1, 5, 50]:
+                with self.subTest(number_of_sets=number_of_sets, size=size):
+                    sets = []
+                    for _ in range(number_of_sets):
+                        sets.append([])
+                        for _ in range(size):
+                            start = rnd.randrange(0, 100)
+                            sets[-1].append(self._avail(start, start + rnd.randrange(1, 10)))
+                    self.assertEqual(self._as_tuples(Availability.intersection(*sets)),
+                                     self._as_tuples(_naive_intersection(*sets)))
+
+
+class IntervalSetTests(SimpleTestCase):
+    """
+    Tests for the array-backed interval set
+    """
+
+    @staticmethod
+    def _set(*intervals):
+        return IntervalSet(intervals)
+
+    @staticmethod
+    def _pairs(interval_set):
+        return list(zip(interval_set.starts, interval_set.ends))
+
+    def test_normalization(self):
+        """
+        Test that overlapping and touching intervals are merged and invalid ones are dropped
+        """
+        self.assertEqual(self._pairs(self._set((5, 8), (0, 2), (2, 3), (1, 2), (7, 9), (12, 10))),
+                         [(0, 3), (5, 9)])
+
+    def test_operations(self):
+        """
+        Test union, intersection and difference
+        """
+        set_a = self._set((0, 4), (6, 10))
+        set_b = self._set((2, 7), (9, 12), (20, 21))
+        self.assertEqual(self._pairs(set_a | set_b), [(0, 12), (20, 21)])
+        self.assertEqual(self._pairs(set_a & set_b), [(2, 4), (6, 7), (9, 10)])
+        self.assertEqual(self._pairs(set_a - set_b), [(0, 2), (7, 9)])
+        self.assertEqual(self._pairs(set_b - set_a), [(4, 6), (10, 12), (20, 21)])
+        self.assertEqual(self._pairs(self._set((0, 2)) & self._set((2, 4))), [])
+        self.assertEqual(self._pairs(self._set((0, 10)) - self._set((2, 3), (5, 6))), [(0, 2), (3, 5), (6, 10)])
+
+    def test_coverage(self):
+        """
+        Test contains, covers and covers_each
+        """
+        interval_set = self._set((0, 4), (6, 10))
+        self.assertTrue(interval_set.contains(6, 10))
+        self.assertFalse(interval_set.contains(3, 7))
+        self.assertFalse(interval_set.contains(-2, -1))
+        self.assertTrue(interval_set.covers(self._set((1, 2), (7, 8))))
+        self.assertFalse(interval_set.covers(self._set((1, 2), (5, 8))))
+        self.assertEqual(interval_set.covers_each([-1, 0, 3, 5, 6, 9], [0, 4, 5, 6, 10, 11]),
+                         [False, True, False, False, True, False])
+        self.assertEqual(IntervalSet().covers_each([0], [1]), [False])
+
+    def test_datetime_conversion(self):
+        """
+        Test the exact conversion between datetimes and timestamps
+        """
+        dt = datetime(2024, 5, 17, 13, 37, 0, 123456, tzinfo=timezone.utc)
+        self.assertEqual(from_timestamp(to_timestamp(dt)), dt)
+        start = datetime(2024, 5, 17, tzinfo=timezone.utc)
+        interval_set = IntervalSet.from_datetimes([(start, start + timedelta(hours=2))])
+        self.assertEqual(list(interval_set), [(start, start + timedelta(hours=2))])
+
+    def test_matches_availability_intersection(self):
+        """
+        Test that the intersection of interval sets matches the intersection of availabilities
+        """
+        rnd = random.Random(2)
+        start = datetime(2020, 1, 1, tzinfo=timezone.utc)
+        event = Event(name="Test", slug="test", start=start, end=start + timedelta(days=7))
+        for _ in range(20):
+            sets = []
+            for _ in range(3):
+                sets.append([])
+                for _ in range(10):
+                    avail_start = start + timedelta(hours=rnd.randrange(0, 100))
+                    sets[-1].append(Availability(event=event, start=avail_start,
+                                                 end=avail_start + timedelta(hours=rnd.randrange(1, 10))))
+            interval_sets = [IntervalSet.from_availabilities(availset) for availset in sets]
+            self.assertEqual(list(interval_sets[0] & interval_sets[1] & interval_sets[2]),
+                             [(a.start, a.end) for a in Availability.intersection(*sets)])
+
+
+class OverlapIndexTests(SimpleTestCase):
+    """
+    Tests for the index of intervals to find overlapping intervals
+    """
+
+    def test_overlapping(self):
+        """
+        Test that intersecting and touching intervals are found (sorted by start)
+        """
+        index = OverlapIndex([(0, 4, "a"), (6, 10, "b"), (2, 3, "c"), (0, 20, "d"), (12, 12, "e")])
+        self.assertEqual(len(index), 5)
+        self.assertEqual(index.overlapping(3, 5), ["a", "d", "c"])
+        self.assertEqual(index.overlapping(10, 11), ["d", "b"])
+        self.assertEqual(index.overlapping(12, 12), ["d", "e"])
+        self.assertEqual(index.overlapping(21, 30), [])
+        self.assertEqual(OverlapIndex().overlapping(0, 1), [])
+
+    def test_matches_linear_scan(self):
+        """
+        Test that the results match a linear scan for random intervals
+        """
+        rnd = random.Random(3)
+        for size in [1, 2, 7, 64, 100]:
+            intervals = []
+            for i in range(size):
+                start = rnd.randrange(0, 1000)
+                intervals.append((start, start + rnd.randrange(0, 100), i))
+            index = OverlapIndex(intervals)
+            for _ in range(50):
+                start = rnd.randrange(-50, 1050)
+                end = start + rnd.randrange(0, 50)
+                self.assertCountEqual(index.overlapping(start, end),
+                                      [item for interval_start, interval_end, item in intervals
+                                       if interval_start <= end and interval_end >= start])
+
+
+class IntervalSetDatabaseTests(TestCase):
+    """
+    Tests for the conversion between interval sets and availability querysets
+    """
+    fixtures = ['model.json']
+
+    def test_group_by(self):
+        """
+        Test that grouping availabilities creates the same sets as converting them one by one
+        """
+        grouped = IntervalSet.group_by(Availability.objects.all(), 'room_id')
+        self.assertTrue(grouped)
+        for room_id, interval_set in grouped.items():
+            self.assertEqual(interval_set,
+                             IntervalSet.from_availabilities(Availability.objects.filter(room_id=room_id)))
+            self.assertEqual(interval_set,
+                             IntervalSet.from_availabilities(list(Availability.objects.filter(room_id=room_id))))
+
+    def test_round_trip(self):
+        """
+        Test that interval sets can be turned into availabilities and back
+        """
+        availabilities = Availability.objects.filter(room__isnull=False)
+        interval_set = IntervalSet.from_availabilities(availabilities)
+        event = availabilities.first().event
+        new_availabilities = interval_set.to_availabilities(event=event)
+        self.assertTrue(all(avail.event == event for avail in new_availabilities))
+        self.assertEqual(IntervalSet.from_availabilities(new_availabilities), interval_set)
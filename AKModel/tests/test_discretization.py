@@ -0,0 +1,305 @@
+import random
+from datetime import datetime, timedelta, timezone
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+
+from AKModel.availability.intervals import MICROSECOND, ContainmentIndex, to_timestamp
+from AKModel.availability.models import Availability
+from AKModel.management.commands.benchmark_merge_blocks import _as_tuples, _sorting_merge_blocks
+from AKModel.models import AK, AKCategory, DefaultSlot, Event, LazyTimeslotBlock, Room, merge_blocks
+
+
+def _reference_slots_from_block(event: Event, start: datetime, end: datetime, slot_duration: timedelta):
+    """
+    Reference implementation of the previous discretization, checking every slot against every room availability
+    """
+    room_availabilities = list({
+        availability
+        for room in Room.objects.filter(event=event)
+        for availability in room.availabilities.all()
+    })
+
+    blocks = []
+    current_block = []
+    previous_slot_start = None
+    current_slot_start = start
+    slot_index = 0
+    while current_slot_start + slot_duration <= end:
+        slot = Availability(event=event, start=current_slot_start, end=current_slot_start + slot_duration)
+        if any(availability.contains(slot) for availability in room_availabilities):
+            if previous_slot_start is not None and previous_slot_start + slot_duration < current_slot_start:
+                blocks.append(current_block)
+                current_block = []
+            current_block.append((slot_index, slot.start, slot.end))
+            previous_slot_start = current_slot_start
+        slot_index += 1
+        current_slot_start += slot_duration
+    if current_block:
+        blocks.append(current_block)
+    return blocks
+
+
+class ContainmentIndexTests(SimpleTestCase):
+    """
+    Tests for the index used to check whether an interval is contained in a single interval of a collection
+    """
+
+    def test_touching_intervals_are_not_merged(self):
+        """
+        Test that an interval spanning two touching or overlapping intervals is not contained
+        """
+        index = ContainmentIndex([(0, 4), (4, 8), (6, 10), (1, 3), (20, 30), (20, 25)])
+        self.assertEqual(list(zip(index.starts, index.ends)), [(0, 4), (4, 8), (6, 10), (20, 30)])
+        self.assertTrue(index.contains(0, 4))
+        self.assertTrue(index.contains(7, 10))
+        self.assertFalse(index.contains(3, 5))
+        self.assertFalse(index.contains(5, 9))
+        self.assertFalse(index.contains(-1, 0))
+        self.assertFalse(index.contains(29, 31))
+        self.assertFalse(ContainmentIndex().contains(0, 1))
+
+    def test_matches_brute_force(self):
+        """
+        Test that the index gives the same answers as checking all intervals on random collections
+        """
+        rnd = random.Random(3)
+        for _ in range(50):
+            intervals = []
+            for _ in range(rnd.randrange(0, 20)):
+                start = rnd.randrange(0, 100)
+                intervals.append((start, start + rnd.randrange(0, 20)))
+            index = ContainmentIndex(intervals)
+            for _ in range(50):
+                start = rnd.randrange(-5, 120)
+                end = start + rnd.randrange(0, 10)
+                self.assertEqual(index.contains(start, end),
+                                 any(i_start <= start and i_end >= end for i_start, i_end in intervals))
+
+    def test_covered_slot_runs(self):
+        """
+        Test that the runs of covered slots match checking every slot on random collections
+        """
+        rnd = random.Random(5)
+        for _ in range(50):
+            intervals = []
+            for _ in range(rnd.randrange(0, 10)):
+                start = rnd.randrange(0, 100)
+                intervals.append((start, start + rnd.randrange(0, 30)))
+            index = ContainmentIndex(intervals)
+            first_start, duration, count = rnd.randrange(-10, 20), rnd.randrange(1, 8), rnd.randrange(0, 30)
+            covered = [index.contains(first_start + k * duration, first_start + (k + 1) * duration)
+                       for k in range(count)]
+            expected = []
+            for k, is_covered in enumerate(covered):
+                if is_covered and expected and expected[-1][1] == k:
+                    expected[-1] = (expected[-1][0], k + 1)
+                elif is_covered:
+                    expected.append((k, k + 1))
+            self.assertEqual(index.covered_slot_runs(first_start, duration, count), expected)
+
+
+class LazyTimeslotBlockTests(SimpleTestCase):
+    """
+    Tests for blocks of timeslots that are only created on access
+    """
+
+    def test_access(self):
+        """
+        Test indexing, slicing and iterating over a block
+        """
+        start = datetime(2020, 1, 1, tzinfo=timezone.utc)
+        event = Event(name="Test", slug="test", start=start, end=start + timedelta(days=1))
+        duration = timedelta(minutes=30)
+        first_start, step = to_timestamp(start), duration // MICROSECOND
+        block = LazyTimeslotBlock(
+                event=event,
+                starts=range(first_start, first_start + 4 * step, step),
+                ends=range(first_start + step, first_start + 5 * step, step),
+                indices=range(10, 14),
+                constraints=[{"a"}, {"b"}, {"c"}, {"d"}],
+        )
+        self.assertEqual(len(block), 4)
+        self.assertEqual(block[1].idx, 11)
+        self.assertEqual(block[1].constraints, {"b"})
+        self.assertEqual((block[-1].avail.start, block[-1].avail.end), (start + 3 * duration, start + 4 * duration))
+        self.assertIs(block[0].avail.event, event)
+        self.assertEqual([timeslot.idx for timeslot in block[1:3]], [11, 12])
+        self.assertEqual([timeslot.idx for timeslot in block], [10, 11, 12, 13])
+
+
+class MergeBlocksTests(SimpleTestCase):
+    """
+    Tests for merging blocks of timeslots
+    """
+
+    def setUp(self):
+        self.start = datetime(2020, 1, 1, tzinfo=timezone.utc)
+        self.event = Event(name="Test", slug="test", start=self.start, end=self.start + timedelta(days=7))
+        self.index = ContainmentIndex([(to_timestamp(self.event.start), to_timestamp(self.event.end))])
+
+    def _block(self, start_hours: int, end_hours: int, constraints: set[str], slot_index: int = 0):
+        return next(self.event._generate_slots_from_block(
+                self.start + timedelta(hours=start_hours), self.start + timedelta(hours=end_hours), timedelta(hours=1),
+                slot_index=slot_index, constraints=constraints, room_availability_index=self.index,
+        ))
+
+    def test_merge(self):
+        """
+        Test that identical timeslots are merged and touching timeslots are joined into a block
+        """
+        constraints_a, constraints_b = {"a"}, {"b"}
+        blocks = list(merge_blocks([
+            self._block(0, 3, constraints_a), self._block(1, 2, constraints_b, slot_index=10),
+            self._block(3, 4, set(), slot_index=20), self._block(6, 7, constraints_b, slot_index=30),
+        ]))
+        self.assertEqual([[(timeslot.idx, timeslot.constraints) for timeslot in block] for block in blocks],
+                         [[(0, {"a"}), (1, {"a", "b"}), (2, {"a"}), (20, set())], [(30, {"b"})]])
+        # the constraint sets of the input blocks are not modified
+        self.assertEqual((constraints_a, constraints_b), ({"a"}, {"b"}))
+        self.assertEqual(list(merge_blocks([])), [])
+
+    def test_partial_overlap(self):
+        """
+        Test that partially overlapping timeslots are rejected
+        """
+        shifted_block = LazyTimeslotBlock(
+                event=self.event,
+                starts=[to_timestamp(self.start + timedelta(minutes=30))],
+                ends=[to_timestamp(self.start + timedelta(minutes=90))],
+                indices=[5],
+                constraints=[set()],
+        )
+        with self.assertRaises(ValueError):
+            list(merge_blocks([self._block(0, 3, set()), shifted_block]))
+
+    def test_matches_sorting_implementation(self):
+        """
+        Test that the k-way merge matches the previous implementation on random overlapping blocks
+        """
+        rnd = random.Random(6)
+        for _ in range(20):
+            blocks = []
+            for i in range(rnd.randrange(1, 20)):
+                start_hours = rnd.randrange(0, 48)
+                blocks.append(self._block(start_hours, start_hours + rnd.randrange(1, 6),
+                                          {f"cat-{rnd.randrange(0, 5)}"}, slot_index=10 * i))
+            self.assertEqual(_as_tuples(merge_blocks(blocks)),
+                             _as_tuples(_sorting_merge_blocks([list(block) for block in blocks])))
+
+
+class DiscretizationTests(TestCase):
+    """
+    Tests that the discretization using the room availability index matches the previous implementation
+    """
+    fixtures = ['model.json']
+
+    def _assert_matches_reference(self, event: Event, slot_duration: timedelta):
+        blocks = [
+            [(timeslot.idx, timeslot.avail.start, timeslot.avail.end) for timeslot in block]
+            for block in event._generate_slots_from_block(event.start, event.end, slot_duration)
+        ]
+        self.assertEqual(blocks, _reference_slots_from_block(event, event.start, event.end, slot_duration))
+
+    def test_fixture_events(self):
+        """
+        Test the discretization of all events of the fixture for different slot durations
+        """
+        for event in Event.objects.all():
+            for slot_duration in [timedelta(minutes=15), timedelta(minutes=50), timedelta(hours=1)]:
+                with self.subTest(event=event.slug, slot_duration=slot_duration):
+                    self._assert_matches_reference(event, slot_duration)
+
+    def test_touching_room_availabilities(self):
+        """
+        Test the discretization with touching, overlapping and nested availabilities of several rooms
+        """
+        event = Event.objects.first()
+        Availability.objects.filter(room__event=event).delete()
+        room_a = Room.objects.create(name="A", event=event, capacity=10)
+        room_b = Room.objects.create(name="B", event=event, capacity=10)
+        rnd = random.Random(4)
+        for room in [room_a, room_b]:
+            for _ in range(8):
+                start = event.start + timedelta(minutes=10 * rnd.randrange(0, 6 * 24))
+                Availability.objects.create(event=event, room=room, start=start,
+                                            end=start + timedelta(minutes=10 * rnd.randrange(1, 36)))
+        # availabilities of different rooms touching exactly at a slot boundary
+        Availability.objects.create(event=event, room=room_a, start=event.start + timedelta(hours=30),
+                                    end=event.start + timedelta(hours=31, minutes=30))
+        Availability.objects.create(event=event, room=room_b, start=event.start + timedelta(hours=31, minutes=30),
+                                    end=event.start + timedelta(hours=33))
+
+        for slot_duration in [timedelta(minutes=20), timedelta(hours=1)]:
+            with self.subTest(slot_duration=slot_duration):
+                self._assert_matches_reference(event, slot_duration)
+
+
+class DiscretizationCacheTests(TestCase):
+    """
+    Tests for the caching of event discretizations and its invalidation
+    """
+    fixtures = ['model.json']
+
+    def setUp(self):
+        self.event = Event.objects.get(pk=2)
+
+    @staticmethod
+    def _blocks(event: Event, slots_in_an_hour: float = 1.0):
+        return [
+            [(timeslot.idx, timeslot.avail.start, timeslot.avail.end, timeslot.constraints) for timeslot in block]
+            for block in event.discretize_timeslots(slots_in_an_hour=slots_in_an_hour)
+        ]
+
+    def test_cache_is_used(self):
+        """
+        Test that a repeated discretization does not hit the database and returns the same result
+        """
+        blocks = self._blocks(self.event)
+        with self.assertNumQueries(0):
+            self.assertEqual(self._blocks(self.event), blocks)
+        # different granularities are cached separately
+        self.assertNotEqual(self._blocks(self.event, slots_in_an_hour=2.0), blocks)
+
+    def test_invalidation(self):
+        """
+        Test that changes of the data the discretization depends on invalidate the cached discretization
+        """
+        room = Room.objects.filter(event=self.event).first()
+        default_slot = DefaultSlot.objects.filter(event=self.event).first()
+        category = AKCategory.objects.filter(event=self.event).first()
+
+        changes = {
+            "room availability": lambda: Availability.objects.create(
+                event=self.event, room=room, start=self.event.start, end=self.event.end),
+            "default slot": lambda: DefaultSlot.objects.create(
+                event=self.event, start=self.event.end - timedelta(hours=2), end=self.event.end),
+            "category": lambda: AKCategory.objects.get(pk=category.pk).save(),
+            "primary categories": lambda: default_slot.primary_categories.clear(),
+            "event": lambda: Event.objects.get(pk=self.event.pk).save(),
+        }
+        for name, change in changes.items():
+            with self.subTest(change=name):
+                cache_key = self.event._discretization_cache_key(1.0)
+                change()
+                self.assertNotEqual(self.event._discretization_cache_key(1.0), cache_key)
+
+        # unrelated availabilities do not invalidate the cache
+        cache_key = self.event._discretization_cache_key(1.0)
+        Availability.objects.create(event=self.event, ak=AK.objects.filter(event=self.event).first(),
+                                    start=self.event.start, end=self.event.end)
+        self.assertEqual(self.event._discretization_cache_key(1.0), cache_key)
+
+    def test_changed_result(self):
+        """
+        Test that a discretization after a change matches the discretization computed without cache
+        """
+        blocks = self._blocks(self.event)
+        room = Room.objects.filter(event=self.event).first()
+        Availability.objects.filter(room__event=self.event).delete()
+        Availability.objects.create(event=self.event, room=room, start=self.event.start,
+                                    end=self.event.start + timedelta(hours=3))
+        changed_blocks = self._blocks(self.event)
+        self.assertNotEqual(changed_blocks, blocks)
+        cache.clear()
+        self.assertEqual(self._blocks(self.event), changed_blocks)
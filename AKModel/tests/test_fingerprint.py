@@ -0,0 +1,84 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils.timezone import now
+
+from AKModel.availability.models import Availability
+from AKModel.models import AK, AKOwner, AKRequirement, AKSlot, Event, Room
+from AKPreference.models import AKPreference, EventParticipant
+
+
+class ContentFingerprintTests(TestCase):
+    """
+    Tests for the content fingerprint of events
+    """
+    fixtures = ['model.json']
+
+    def setUp(self):
+        self.event = Event.objects.get(pk=2)
+
+    def test_stable(self):
+        """
+        Test that the fingerprint does not change without changes and is computed with a single query
+        """
+        fingerprint = self.event.content_fingerprint()
+        with self.assertNumQueries(1):
+            self.assertEqual(self.event.content_fingerprint(), fingerprint)
+        self.assertNotEqual(Event.objects.get(pk=1).content_fingerprint(), fingerprint)
+
+    def test_changes(self):
+        """
+        Test that changes of exported data of the event change the fingerprint
+        """
+        ak = AK.objects.filter(event=self.event).first()
+        slot = AKSlot.objects.filter(event=self.event).first()
+        room = Room.objects.filter(event=self.event).first()
+        requirement = AKRequirement.objects.filter(event=self.event).first()
+        participant = EventParticipant.objects.create(event=self.event, name="Participant")
+
+        changes = {
+            "slot": lambda: AKSlot.objects.get(pk=slot.pk).save(),
+            "slot bulk update": lambda: AKSlot.objects.filter(pk=slot.pk).update(duration=slot.duration + 1,
+                                                                                 updated=now()),
+            "slot bulk creation": lambda: AKSlot.objects.bulk_create([AKSlot(ak=ak, event=self.event, duration=1)]),
+            "ak": lambda: AK.objects.get(pk=ak.pk).save(),
+            "ak requirements": lambda: ak.requirements.clear(),
+            "ak conflicts": lambda: ak.conflicts.add(AK.objects.filter(event=self.event).last()),
+            "owner": lambda: AKOwner.objects.create(event=self.event, name="New Owner"),
+            "room properties": lambda: room.properties.add(requirement),
+            "availability": lambda: Availability.objects.create(event=self.event, ak=ak, start=self.event.start,
+                                                                end=self.event.start + timedelta(hours=1)),
+            "participant requirements": lambda: participant.requirements.add(requirement),
+            "preference": lambda: AKPreference.objects.create(event=self.event, participant=participant, ak=ak,
+                                                              preference=AKPreference.PreferenceLevel.REQUIRED),
+            "event": lambda: Event.objects.get(pk=self.event.pk).save(),
+        }
+        for name, change in changes.items():
+            with self.subTest(change=name):
+                fingerprint = self.event.content_fingerprint()
+                change()
+                self.assertNotEqual(self.event.content_fingerprint(), fingerprint)
+
+        # changes of other events do not change the fingerprint
+        fingerprint = self.event.content_fingerprint()
+        AKSlot.objects.filter(event_id=1).first().save()
+        self.assertEqual(self.event.content_fingerprint(), fingerprint)
+
+    def test_durable(self):
+        """
+        Test that the fingerprint does not depend on the cache and is not reset by saving an outdated event instance
+        """
+        outdated_event = Event.objects.get(pk=self.event.pk)
+        fingerprint = self.event.content_fingerprint()
+        cache.clear()
+        self.assertEqual(self.event.content_fingerprint(), fingerprint)
+
+        AK.objects.filter(event=self.event).first().save()
+        changed_fingerprint = self.event.content_fingerprint()
+        self.assertNotEqual(changed_fingerprint, fingerprint)
+
+        # the event was loaded before the change of the AK
+        outdated_event.save()
+        self.assertNotIn(self.event.content_fingerprint(), [fingerprint, changed_fingerprint])
+        self.assertEqual(Event.objects.get(pk=self.event.pk).content_version, outdated_event.content_version + 2)
@@ -145,6 +145,8 @@ class AKAssignTrackView(IntermediateAdminActionView):
             new_track_name = form.cleaned_data['new_track']
             track = AKTrack.objects.create(event=event, name=new_track_name)
         self.entities.update(track=track)
+        # bulk updates do not trigger the signal receivers
+        Event.invalidate_content_fingerprint(event.pk)
 
 
 class AKMoveToTrashView(IntermediateAdminActionView):
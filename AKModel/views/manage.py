@@ -280,7 +280,11 @@ class ClearScheduleView(IntermediateAdminActionView, ListView):
 
     def action(self, form):
         """Reset rooms and start for all selected slots."""
+        event_pks = set(self.entities.values_list("event_id", flat=True))
         self.entities.update(room=None, start=None)
+        # bulk updates do not trigger the signal receivers
+        for event_pk in event_pks:
+            Event.invalidate_content_fingerprint(event_pk)
 
 
 class AvailabilitiesApplyOffsetView(IntermediateAdminActionView, ListView):
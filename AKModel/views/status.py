@@ -166,6 +166,10 @@ class EventAKsWidget(TemplateStatusWidget):
                     "text": _("Import AK schedule from JSON"),
                     "url": reverse_lazy("admin:ak_schedule_json_import", kwargs={"event_slug": context["event"].slug}),
                 },
+                {
+                    "text": _("Run solvers"),
+                    "url": reverse_lazy("admin:solver_jobs", kwargs={"event_slug": context["event"].slug}),
+                },
             ])
         return actions
 
@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/2.2/ref/settings/
 
 import decimal
 import os
+import sys
 
 from csp.constants import SELF
 from django.utils.translation import gettext_lazy as _
@@ -233,6 +234,46 @@ DASHBOARD_MAX_FEATURED_EVENTS = 3
 # due to FLOP inaccuracies, we subtract this small epsilon before rounding.
 EXPORT_CEIL_OFFSET_EPS = decimal.Decimal(1e-4)
 
+# The discretization of an event into timeslots for the solver export is cached
+# and invalidated whenever the underlying data changes (default slots, room availabilities, ...).
+# When running multiple processes, all of them have to share the cache backend (cf. settings_production.py)
+EXPORT_TIMESLOT_CACHE_TIMEOUT = 24 * 60 * 60
+# Solver exports are cached per content fingerprint of the event and export options
+EXPORT_CACHE_TIMEOUT = 24 * 60 * 60
+# Read the JSON schemas for the solver import/export and construct their validators at startup
+PRELOAD_SCHEMA_VALIDATORS = True
+
+# Solvers that can be run locally on the solver export (cf. AKSolverInterface.jobs).
+# The placeholders {input} and {output} in the command are replaced with the paths of the exported input
+# and of the file the solver should write its output to. Jobs exceeding the timeout (in seconds) are killed.
+SOLVER_CONFIGURATIONS = {
+    "dummy": {
+        "name": "Dummy solver",
+        "command": [sys.executable, os.path.join(BASE_DIR, "AKSolverInterface", "dummy_solver.py"),
+                    "{input}", "{output}"],
+        "timeout": 60,
+    },
+    "greedy": {
+        "name": "Greedy draft scheduler",
+        "command": [sys.executable, os.path.join(BASE_DIR, "AKSolverInterface", "greedy_scheduler.py"),
+                    "{input}", "{output}"],
+        "timeout": 60,
+    },
+}
+# Directory the inputs, outputs and logs of solver jobs are stored in
+SOLVER_JOB_DIR = os.path.join(BASE_DIR, "solver_jobs")
+# Number of solver jobs that may run in parallel. This limit applies per web server process: With several processes
+# (e.g. uwsgi ``processes``), up to that number of processes times this value solvers may run at the same time,
+# hence consider lowering the value for such setups
+SOLVER_MAX_PARALLEL_JOBS = os.cpu_count() or 1
+# Pending solver jobs not started within this time (in seconds) are marked as failed, e.g., because the process
+# they were submitted in was restarted
+SOLVER_PENDING_TIMEOUT = 60 * 60
+
+# Run the constraint checks triggered by changes in a background worker instead of the request (cf. AKScheduling).
+# Violations then appear shortly after the change. Disabled by default, the checks run synchronously on commit then
+CONSTRAINT_CHECKS_ASYNC = False
+
 # Registration/login behavior
 SIMPLE_BACKEND_REDIRECT_URL = "/user/"
 LOGIN_REDIRECT_URL = SIMPLE_BACKEND_REDIRECT_URL
@@ -39,4 +39,13 @@ DATABASES = {
 SEND_MAILS = True
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 
-# TODO: caching
+### CACHING ###
+
+# Cache entries (e.g., the discretization of events for the solver export) are invalidated via signals,
+# hence all worker processes need to share the same cache
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': getattr(secrets, "CACHE_DIR", "/var/tmp/akplanning_cache"),
+    }
+}
@@ -1,6 +1,8 @@
 import uuid
 
 from django.db import models
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
 from django.utils.translation import gettext_lazy as _
 
 from AKModel.models import AK, AKRequirement, Event
@@ -130,3 +132,26 @@ class AKPreference(models.Model):
     def preference_score(self) -> int:
         """Score of this preference for the solver"""
         return self.preference if self.preference != self.PreferenceLevel.REQUIRED else -1
+
+
+@receiver(post_save, sender=EventParticipant)
+@receiver(post_delete, sender=EventParticipant)
+@receiver(post_save, sender=AKPreference)
+@receiver(post_delete, sender=AKPreference)
+def participant_data_changed_handler(sender,  # pylint: disable=unused-argument
+                                     instance: EventParticipant | AKPreference, **kwargs):
+    """
+    Signal receiver: Invalidate the content fingerprint of an event when one of its participants
+    or their preferences are changed
+    """
+    Event.invalidate_content_fingerprint(instance.event_id)
+
+
+@receiver(m2m_changed, sender=EventParticipant.requirements.through)
+def participant_requirements_changed_handler(sender,  # pylint: disable=unused-argument
+                                             instance: EventParticipant | AKRequirement, **kwargs):
+    """
+    Signal receiver: Invalidate the content fingerprint of an event when the requirements of one of its participants
+    are changed
+    """
+    Event.invalidate_content_fingerprint(instance.event_id)
@@ -1,7 +1,9 @@
+from collections import defaultdict
+
+from django.db.models import BooleanField, ExpressionWrapper, Q, QuerySet, Value
 from rest_framework import serializers
 
 from AKModel.models import AKSlot
-from AKModel.serializers import StringListField
 from AKPreference.models import AKPreference, EventParticipant
 
 
@@ -60,6 +62,72 @@ class ExportAKPreferencePerSlotSerializer(serializers.BaseSerializer):
             ])
         return return_lst
 
+    @staticmethod
+    def slots_per_ak(
+            slot_queryset: QuerySet,
+            exported_slot_queryset: QuerySet | None = None,
+    ) -> dict[int, tuple[int, int, bool]]:
+        """Load the slots of AKs as needed by `bulk_representation` with a single query.
+
+        :param slot_queryset: slots of all AKs of the preferences to serialize.
+        :param exported_slot_queryset: if given, preferences are only exported if their slot is contained in it.
+        :return: dict mapping the pk of each AK to its number of slots,
+            the pk of its last slot and whether this slot is exported.
+        :rtype: dict[int, tuple[int, int, bool]]
+        """
+        # same order as `AK.akslot_set.all()`, made deterministic
+        slot_queryset = slot_queryset.order_by(*AKSlot._meta.ordering, "pk")
+        if exported_slot_queryset is not None:
+            slot_queryset = slot_queryset.annotate(exported=ExpressionWrapper(
+                    Q(pk__in=exported_slot_queryset.values("pk")), output_field=BooleanField()
+            ))
+        else:
+            slot_queryset = slot_queryset.annotate(exported=Value(True))
+
+        slots_per_ak: dict[int, tuple[int, int, bool]] = {}
+        for ak_id, slot_pk, exported in slot_queryset.values_list("ak_id", "pk", "exported"):
+            number_of_slots = slots_per_ak[ak_id][0] + 1 if ak_id in slots_per_ak else 1
+            slots_per_ak[ak_id] = (number_of_slots, slot_pk, exported)
+        return slots_per_ak
+
+    @staticmethod
+    def bulk_representation(
+            preference_queryset: QuerySet,
+            slots_per_ak: dict[int, tuple[int, int, bool]],
+    ) -> dict[int, list[dict]]:
+        """Serialize the preferences of many participants at once.
+
+        Reads the preferences as (participant, AK, preference) tuples with a single query,
+        joins them to the slots of the AKs (cf. `slots_per_ak`) and constructs
+        the same dicts as `to_representation` without creating serializer or model instances.
+
+        As in `to_representation`, each preference is repeated once per slot of its AK,
+        and all repetitions carry the id of the AK's last slot (since the same dict is updated for every slot).
+
+        :param preference_queryset: preferences to serialize (only those with positive score are exported).
+        :param slots_per_ak: slots of all AKs of the preferences, as returned by `slots_per_ak`.
+        :return: dict mapping the pk of each participant to the list of its serialized preferences.
+        :rtype: dict[int, list[dict]]
+        """
+        preferences = defaultdict(list)
+        for participant_id, ak_id, preference in (
+                preference_queryset.filter(preference__gt=0)
+                .order_by("participant_id", "pk")
+                .values_list("participant_id", "ak_id", "preference")
+        ):
+            if ak_id not in slots_per_ak:
+                continue
+            number_of_slots, slot_pk, exported = slots_per_ak[ak_id]
+            if not exported:
+                continue
+            # cf. `AKPreference.required` and `AKPreference.preference_score`
+            required = preference == AKPreference.PreferenceLevel.REQUIRED
+            preferences[participant_id].extend(
+                    {"required": required, "preference_score": -1 if required else preference, "ak_id": slot_pk}
+                    for _ in range(number_of_slots)
+            )
+        return preferences
+
 
 class ExportParticipantInfoSerializer(serializers.ModelSerializer):
     """Serializer of EventParticipant objects for the 'info' field.
@@ -85,11 +153,42 @@ class ExportParticipantSerializer(serializers.ModelSerializer):
     https://github.com/Die-KoMa/ak-plan-optimierung/wiki/Input-&-output-format#input--output-format
     """
 
-    room_constraints = StringListField(source="get_room_constraints")
-    time_constraints = StringListField(source="get_time_constraints")
-    preferences = ExportAKPreferencePerSlotSerializer(source="export_preferences")
+    room_constraints = serializers.SerializerMethodField()
+    time_constraints = serializers.SerializerMethodField()
+    preferences = serializers.SerializerMethodField()
     info = ExportParticipantInfoSerializer(source="*")
 
+    def get_preferences(self, participant: EventParticipant) -> list[dict]:
+        """Get serialized representation for preferences.
+
+        Uses the preferences serialized in bulk (cf. `ExportAKPreferencePerSlotSerializer.bulk_representation`)
+        if they are passed in the context as `participant_preferences`.
+        """
+        preferences = self.context.get("participant_preferences")
+        if preferences is None:
+            return ExportAKPreferencePerSlotSerializer().to_representation(participant.export_preferences)
+        return preferences.get(participant.pk, [])
+
+    def get_room_constraints(self, participant: EventParticipant) -> list[str]:
+        """Get serialized representation for room_constraints.
+
+        Uses the export context of the solver export if available to avoid a query per participant.
+        """
+        export_context = self.context.get("export_context")
+        if export_context is None:
+            return participant.get_room_constraints()
+        return export_context.participant_room_constraints(participant)
+
+    def get_time_constraints(self, participant: EventParticipant) -> list[str]:
+        """Get serialized representation for time_constraints.
+
+        Uses the export context of the solver export if available to avoid queries per participant.
+        """
+        export_context = self.context.get("export_context")
+        if export_context is None:
+            return participant.get_time_constraints()
+        return export_context.participant_time_constraints(participant)
+
     class Meta:
         model = EventParticipant
         fields = ["id", "info", "room_constraints", "time_constraints", "preferences"]
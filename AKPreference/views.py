@@ -11,7 +11,7 @@ from AKModel.availability.models import Availability
 from AKModel.metaviews import status_manager
 from AKModel.metaviews.admin import AdminViewMixin, EventSlugMixin, IntermediateAdminActionView
 from AKModel.metaviews.status import TemplateStatusWidget
-from AKModel.models import AKCategory
+from AKModel.models import AKCategory, Event
 from AKPreference.models import AKPreference, EventParticipant
 from .forms import EventParticipantForm, PreferenceForm, PreferenceFormSet
 
@@ -299,7 +299,11 @@ class AnonymizeParticipantsView(IntermediateAdminActionView):
     success_message = _("Participants successfully anonymized.")
 
     def action(self, form):
+        event_pks = set(self.entities.values_list("event_id", flat=True))
         self.entities.update(name='', institution='')
+        # bulk updates do not trigger the signal receivers
+        for event_pk in event_pks:
+            Event.invalidate_content_fingerprint(event_pk)
 
 
 class ParticipantAdminView(AdminViewMixin, DetailView):
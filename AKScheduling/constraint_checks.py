@@ -0,0 +1,219 @@
+"""
+Coalescing of the constraint checks triggered by signals
+
+A single change often sends several signals: Saving an AK in the admin triggers the receivers for the AK itself,
+for each of its m2m relations (before and after the change) and for each of its slots, and bulk actions save
+many objects one after another. Instead of running the constraint checks in every receiver, the receivers
+register the affected entities with :func:`schedule_constraint_check`. The registered checks are collected
+per transaction and run once per distinct check and entity when the transaction is committed.
+Outside of transactions, a check is run right away (like :func:`django.db.transaction.on_commit` does).
+
+Only the public :func:`django.db.transaction.on_commit` is used to keep track of the transaction: The pending
+collector of a connection is registered as commit callback once per scheduled check, and this module only keeps
+a weak reference to it. Callbacks registered in savepoints that are rolled back are discarded by django, hence a
+collector that no longer has any callback is dropped and the next check starts a new one. Checks scheduled in a
+rolled back savepoint may still run with the other checks of the transaction, which is harmless since the checks
+work on the committed state.
+
+If ``settings.CONSTRAINT_CHECKS_ASYNC`` is enabled, the collected checks are not run in the request but handed to
+a worker thread, hence e.g. moving a slot in the scheduler returns without waiting for the checks. The violations
+are updated as soon as the worker finished the checks. There is a single worker per process, such that
+the checks (which compare new to existing violations) never run concurrently within a process.
+By default, the checks are run synchronously on commit (which is also what the tests rely on).
+"""
+import logging
+import threading
+import weakref
+from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable
+
+from django.conf import settings
+from django.db import connection, models, transaction
+
+logger = logging.getLogger(__name__)
+
+# data shared by the checks of a single run of a collector (per thread)
+_run_state = threading.local()
+
+# weak references to the pending collectors per database alias (per thread, like the connections)
+_pending_state = threading.local()
+
+
+class LazyThreadPoolExecutor:
+    """
+    Pool of worker threads that is only started on first use
+
+    :param create: function creating the pool, called at most once
+    """
+
+    def __init__(self, create: Callable[[], ThreadPoolExecutor]):
+        self._create = create
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    def get(self) -> ThreadPoolExecutor:
+        """
+        Get the pool, start it if necessary
+        """
+        with self._lock:
+            if self._executor is None:
+                self._executor = self._create()
+            return self._executor
+
+    def get_if_started(self) -> ThreadPoolExecutor | None:
+        """
+        Get the pool if it was started already
+        """
+        with self._lock:
+            return self._executor
+
+
+# the worker running the constraint checks asynchronously
+_checks_worker = LazyThreadPoolExecutor(
+        lambda: ThreadPoolExecutor(max_workers=1, thread_name_prefix="constraint-checks"))
+
+
+class ConstraintCheckCollector:
+    """
+    Collection of the constraint checks to run when the current transaction is committed
+
+    Checks are identified by the check function and the model and primary key of the entity to check,
+    registering the same check for the same entity again does not run it twice. The entities are loaded again
+    before running the checks, hence the checks work on the committed state and checks for entities deleted in the
+    meantime are skipped.
+    """
+
+    def __init__(self):
+        self.checks: dict[tuple[Callable, type[models.Model], int], None] = {}
+        self.started = False
+        self.future: Future | None = None
+
+    def add(self, check: Callable[[models.Model], None], instance: models.Model):
+        """
+        Register a check for an entity
+
+        :param check: check function taking the entity as only argument
+        :param instance: entity to check
+        """
+        self.checks[(check, type(instance), instance.pk)] = None
+
+    def __call__(self):
+        """
+        Run all registered checks, either right away or in the worker (cf. ``settings.CONSTRAINT_CHECKS_ASYNC``)
+
+        Checks registered while running (or afterward) are collected separately
+        """
+        if self.started:
+            # the collector is registered once per scheduled check, but runs only once
+            return
+        self.started = True
+        if settings.CONSTRAINT_CHECKS_ASYNC:
+            self.future = _checks_worker.get().submit(self._run_in_worker)
+        else:
+            self.run()
+
+    def _run_in_worker(self):
+        """
+        Run the checks in the worker thread
+        """
+        try:
+            self.run()
+        except Exception:  # pylint: disable=broad-exception-caught
+            # nobody waits for the result, hence make sure failures are not lost
+            logger.exception("Constraint checks failed")
+        finally:
+            # the worker thread uses its own database connection
+            connection.close()
+
+    def run(self):
+        """
+        Run all registered checks (in the order of their first registration)
+
+        Data cached with :func:`cached_for_run` is shared by all checks of the run
+        """
+        pks_per_model = defaultdict(set)
+        for _, model, pk in self.checks:
+            pks_per_model[model].add(pk)
+
+        previous_cache = getattr(_run_state, "cache", None)
+        _run_state.cache = {}
+        try:
+            with transaction.atomic():
+                # the default managers may hide entities (e.g., trashed AKs), which have to be checked nevertheless
+                instances = {
+                    model: model._base_manager.in_bulk(pks)  # pylint: disable=protected-access
+                    for model, pks in pks_per_model.items()
+                }
+                for check, model, pk in self.checks:
+                    instance = instances[model].get(pk)
+                    if instance is not None:
+                        check(instance)
+        finally:
+            _run_state.cache = previous_cache
+
+
+def cached_for_run(key, factory: Callable[[], Any]) -> Any:
+    """
+    Get data shared by all checks of the current run of a collector, e.g., an index over the slots of an event
+
+    The data is created on first use in a run. Outside of runs (e.g., when calling a check directly),
+    it is created on every call. The checks must not change the data the cached values are derived from.
+
+    :param key: key identifying the data
+    :param factory: function creating the data
+    :return: cached or newly created data
+    """
+    cache = getattr(_run_state, "cache", None)
+    if cache is None:
+        return factory()
+    if key not in cache:
+        cache[key] = factory()
+    return cache[key]
+
+
+def _pending_collector(using: str | None = None) -> ConstraintCheckCollector:
+    """
+    Get the collector for the checks of the current transaction, creating a new one if there is none
+
+    The collector is kept alive by its commit callbacks only, hence it is gone once all of them were discarded
+    (because the savepoints or transaction they were registered in were rolled back).
+    """
+    alias = transaction.get_connection(using).alias
+    collectors = getattr(_pending_state, "collectors", None)
+    if collectors is None:
+        collectors = _pending_state.collectors = {}
+    collector = collectors[alias]() if alias in collectors else None
+    if collector is None or collector.started:
+        collector = ConstraintCheckCollector()
+        collectors[alias] = weakref.ref(collector)
+    return collector
+
+
+def schedule_constraint_check(check: Callable[[models.Model], None], instance: models.Model):
+    """
+    Run a constraint check for an entity once the current transaction is committed
+
+    :param check: check function taking the entity as only argument
+    :param instance: entity to check
+    """
+    collector = _pending_collector()
+    collector.add(check, instance)
+    # registered for every check, such that the collector still runs if the savepoint it was first registered in
+    # is rolled back
+    transaction.on_commit(collector)
+
+
+def wait_for_constraint_checks(timeout: float | None = None):
+    """
+    Wait until all constraint checks handed to the worker so far are finished
+
+    Does not wait for anything if the checks are run synchronously.
+
+    :param timeout: maximum number of seconds to wait
+    :raises TimeoutError: if the checks did not finish in time
+    """
+    executor = _checks_worker.get_if_started()
+    if executor is not None:
+        # the worker processes the checks in order
+        executor.submit(lambda: None).result(timeout=timeout)
@@ -0,0 +1,171 @@
+import random
+import timeit
+from datetime import datetime, timedelta, timezone
+from functools import partial
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from AKModel.models import AK, AKCategory, AKOwner, AKSlot, Event, Room
+from AKScheduling.constraint_checks import ConstraintCheckCollector
+from AKScheduling.models import check_akslot
+from AKScheduling.violations import ScheduledSlotIndex
+
+
+def _nested_loop_overlaps(slot: AKSlot) -> tuple[list, list, list]:
+    """
+    Reference implementation of the previous lookup of overlapping slots (loops over the related objects with one
+    query per owner and AK), used for comparison only
+    """
+    owner_overlaps = [
+        other_slot
+        for owner in slot.ak.owners.all()
+        for ak in owner.ak_set.all() if ak != slot.ak
+        for other_slot in ak.akslot_set.filter(start__isnull=False) if slot.overlaps(other_slot)
+    ]
+    room_overlaps = [
+        other_slot for other_slot in slot.room.akslot_set.filter(start__isnull=False)
+        if other_slot != slot and slot.overlaps(other_slot)
+    ]
+    ak_overlaps = [
+        other_slot for other_slot in slot.ak.akslot_set.filter(start__isnull=False)
+        if other_slot != slot and slot.overlaps(other_slot)
+    ]
+    return owner_overlaps, room_overlaps, ak_overlaps
+
+
+def _index_overlaps(index: ScheduledSlotIndex, slot: AKSlot) -> tuple[list, list, list]:
+    """
+    Look up the slots overlapping a slot like :func:`AKScheduling.models.check_akslot` does
+    """
+    owner_overlaps = [
+        other_slot
+        for owner in slot.ak.owners.all()
+        for other_slot in index.overlapping_of_owner(owner.pk, slot) if other_slot.ak_id != slot.ak_id
+    ]
+    return owner_overlaps, index.overlapping_in_room(slot.room_id, slot), index.overlapping_of_ak(slot.ak_id, slot)
+
+
+def _new_index_overlaps(event: Event, slot: AKSlot) -> tuple[list, list, list]:
+    """
+    Look up the slots overlapping a slot with a new index (as for a single saved slot)
+    """
+    return _index_overlaps(ScheduledSlotIndex(event), slot)
+
+
+def _run_check(slot: AKSlot):
+    """
+    Run :func:`AKScheduling.models.check_akslot` for a slot like after saving it
+    """
+    collector = ConstraintCheckCollector()
+    collector.add(check_akslot, slot)
+    collector.run()
+
+
+def create_synthetic_event(number_of_slots: int, rnd: random.Random) -> Event:
+    """
+    Create a synthetic event with scheduled slots
+
+    The event takes four days, there is one room per 15 slots and one owner per two AKs. AKs have one or two owners
+    and one or two slots of 1 to 2 hours, starting at random quarter hours between 9:00 and 20:00.
+
+    :param number_of_slots: number of slots
+    :param rnd: random generator
+    :return: the created event
+    """
+    start = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    event = Event.objects.create(name=f"Benchmark {number_of_slots}", slug=f"benchmark-{number_of_slots}",
+                                 start=start, end=start + timedelta(days=4), active=False)
+    category = AKCategory.objects.create(name="Benchmark", event=event)
+    rooms = Room.objects.bulk_create([
+        Room(name=f"Room {i}", capacity=30, event=event) for i in range(number_of_slots // 15 + 1)
+    ])
+    aks = AK.objects.bulk_create([
+        AK(name=f"AK {i}", short_name=f"ak{i}", description="", category=category, event=event)
+        for i in range(number_of_slots * 2 // 3 + 1)
+    ])
+    owners = AKOwner.objects.bulk_create([
+        AKOwner(name=f"Owner {i}", slug=f"owner-{i}", event=event) for i in range(len(aks) // 2 + 1)
+    ])
+    AK.owners.through.objects.bulk_create([
+        AK.owners.through(ak=ak, akowner=owner)
+        for ak in aks for owner in rnd.sample(owners, rnd.randrange(1, 3))
+    ])
+    AKSlot.objects.bulk_create([
+        AKSlot(ak=aks[i % len(aks)], event=event, room=rnd.choice(rooms), duration=rnd.choice([1, 1.5, 2]),
+               start=start + timedelta(days=rnd.randrange(4), hours=9, minutes=15 * rnd.randrange(44)))
+        for i in range(number_of_slots)
+    ])
+    return event
+
+
+class Command(BaseCommand):
+    """
+    Benchmark for the constraint checks run when saving a slot
+
+    Creates synthetic events (cf. :func:`create_synthetic_event`) of different sizes and measures for a random slot:
+
+    * index: the lookup of overlapping slots with a new :class:`AKScheduling.violations.ScheduledSlotIndex`, i.e.,
+      including loading the slots of the room, owners and AK of the slot (as for a single saved slot),
+    * shared: the same lookup with an index already loaded by the checks of other slots of the same run,
+    * loops: the previous lookup looping over the related objects (cf. :func:`_nested_loop_overlaps`),
+    * check: the whole :func:`AKScheduling.models.check_akslot` as run after saving the slot.
+
+    All changes to the database are rolled back afterward.
+    """
+    help = "Benchmark the slot constraint checks on synthetic events of different sizes"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[100, 500, 1000, 2000],
+                            help="Number of slots")
+        parser.add_argument('--repeat', type=int, default=5, help="Number of repetitions per measurement")
+        parser.add_argument('--seed', type=int, default=42, help="Seed for the random generator")
+
+    def _measure(self, event: Event, slot: AKSlot, repeat: int) -> dict[str, tuple[float, int | None]]:
+        """
+        Measure the lookups for a slot
+
+        :return: time and number of queries per lookup (index, shared, loops and check)
+        """
+        index = ScheduledSlotIndex(event)
+        index_overlaps = [{other_slot.pk for other_slot in overlaps} for overlaps in _index_overlaps(index, slot)]
+        loop_overlaps = [{other_slot.pk for other_slot in overlaps} for overlaps in _nested_loop_overlaps(slot)]
+        # the previous lookup missed slots starting earlier and ending later than the checked slot
+        if any(not loop.issubset(found) for loop, found in zip(loop_overlaps, index_overlaps)):
+            self.stderr.write(self.style.ERROR(f"Overlapping slots missing for slot {slot.pk}"))
+
+        measurements = {}
+        for name, lookup, count_queries in [("index", partial(_new_index_overlaps, event, slot), True),
+                                            ("shared", partial(_index_overlaps, index, slot), False),
+                                            ("loops", partial(_nested_loop_overlaps, slot), True),
+                                            ("check", partial(_run_check, slot), True)]:
+            # the first run also creates the violations of the slot
+            lookup()
+            duration = min(timeit.repeat(lookup, number=1, repeat=repeat))
+            number_of_queries = None
+            if count_queries:
+                with CaptureQueriesContext(connection) as queries:
+                    lookup()
+                number_of_queries = len(queries)
+            measurements[name] = (duration, number_of_queries)
+        return measurements
+
+    def handle(self, *args, **options):
+        rnd = random.Random(options['seed'])
+
+        self.stdout.write(f"{'slots':>6} {'index [ms]':>11} {'queries':>8} {'shared [ms]':>12} {'loops [ms]':>11} "
+                          f"{'queries':>8} {'check [ms]':>11} {'queries':>8}")
+        with transaction.atomic():
+            for size in options['sizes']:
+                event = create_synthetic_event(size, rnd)
+                slot = rnd.choice(list(AKSlot.objects.filter(event=event).select_related("ak", "room", "event")))
+                measurements = self._measure(event, slot, options['repeat'])
+                index_time, index_queries = measurements["index"]
+                shared_time, _ = measurements["shared"]
+                loop_time, loop_queries = measurements["loops"]
+                check_time, check_queries = measurements["check"]
+                self.stdout.write(f"{size:6d} {index_time * 1000:11.2f} {index_queries:8d} {shared_time * 1000:12.3f} "
+                                  f"{loop_time * 1000:11.2f} {loop_queries:8d} {check_time * 1000:11.2f} "
+                                  f"{check_queries:8d}")
+            transaction.set_rollback(True)
@@ -7,39 +7,15 @@ from typing import Iterable
 
 from django.db.models.signals import m2m_changed, post_save, pre_delete
 from django.dispatch import receiver
-from django.utils.translation import gettext_lazy as _
 
 from AKModel.availability.models import Availability
 from AKModel.models import AK, AKSlot, ConstraintViolation, Event, Room
-
-
-def update_constraint_violations(new_violations, existing_violations_to_check):
-    """
-    Update existing constraint violations (subset for which new violations were computed) based on these new violations.
-    This will add all new violations without a match, preserve the matching ones
-    and delete the obsolete ones (those without a match from the newly calculated violations).
-
-    :param new_violations: list of new (not yet saved) violations that exist after the last change
-    :type new_violations: list[ConstraintViolation]
-    :param existing_violations_to_check: list of related violations currently in the db
-    :type existing_violations_to_check: list[ConstraintViolation]
-    """
-    for new_violation in new_violations:
-        found_match = False
-        for existing_violation in existing_violations_to_check:
-            if existing_violation.matches(new_violation):
-                # Remove from existing violations set since it should stay in db
-                existing_violations_to_check.remove(existing_violation)
-                found_match = True
-                break
-
-        # Only save new violation if no match was found
-        if not found_match:
-            new_violation.save()
-
-    # Cleanup obsolete violations (ones without matches computed under current conditions)
-    for outdated_violation in existing_violations_to_check:
-        outdated_violation.delete()
+from AKScheduling.constraint_checks import schedule_constraint_check
+from AKScheduling.violations import (ScheduledSlotIndex, check_ak_collisions_for_slot, check_availability_for_slot,
+                                     check_capacity_for_slot, check_conflicts_for_slot,
+                                     check_owner_collisions_for_slot, check_prerequisites_for_slot,
+                                     check_requirements_for_slot, check_reso_deadline_for_slot,
+                                     check_room_collisions_for_slot, update_constraint_violations)
 
 
 def update_cv_reso_deadline_for_slot(slot):
@@ -49,74 +25,26 @@ def update_cv_reso_deadline_for_slot(slot):
     :param slot: slot to check/update
     :type slot: AKSlot
     """
-    event = slot.event
-
     # Update only if reso_deadline exists
     # if event was changed and reso_deadline is removed, CVs will be deleted by event changed handler
     # Update only has to be done for already scheduled slots with reso intention
-    new_violations = []
     violation_type = ConstraintViolation.ViolationType.AK_AFTER_RESODEADLINE
-    if slot.ak.reso and slot.event.reso_deadline and slot.start:
-        # Violation?
-        if slot.end > event.reso_deadline:
-            c = ConstraintViolation(
-                    type=violation_type,
-                    level=ConstraintViolation.ViolationLevel.VIOLATION,
-                    event=event,
-            )
-            c.aks_tmp.add(slot.ak)
-            c.ak_slots_tmp.add(slot)
-            new_violations.append(c)
-    update_constraint_violations(new_violations, list(slot.constraintviolation_set.filter(type=violation_type)))
+    cv = check_reso_deadline_for_slot(slot)
+    new_violations = [cv] if cv is not None else []
+    update_constraint_violations(new_violations, slot.constraintviolation_set.filter(type=violation_type))
 
 
-def check_capacity_for_slot(slot: AKSlot):
+@receiver(post_save, sender=AK)
+def ak_changed_handler(sender, instance: AK, **kwargs):
     """
-    Check whether this slot violates the capacity requirement
-
-    :param slot: slot to check
-    :type slot: AKSlot
-    :return: Violation (if any) or None
-    :rtype: ConstraintViolation or None
-    """
-
-    # If slot is scheduled in a room and interest was specified
-    if slot.room and slot.room.capacity >= 0 and slot.ak.interest >= 0:
-        # Create a violation if interest exceeds room capacity
-        if slot.room.capacity < slot.ak.interest:
-            c = ConstraintViolation(
-                    type=ConstraintViolation.ViolationType.ROOM_CAPACITY_EXCEEDED,
-                    level=ConstraintViolation.ViolationLevel.VIOLATION,
-                    event=slot.event,
-                    room=slot.room,
-                    comment=_("Not enough space for AK interest (Interest: %(interest)d, Capacity: %(capacity)d)")
-                            % {'interest': slot.ak.interest, 'capacity': slot.room.capacity},
-            )
-            c.ak_slots_tmp.add(slot)
-            c.aks_tmp.add(slot.ak)
-            return c
-
-        # Create a warning if interest is close to room capacity
-        if slot.room.capacity < slot.ak.interest + 5 or slot.room.capacity < slot.ak.interest * 1.25:
-            c = ConstraintViolation(
-                    type=ConstraintViolation.ViolationType.ROOM_CAPACITY_EXCEEDED,
-                    level=ConstraintViolation.ViolationLevel.WARNING,
-                    event=slot.event,
-                    room=slot.room,
-                    comment=_("Space is too close to AK interest (Interest: %(interest)d, Capacity: %(capacity)d)")
-                            % {'interest': slot.ak.interest, 'capacity': slot.room.capacity}
-            )
-            c.ak_slots_tmp.add(slot)
-            c.aks_tmp.add(slot.ak)
-            return c
-
-    return None
+    Signal receiver: AK changed, schedule the checks of :func:`check_ak`
+    """
+    schedule_constraint_check(check_ak, instance)
 
 
-@receiver(post_save, sender=AK)
-def ak_changed_handler(sender, instance: AK, **kwargs):
+def check_ak(instance: AK):
     """
-    Signal receiver: Check for violations after AK changed
+    Check for violations after AK changed
 
     Changes might affect: Reso intention, Category, Interest
     """
@@ -132,53 +60,55 @@ def ak_changed_handler(sender, instance: AK, **kwargs):
         if cv is not None:
             new_violations.append(cv)
 
-    existing_violations_to_check = list(instance.constraintviolation_set.filter(type=violation_type))
+    existing_violations_to_check = instance.constraintviolation_set.filter(type=violation_type)
     update_constraint_violations(new_violations, existing_violations_to_check)
 
 
 @receiver(m2m_changed, sender=AK.owners.through)
 def ak_owners_changed_handler(sender, instance: AK, action: str, **kwargs):
     """
-    Signal receiver: Owners of AK changed
+    Signal receiver: Owners of AK changed, schedule the checks of :func:`check_ak_owners`
     """
     # Only signal after change (post_add, post_delete, post_clear) are relevant
-    if not action.startswith("post"):
-        return
+    if action.startswith("post"):
+        schedule_constraint_check(check_ak_owners, instance)
 
+
+def check_ak_owners(instance: AK):
+    """
+    Check for violations after owners of AK changed
+    """
     event = instance.event
 
     # Owner(s) changed: Might affect multiple AKs by the same owner(s) at the same time
     violation_type = ConstraintViolation.ViolationType.OWNER_TWO_SLOTS
     new_violations = []
 
-    slots_of_this_ak: Iterable[AKSlot] = instance.akslot_set.filter(start__isnull=False)
+    slot_index = ScheduledSlotIndex.for_event(event)
+    slots_of_this_ak: Iterable[AKSlot] = slot_index.slots_of_ak(instance.pk)
 
     # For all owners (after recent change)...
     for owner in instance.owners.all():
-        # ...find other slots that might be overlapping...
-
-        for ak in owner.ak_set.all():
-            # ...find overlapping slots...
-            if ak != instance:
-                for slot in slots_of_this_ak:
-                    for other_slot in ak.akslot_set.filter(start__isnull=False):
-                        if slot.overlaps(other_slot):
-                            # ...and create a temporary violation if necessary...
-                            c = ConstraintViolation(
-                                    type=violation_type,
-                                    level=ConstraintViolation.ViolationLevel.VIOLATION,
-                                    event=event,
-                                    ak_owner=owner
-                            )
-                            c.aks_tmp.add(instance)
-                            c.aks_tmp.add(other_slot.ak)
-                            c.ak_slots_tmp.add(slot)
-                            c.ak_slots_tmp.add(other_slot)
-                            new_violations.append(c)
+        for slot in slots_of_this_ak:
+            # ...find overlapping slots of other AKs of this owner...
+            for other_slot in slot_index.overlapping_of_owner(owner.pk, slot):
+                if other_slot.ak_id != instance.pk:
+                    # ...and create a temporary violation if necessary...
+                    c = ConstraintViolation(
+                            type=violation_type,
+                            level=ConstraintViolation.ViolationLevel.VIOLATION,
+                            event=event,
+                            ak_owner=owner
+                    )
+                    c.aks_tmp.add(instance)
+                    c.aks_tmp.add(other_slot.ak)
+                    c.ak_slots_tmp.add(slot)
+                    c.ak_slots_tmp.add(other_slot)
+                    new_violations.append(c)
 
     # ... and compare to/update list of existing violations of this type
     # belonging to the AK that was recently changed (important!)
-    existing_violations_to_check = list(instance.constraintviolation_set.filter(type=violation_type))
+    existing_violations_to_check = instance.constraintviolation_set.filter(type=violation_type)
     # print(existing_violations_to_check)
     update_constraint_violations(new_violations, existing_violations_to_check)
 
@@ -186,42 +116,48 @@ def ak_owners_changed_handler(sender, instance: AK, action: str, **kwargs):
 @receiver(m2m_changed, sender=AK.conflicts.through)
 def ak_conflicts_changed_handler(sender, instance: AK, action: str, **kwargs):
     """
-    Signal receiver: Conflicts of AK changed
+    Signal receiver: Conflicts of AK changed, schedule the checks of :func:`check_ak_conflicts`
     """
     # Only signal after change (post_add, post_delete, post_clear) are relevant
-    if not action.startswith("post"):
-        return
+    if action.startswith("post"):
+        schedule_constraint_check(check_ak_conflicts, instance)
 
+
+def check_ak_conflicts(instance: AK):
+    """
+    Check for violations after conflicts of AK changed
+    """
     event = instance.event
 
     # Conflict(s) changed: Might affect multiple AKs that are conflicts of each other
     violation_type = ConstraintViolation.ViolationType.AK_CONFLICT_COLLISION
     new_violations = []
 
-    slots_of_this_ak: Iterable[AKSlot] = instance.akslot_set.filter(start__isnull=False)
-    conflicts_of_this_ak: Iterable[AK] = instance.conflicts.all()
+    slot_index = ScheduledSlotIndex.for_event(event)
+    slots_of_this_ak: Iterable[AKSlot] = slot_index.slots_of_ak(instance.pk)
+    conflicts_of_this_ak: list[int] = list(instance.conflicts.values_list("pk", flat=True))
+    slot_index.load_aks(conflicts_of_this_ak)
 
     # Loop over all existing conflicts
-    for ak in conflicts_of_this_ak:
-        if ak != instance:
-            for other_slot in ak.akslot_set.filter(start__isnull=False):
-                for slot in slots_of_this_ak:
-                    # ...find overlapping slots...
-                    if slot.overlaps(other_slot):
-                        # ...and create a temporary violation if necessary...
-                        c = ConstraintViolation(
-                                type=violation_type,
-                                level=ConstraintViolation.ViolationLevel.VIOLATION,
-                                event=event,
-                        )
-                        c.aks_tmp.add(instance)
-                        c.ak_slots_tmp.add(slot)
-                        c.ak_slots_tmp.add(other_slot)
-                        new_violations.append(c)
+    for ak_id in conflicts_of_this_ak:
+        if ak_id != instance.pk:
+            for slot in slots_of_this_ak:
+                # ...find overlapping slots...
+                for other_slot in slot_index.overlapping_of_ak(ak_id, slot):
+                    # ...and create a temporary violation if necessary...
+                    c = ConstraintViolation(
+                            type=violation_type,
+                            level=ConstraintViolation.ViolationLevel.VIOLATION,
+                            event=event,
+                    )
+                    c.aks_tmp.add(instance)
+                    c.ak_slots_tmp.add(slot)
+                    c.ak_slots_tmp.add(other_slot)
+                    new_violations.append(c)
 
     # ... and compare to/update list of existing violations of this type
     # belonging to the AK that was recently changed (important!)
-    existing_violations_to_check = list(instance.constraintviolation_set.filter(type=violation_type))
+    existing_violations_to_check = instance.constraintviolation_set.filter(type=violation_type)
     # print(existing_violations_to_check)
     update_constraint_violations(new_violations, existing_violations_to_check)
 
@@ -236,9 +172,12 @@ def get_cvs_where_ak_is_prerequisite(slot: AKSlot, event: Event) -> Iterable[Con
     """
     violation_type = ConstraintViolation.ViolationType.AK_BEFORE_PREREQUISITE
     new_violations = []
-    for ak in slot.ak.is_prerequisite_of.all():
-        if ak != slot.ak:
-            for other_slot in ak.akslot_set.filter(start__isnull=False):
+    slot_index = ScheduledSlotIndex.for_event(event)
+    dependent_aks: list[int] = list(slot.ak.is_prerequisite_of.values_list("pk", flat=True))
+    slot_index.load_aks(dependent_aks)
+    for ak_id in dependent_aks:
+        if ak_id != slot.ak_id:
+            for other_slot in slot_index.slots_of_ak(ak_id):
                 # ...find slots in the wrong order...
                 if slot.end > other_slot.start:
                     # ...and create a temporary violation if necessary...
@@ -258,25 +197,32 @@ def get_cvs_where_ak_is_prerequisite(slot: AKSlot, event: Event) -> Iterable[Con
 @receiver(m2m_changed, sender=AK.prerequisites.through)
 def ak_prerequisites_changed_handler(sender, instance: AK, action: str, **kwargs):
     """
-    Signal receiver: Prerequisites of AK changed
+    Signal receiver: Prerequisites of AK changed, schedule the checks of :func:`check_ak_prerequisites`
     """
     # Only signal after change (post_add, post_delete, post_clear) are relevant
-    if not action.startswith("post"):
-        return
+    if action.startswith("post"):
+        schedule_constraint_check(check_ak_prerequisites, instance)
+
 
+def check_ak_prerequisites(instance: AK):
+    """
+    Check for violations after prerequisites of AK changed
+    """
     event = instance.event
 
     # Prerequisite(s) changed: Might affect multiple AKs that should have a certain order
     violation_type = ConstraintViolation.ViolationType.AK_BEFORE_PREREQUISITE
     new_violations = []
 
-    slots_of_this_ak: Iterable[AKSlot] = instance.akslot_set.filter(start__isnull=False)
-    prerequisites_of_this_ak: Iterable[AK] = instance.prerequisites.all()
+    slot_index = ScheduledSlotIndex.for_event(event)
+    slots_of_this_ak: Iterable[AKSlot] = slot_index.slots_of_ak(instance.pk)
+    prerequisites_of_this_ak: list[int] = list(instance.prerequisites.values_list("pk", flat=True))
+    slot_index.load_aks(prerequisites_of_this_ak)
 
     # Loop over all prerequisites
-    for ak in prerequisites_of_this_ak:
-        if ak != instance:
-            for other_slot in ak.akslot_set.filter(start__isnull=False):
+    for ak_id in prerequisites_of_this_ak:
+        if ak_id != instance.pk:
+            for other_slot in slot_index.slots_of_ak(ak_id):
                 for slot in slots_of_this_ak:
                     # ...find overlapping slots...
                     if other_slot.end > slot.start:
@@ -297,7 +243,7 @@ def ak_prerequisites_changed_handler(sender, instance: AK, action: str, **kwargs
 
     # ... and compare to/update list of existing violations of this type
     # belonging to the AK that was recently changed (important!)
-    existing_violations_to_check = list(instance.constraintviolation_set.filter(type=violation_type))
+    existing_violations_to_check = instance.constraintviolation_set.filter(type=violation_type)
     # print(existing_violations_to_check)
     update_constraint_violations(new_violations, existing_violations_to_check)
 
@@ -305,12 +251,17 @@ def ak_prerequisites_changed_handler(sender, instance: AK, action: str, **kwargs
 @receiver(m2m_changed, sender=AK.requirements.through)
 def ak_requirements_changed_handler(sender, instance: AK, action: str, **kwargs):
     """
-    Signal receiver: Requirements of AK changed
+    Signal receiver: Requirements of AK changed, schedule the checks of :func:`check_ak_requirements`
     """
     # Only signal after change (post_add, post_delete, post_clear) are relevant
-    if not action.startswith("post"):
-        return
+    if action.startswith("post"):
+        schedule_constraint_check(check_ak_requirements, instance)
+
 
+def check_ak_requirements(instance: AK):
+    """
+    Check for violations after requirements of AK changed
+    """
     event = instance.event
 
     # Requirement(s) changed: Might affect slots and rooms
@@ -344,7 +295,7 @@ def ak_requirements_changed_handler(sender, instance: AK, action: str, **kwargs)
 
     # ... and compare to/update list of existing violations of this type
     # belonging to the AK that was recently changed (important!)
-    existing_violations_to_check = list(instance.constraintviolation_set.filter(type=violation_type))
+    existing_violations_to_check = instance.constraintviolation_set.filter(type=violation_type)
     # print(existing_violations_to_check)
     update_constraint_violations(new_violations, existing_violations_to_check)
 
@@ -352,12 +303,19 @@ def ak_requirements_changed_handler(sender, instance: AK, action: str, **kwargs)
 @receiver(post_save, sender=AKSlot)
 def akslot_changed_handler(sender, instance: AKSlot, **kwargs):
     """
-    Signal receiver: AKSlot changed
+    Signal receiver: AKSlot changed, schedule the checks of :func:`check_akslot`
+    """
+    schedule_constraint_check(check_akslot, instance)
+
+
+def check_akslot(instance: AKSlot):
+    """
+    Check for violations after AKSlot changed
 
     Changes might affect: Duplicate parallel, Two in room, Resodeadline
     """
     # TODO Consider rewriting this very long and complex method to resolve several (style) issues:
-    # pylint: disable=too-many-nested-blocks,too-many-locals,too-many-branches,too-many-statements
+    # pylint: disable=too-many-branches,too-many-statements
     event = instance.event
 
     # == Check for two parallel slots by one of the owners ==
@@ -366,31 +324,16 @@ def akslot_changed_handler(sender, instance: AKSlot, **kwargs):
     new_violations = []
 
     if instance.start:
+        slot_index = ScheduledSlotIndex.for_event(event)
         # For all owners (after recent change)...
         for owner in instance.ak.owners.all():
-            # ...find other slots that might be overlapping...
-
-            for ak in owner.ak_set.all():
-                # ...find overlapping slots...
-                if ak != instance.ak:
-                    for other_slot in ak.akslot_set.filter(start__isnull=False):
-                        if instance.overlaps(other_slot):
-                            # ...and create a temporary violation if necessary...
-                            c = ConstraintViolation(
-                                    type=violation_type,
-                                    level=ConstraintViolation.ViolationLevel.VIOLATION,
-                                    event=event,
-                                    ak_owner=owner
-                            )
-                            c.aks_tmp.add(instance.ak)
-                            c.aks_tmp.add(other_slot.ak)
-                            c.ak_slots_tmp.add(instance)
-                            c.ak_slots_tmp.add(other_slot)
-                            new_violations.append(c)
+            # ...find overlapping slots of other AKs of this owner and create temporary violations if necessary...
+            new_violations.extend(check_owner_collisions_for_slot(
+                    instance, owner, slot_index.overlapping_of_owner(owner.pk, instance)))
 
     # ... and compare to/update list of existing violations of this type
     # belonging to the AK that was recently changed (important!)
-    existing_violations_to_check = list(instance.constraintviolation_set.filter(type=violation_type))
+    existing_violations_to_check = instance.constraintviolation_set.filter(type=violation_type)
     # print(existing_violations_to_check)
     update_constraint_violations(new_violations, existing_violations_to_check)
 
@@ -399,28 +342,15 @@ def akslot_changed_handler(sender, instance: AKSlot, **kwargs):
     violation_type = ConstraintViolation.ViolationType.ROOM_TWO_SLOTS
     new_violations = []
 
-    # For all slots in this room...
+    # For all other slots in this room...
     if instance.room and instance.start:
-        for other_slot in instance.room.akslot_set.filter(start__isnull=False):
-            if other_slot != instance:
-                # ... find overlapping slots...
-                if instance.overlaps(other_slot):
-                    # ...and create a temporary violation if necessary...
-                    c = ConstraintViolation(
-                            type=violation_type,
-                            level=ConstraintViolation.ViolationLevel.WARNING,
-                            event=event,
-                            room=instance.room
-                    )
-                    c.aks_tmp.add(instance.ak)
-                    c.aks_tmp.add(other_slot.ak)
-                    c.ak_slots_tmp.add(instance)
-                    c.ak_slots_tmp.add(other_slot)
-                    new_violations.append(c)
+        # ... find overlapping slots and create temporary violations if necessary...
+        new_violations.extend(check_room_collisions_for_slot(
+                instance, ScheduledSlotIndex.for_event(event).overlapping_in_room(instance.room_id, instance)))
 
     # ... and compare to/update list of existing violations of this type
     # belonging to the slot that was recently changed (important!)
-    existing_violations_to_check = list(instance.constraintviolation_set.filter(type=violation_type))
+    existing_violations_to_check = instance.constraintviolation_set.filter(type=violation_type)
     # print(existing_violations_to_check)
     update_constraint_violations(new_violations, existing_violations_to_check)
 
@@ -435,24 +365,13 @@ def akslot_changed_handler(sender, instance: AKSlot, **kwargs):
 
     if instance.start:
         # For all other slots of this ak...
-        for other_slot in instance.ak.akslot_set.filter(start__isnull=False):
-            if other_slot != instance:
-                # ... find overlapping slots...
-                if instance.overlaps(other_slot):
-                    # ...and create a temporary violation if necessary...
-                    c = ConstraintViolation(
-                            type=violation_type,
-                            level=ConstraintViolation.ViolationLevel.WARNING,
-                            event=event,
-                    )
-                    c.aks_tmp.add(instance.ak)
-                    c.ak_slots_tmp.add(instance)
-                    c.ak_slots_tmp.add(other_slot)
-                    new_violations.append(c)
+        # ... find overlapping slots and create temporary violations if necessary...
+        new_violations.extend(check_ak_collisions_for_slot(
+                instance, ScheduledSlotIndex.for_event(event).overlapping_of_ak(instance.ak_id, instance)))
 
     # ... and compare to/update list of existing violations of this type
     # belonging to the slot that was recently changed (important!)
-    existing_violations_to_check = list(instance.constraintviolation_set.filter(type=violation_type))
+    existing_violations_to_check = instance.constraintviolation_set.filter(type=violation_type)
     update_constraint_violations(new_violations, existing_violations_to_check)
 
     # == Check for slot outside availability ==
@@ -462,27 +381,13 @@ def akslot_changed_handler(sender, instance: AKSlot, **kwargs):
     new_violations = []
 
     if instance.start:
-        availabilities_of_this_ak: Iterable[Availability] = instance.ak.availabilities.all()
-
-        covered = False
-
-        for availability in availabilities_of_this_ak:
-            covered = availability.start <= instance.start and availability.end >= instance.end
-            if covered:
-                break
-        if not covered:
-            c = ConstraintViolation(
-                    type=violation_type,
-                    level=ConstraintViolation.ViolationLevel.VIOLATION,
-                    event=event
-            )
-            c.aks_tmp.add(instance.ak)
-            c.ak_slots_tmp.add(instance)
-            new_violations.append(c)
+        cv = check_availability_for_slot(instance, instance.ak.availabilities.all())
+        if cv is not None:
+            new_violations.append(cv)
 
     # ... and compare to/update list of existing violations of this type
     # belonging to the AK that was recently changed (important!)
-    existing_violations_to_check = list(instance.constraintviolation_set.filter(type=violation_type))
+    existing_violations_to_check = instance.constraintviolation_set.filter(type=violation_type)
     # print(existing_violations_to_check)
     update_constraint_violations(new_violations, existing_violations_to_check)
 
@@ -493,27 +398,13 @@ def akslot_changed_handler(sender, instance: AKSlot, **kwargs):
     new_violations = []
 
     if instance.room:
-
-        room_requirements = instance.room.properties.all()
-
-        for requirement in instance.ak.requirements.all():
-
-            if requirement not in room_requirements:
-                # ...and create a temporary violation if necessary...
-                c = ConstraintViolation(
-                        type=violation_type,
-                        level=ConstraintViolation.ViolationLevel.VIOLATION,
-                        event=event,
-                        requirement=requirement,
-                        room=instance.room,
-                )
-                c.aks_tmp.add(instance.ak)
-                c.ak_slots_tmp.add(instance)
-                new_violations.append(c)
+        room_property_ids = set(instance.room.properties.values_list("pk", flat=True))
+        new_violations.extend(check_requirements_for_slot(instance, instance.ak.requirements.all(),
+                                                          room_property_ids))
 
     # ... and compare to/update list of existing violations of this type
     # belonging to the AK that was recently changed (important!)
-    existing_violations_to_check = list(instance.constraintviolation_set.filter(type=violation_type))
+    existing_violations_to_check = instance.constraintviolation_set.filter(type=violation_type)
     # print(existing_violations_to_check)
     update_constraint_violations(new_violations, existing_violations_to_check)
 
@@ -523,27 +414,19 @@ def akslot_changed_handler(sender, instance: AKSlot, **kwargs):
     new_violations = []
 
     if instance.start:
-        conflicts_of_this_ak: Iterable[AK] = instance.ak.conflicts.all()
+        slot_index = ScheduledSlotIndex.for_event(event)
+        conflicts_of_this_ak: list[int] = list(instance.ak.conflicts.values_list("pk", flat=True))
+        slot_index.load_aks(conflicts_of_this_ak)
 
-        for ak in conflicts_of_this_ak:
-            if ak != instance.ak:
-                for other_slot in ak.akslot_set.filter(start__isnull=False):
-                    # ...find overlapping slots...
-                    if instance.overlaps(other_slot):
-                        # ...and create a temporary violation if necessary...
-                        c = ConstraintViolation(
-                                type=violation_type,
-                                level=ConstraintViolation.ViolationLevel.VIOLATION,
-                                event=event,
-                        )
-                        c.aks_tmp.add(instance.ak)
-                        c.ak_slots_tmp.add(instance)
-                        c.ak_slots_tmp.add(other_slot)
-                        new_violations.append(c)
+        for ak_id in conflicts_of_this_ak:
+            if ak_id != instance.ak_id:
+                # ...find overlapping slots and create temporary violations if necessary...
+                new_violations.extend(check_conflicts_for_slot(instance,
+                                                               slot_index.overlapping_of_ak(ak_id, instance)))
 
     # ... and compare to/update list of existing violations of this type
     # belonging to the AK that was recently changed (important!)
-    existing_violations_to_check = list(instance.ak.constraintviolation_set.filter(type=violation_type))
+    existing_violations_to_check = instance.ak.constraintviolation_set.filter(type=violation_type)
     # print(existing_violations_to_check)
     update_constraint_violations(new_violations, existing_violations_to_check)
 
@@ -553,30 +436,20 @@ def akslot_changed_handler(sender, instance: AKSlot, **kwargs):
     new_violations = []
 
     if instance.start:
-        prerequisites_of_this_ak: Iterable[AK] = instance.ak.prerequisites.all()
+        slot_index = ScheduledSlotIndex.for_event(event)
+        prerequisites_of_this_ak: list[int] = list(instance.ak.prerequisites.values_list("pk", flat=True))
+        slot_index.load_aks(prerequisites_of_this_ak)
 
-        for ak in prerequisites_of_this_ak:
-            if ak != instance.ak:
-                for other_slot in ak.akslot_set.filter(start__isnull=False):
-                    # ...find slots in the wrong order...
-                    if other_slot.end > instance.start:
-                        # ...and create a temporary violation if necessary...
-                        c = ConstraintViolation(
-                                type=violation_type,
-                                level=ConstraintViolation.ViolationLevel.VIOLATION,
-                                event=event,
-                        )
-                        c.aks_tmp.add(instance.ak)
-                        c.aks_tmp.add(other_slot.ak)
-                        c.ak_slots_tmp.add(instance)
-                        c.ak_slots_tmp.add(other_slot)
-                        new_violations.append(c)
+        for ak_id in prerequisites_of_this_ak:
+            if ak_id != instance.ak_id:
+                # ...find slots in the wrong order and create temporary violations if necessary...
+                new_violations.extend(check_prerequisites_for_slot(instance, slot_index.slots_of_ak(ak_id)))
 
         new_violations.extend(get_cvs_where_ak_is_prerequisite(instance, event))
 
     # ... and compare to/update list of existing violations of this type
     # belonging to the AK that was recently changed (important!)
-    existing_violations_to_check = list(instance.constraintviolation_set.filter(type=violation_type))
+    existing_violations_to_check = instance.constraintviolation_set.filter(type=violation_type)
     # print(existing_violations_to_check)
     update_constraint_violations(new_violations, existing_violations_to_check)
 
@@ -585,8 +458,8 @@ def akslot_changed_handler(sender, instance: AKSlot, **kwargs):
     new_violations = [cv] if cv is not None else []
 
     # Compare to/update list of existing violations of this type for this slot
-    existing_violations_to_check = list(
-            instance.constraintviolation_set.filter(type=ConstraintViolation.ViolationType.ROOM_CAPACITY_EXCEEDED)
+    existing_violations_to_check = instance.constraintviolation_set.filter(
+            type=ConstraintViolation.ViolationType.ROOM_CAPACITY_EXCEEDED
     )
     update_constraint_violations(new_violations, existing_violations_to_check)
 
@@ -611,7 +484,14 @@ def akslot_deleted_handler(sender, instance: AKSlot, **kwargs):
 @receiver(post_save, sender=Room)
 def room_changed_handler(sender, instance: Room, **kwargs):
     """
-    Signal receiver: Room changed
+    Signal receiver: Room changed, schedule the checks of :func:`check_room`
+    """
+    schedule_constraint_check(check_room, instance)
+
+
+def check_room(instance: Room):
+    """
+    Check for violations after room changed
 
     Changes might affect: Room size
     """
@@ -623,19 +503,24 @@ def room_changed_handler(sender, instance: Room, **kwargs):
         if cv is not None:
             new_violations.append(cv)
 
-    existing_violations_to_check = list(instance.constraintviolation_set.filter(type=violation_type))
+    existing_violations_to_check = instance.constraintviolation_set.filter(type=violation_type)
     update_constraint_violations(new_violations, existing_violations_to_check)
 
 
 @receiver(m2m_changed, sender=Room.properties.through)
 def room_requirements_changed_handler(sender, instance: Room, action: str, **kwargs):
     """
-    Signal Receiver: Requirements of room changed
+    Signal receiver: Requirements of room changed, schedule the checks of :func:`check_room_requirements`
     """
     # Only signal after change (post_add, post_delete, post_clear) are relevant
-    if not action.startswith("post"):
-        return
+    if action.startswith("post"):
+        schedule_constraint_check(check_room_requirements, instance)
 
+
+def check_room_requirements(instance: Room):
+    """
+    Check for violations after requirements of room changed
+    """
     event = instance.event
 
     violation_type = ConstraintViolation.ViolationType.REQUIRE_NOT_GIVEN
@@ -663,7 +548,7 @@ def room_requirements_changed_handler(sender, instance: Room, action: str, **kwa
 
     # Once this list is constructed use it for updating
     # (removing of obsolete CVs and adding of new ones)
-    existing_violations_to_check = list(instance.constraintviolation_set.filter(type=violation_type))
+    existing_violations_to_check = instance.constraintviolation_set.filter(type=violation_type)
     update_constraint_violations(new_violations, existing_violations_to_check)
 
 
@@ -673,44 +558,50 @@ def availability_changed_handler(sender, instance: Availability, **kwargs):
     Signal receiver: Availalability changed
 
     Changes might affect: category availability, AK availability, Room availability
-    """
-    event = instance.event
 
+    Only AK availabilities are checked (cf. :func:`check_ak_availabilities`), the check is scheduled per AK
+    such that changing several availabilities of the same AK runs it only once
+    """
     # An AK's availability changed: Might affect AK slots scheduled outside the permitted time
-    if instance.ak:
-        violation_type = ConstraintViolation.ViolationType.SLOT_OUTSIDE_AVAIL
-        new_violations = []
+    if instance.ak_id is not None:
+        schedule_constraint_check(check_ak_availabilities, instance.ak)
 
-        availabilities_of_this_ak: Iterable[Availability] = instance.ak.availabilities.all()
-        slots_of_this_ak: Iterable[AKSlot] = instance.ak.akslot_set.filter(start__isnull=False)
 
-        for slot in slots_of_this_ak:
-            covered = False
-            for availability in availabilities_of_this_ak:
-                covered = availability.start <= slot.start and availability.end >= slot.end
-                if covered:
-                    break
-            if not covered:
-                c = ConstraintViolation(
-                        type=violation_type,
-                        level=ConstraintViolation.ViolationLevel.VIOLATION,
-                        event=event
-                )
-                c.aks_tmp.add(instance.ak)
-                c.ak_slots_tmp.add(slot)
-                new_violations.append(c)
+def check_ak_availabilities(ak: AK):
+    """
+    Check for slots of the given AK scheduled outside of its availabilities
+
+    :param ak: AK to check
+    :type ak: AK
+    """
+    violation_type = ConstraintViolation.ViolationType.SLOT_OUTSIDE_AVAIL
+    new_violations = []
 
-        # ... and compare to/update list of existing violations of this type
-        # belonging to the AK that was recently changed (important!)
-        existing_violations_to_check = list(instance.ak.constraintviolation_set.filter(type=violation_type))
-        # print(existing_violations_to_check)
-        update_constraint_violations(new_violations, existing_violations_to_check)
+    availabilities_of_this_ak: Iterable[Availability] = ak.availabilities.all()
+    slots_of_this_ak: Iterable[AKSlot] = ak.akslot_set.filter(start__isnull=False).select_related("ak", "event")
+
+    for slot in slots_of_this_ak:
+        cv = check_availability_for_slot(slot, availabilities_of_this_ak)
+        if cv is not None:
+            new_violations.append(cv)
+
+    # ... and compare to/update list of existing violations of this type
+    # belonging to the AK that was recently changed (important!)
+    existing_violations_to_check = ak.constraintviolation_set.filter(type=violation_type)
+    update_constraint_violations(new_violations, existing_violations_to_check)
 
 
 @receiver(post_save, sender=Event)
 def event_changed_handler(sender, instance: Event, **kwargs):
     """
-    Signal receiver: Event changed
+    Signal receiver: Event changed, schedule the checks of :func:`check_event`
+    """
+    schedule_constraint_check(check_event, instance)
+
+
+def check_event(instance: Event):
+    """
+    Check for violations after event changed
 
     Changes might affect: Reso deadline
     """
@@ -721,5 +612,5 @@ def event_changed_handler(sender, instance: Event, **kwargs):
     else:
         # No reso deadline, delete all violations
         violation_type = ConstraintViolation.ViolationType.AK_AFTER_RESODEADLINE
-        existing_violations_to_check = list(instance.constraintviolation_set.filter(type=violation_type))
+        existing_violations_to_check = instance.constraintviolation_set.filter(type=violation_type)
         update_constraint_violations([], existing_violations_to_check)
@@ -1,12 +1,22 @@
 import json
+import threading
 from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
 
-from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 
-from AKModel.models import AK, AKCategory, AKRequirement, AKSlot, Event, Room
+from AKModel.models import AK, AKCategory, AKRequirement, AKSlot, ConstraintViolation, Event, Room
 from AKModel.tests.test_views import BasicViewTests
 from AKScheduling.checks import aks_with_unfulfillable_requirements
+from AKScheduling.constraint_checks import ConstraintCheckCollector, wait_for_constraint_checks
+from AKScheduling.models import check_ak, check_ak_conflicts, check_akslot
+from AKScheduling.violations import ScheduledSlotIndex, update_constraint_violations
 
 
 class ModelViewTests(BasicViewTests, TestCase):
@@ -128,3 +138,378 @@ class ModelViewTests(BasicViewTests, TestCase):
         )
         self.assertNotIn(ak, aks_unfulfillable_requirements_filtered,
                          "Filtering did not work correctly")
+
+
+class ConstraintViolationUpdateTest(TestCase):
+    """
+    Tests for matching and updating constraint violations
+    """
+    fixtures = ['model.json']
+
+    def setUp(self):
+        self.event = Event.objects.get(pk=2)
+        self.slots = list(AKSlot.objects.filter(event=self.event).select_related('ak'))
+        self.room = Room.objects.filter(event=self.event).first()
+
+    def _violation(self, i: int) -> ConstraintViolation:
+        """
+        Create a temporary room collision violation for two slots of the event
+        """
+        violation = ConstraintViolation(
+                type=ConstraintViolation.ViolationType.ROOM_TWO_SLOTS,
+                level=ConstraintViolation.ViolationLevel.VIOLATION,
+                event=self.event,
+                room=self.room,
+        )
+        slots = [self.slots[i % len(self.slots)], self.slots[(i + 1) % len(self.slots)]]
+        violation.aks_tmp.update(slot.ak for slot in slots)
+        violation.ak_slots_tmp.update(slots)
+        return violation
+
+    def _existing_violations(self):
+        return ConstraintViolation.objects.filter(
+                event=self.event, type=ConstraintViolation.ViolationType.ROOM_TWO_SLOTS
+        )
+
+    def test_signature(self):
+        """
+        Test that temporary and persisted violations with the same relations have the same signature
+        """
+        violation = self._violation(0)
+        violation.save()
+        persisted_violation = ConstraintViolation.objects.get(pk=violation.pk)
+        self.assertEqual(persisted_violation.signature, self._violation(0).signature)
+        self.assertTrue(persisted_violation.matches(self._violation(0)))
+        self.assertFalse(persisted_violation.matches(self._violation(1)))
+
+        other_room_violation = self._violation(0)
+        other_room_violation.room = Room.objects.filter(event=self.event).exclude(pk=self.room.pk).first()
+        self.assertFalse(persisted_violation.matches(other_room_violation))
+
+    def test_update(self):
+        """
+        Test that matching violations are kept, new ones are saved and obsolete ones (including duplicates) deleted
+        """
+        self._existing_violations().delete()
+        kept, duplicate, obsolete = self._violation(0), self._violation(0), self._violation(1)
+        for violation in [kept, duplicate, obsolete]:
+            violation.save()
+
+        update_constraint_violations([self._violation(0), self._violation(2)], self._existing_violations())
+        self.assertCountEqual(
+                [violation.signature for violation in self._existing_violations()],
+                [self._violation(0).signature, self._violation(2).signature],
+        )
+        # only one of the matching violations is kept
+        self.assertEqual(self._existing_violations().filter(pk__in=[kept.pk, duplicate.pk]).count(), 1)
+        self.assertFalse(self._existing_violations().filter(pk=obsolete.pk).exists())
+
+    def test_number_of_queries(self):
+        """
+        Test that matching existing violations does not need queries per violation
+        """
+        def _count_queries(number_of_violations: int) -> int:
+            self._existing_violations().delete()
+            for i in range(number_of_violations):
+                self._violation(i).save()
+            new_violations = [self._violation(i) for i in range(number_of_violations)]
+            with CaptureQueriesContext(connection) as queries:
+                update_constraint_violations(new_violations, self._existing_violations())
+            self.assertEqual(self._existing_violations().count(), number_of_violations)
+            return len(queries)
+
+        self.assertEqual(_count_queries(2), _count_queries(len(self.slots)))
+
+    def test_signature_hash(self):
+        """
+        Test that the stored signature hash is computed on save and updated when the relations change
+        """
+        violation = self._violation(0)
+        violation.save()
+        persisted_violation = ConstraintViolation.objects.get(pk=violation.pk)
+        self.assertEqual(persisted_violation.signature_hash, self._violation(0).compute_signature_hash())
+        self.assertNotEqual(persisted_violation.signature_hash, self._violation(1).compute_signature_hash())
+
+        other_violation = self._violation(1)
+        persisted_violation.ak_slots.set(other_violation.ak_slots_tmp)
+        persisted_violation.aks.set(other_violation.aks_tmp)
+        self.assertEqual(ConstraintViolation.objects.get(pk=violation.pk).signature_hash,
+                         other_violation.compute_signature_hash())
+
+        # changes from the other side of the relation are tracked, too
+        self.slots[2].constraintviolation_set.clear()
+        persisted_violation = ConstraintViolation.objects.get(pk=violation.pk)
+        self.assertEqual(persisted_violation.signature_hash, persisted_violation.compute_signature_hash())
+
+    def test_deduplication(self):
+        """
+        Test that violations are not saved again if a matching violation outside the checked subset exists
+        """
+        self._existing_violations().delete()
+        self._violation(0).save()
+        update_constraint_violations([self._violation(0), self._violation(0)], ConstraintViolation.objects.none())
+        self.assertEqual(self._existing_violations().count(), 1)
+
+    def test_backfill(self):
+        """
+        Test that the backfill command computes missing signature hashes
+        """
+        self._existing_violations().delete()
+        for i in range(3):
+            self._violation(i).save()
+        self._existing_violations().update(signature_hash="")
+
+        call_command("backfill_constraint_violation_signatures", "--batch-size", "2", stdout=StringIO())
+        for violation in self._existing_violations():
+            self.assertEqual(violation.signature_hash, violation.compute_signature_hash())
+
+        # violations without stored hash are matched, too
+        self._existing_violations().update(signature_hash="")
+        update_constraint_violations([self._violation(i) for i in range(3)], self._existing_violations())
+        self.assertEqual(self._existing_violations().count(), 3)
+        self.assertFalse(self._existing_violations().filter(signature_hash="").exists())
+
+
+class ConstraintCheckCoalescingTest(TestCase):
+    """
+    Tests for collecting the constraint checks triggered by signals and running them on commit
+    """
+    fixtures = ['model.json']
+
+    def setUp(self):
+        self.event = Event.objects.get(pk=2)
+        self.ak = AK.objects.get(pk=4)
+
+    def test_checks_run_once(self):
+        """
+        Test that each check runs once per entity, regardless of the number of signals
+        """
+        with patch("AKScheduling.models.check_akslot", wraps=check_akslot) as slot_check, \
+                patch("AKScheduling.models.check_ak_conflicts", wraps=check_ak_conflicts) as conflicts_check:
+            with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                with transaction.atomic():
+                    for _ in range(3):
+                        for slot in self.ak.akslot_set.all():
+                            slot.save()
+                    self.ak.conflicts.set([AK.objects.get(pk=1)])
+                    self.ak.conflicts.add(AK.objects.get(pk=2))
+                # checks are deferred until commit
+                slot_check.assert_not_called()
+
+        # all checks are collected by the same collector
+        collectors = {id(callback) for callback in callbacks if isinstance(callback, ConstraintCheckCollector)}
+        self.assertEqual(len(collectors), 1)
+        self.assertEqual(slot_check.call_count, self.ak.akslot_set.count())
+        self.assertCountEqual([call.args[0].pk for call in slot_check.call_args_list],
+                              self.ak.akslot_set.values_list("pk", flat=True))
+        self.assertEqual(conflicts_check.call_count, 1)
+
+    def test_violations_on_commit(self):
+        """
+        Test that violations are found on commit, and checks of deleted entities and rolled back changes are skipped
+        """
+        slot = AKSlot.objects.get(pk=8)
+        other_slot = AKSlot.objects.get(pk=1)
+        room_violations = ConstraintViolation.objects.filter(type=ConstraintViolation.ViolationType.ROOM_TWO_SLOTS,
+                                                             ak_slots=slot)
+        with self.captureOnCommitCallbacks(execute=True):
+            slot.start = other_slot.start
+            slot.room = other_slot.room
+            slot.save()
+            self.assertFalse(room_violations.exists())
+        self.assertTrue(room_violations.exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            deleted_slot = AKSlot.objects.create(ak=self.ak, event=self.event, room=other_slot.room,
+                                                 start=other_slot.start, duration=1)
+            deleted_slot.delete()
+        self.assertFalse(ConstraintViolation.objects.filter(ak_slots__pk=deleted_slot.pk).exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    slot.start = other_slot.start + timedelta(days=1)
+                    slot.save()
+                    raise ValueError()
+            except ValueError:
+                pass
+        self.assertTrue(room_violations.exists())
+
+    def test_trashed_ak(self):
+        """
+        Test that checks also run for trashed AKs and their slots, which are hidden by the default managers
+        """
+        with patch("AKScheduling.models.check_ak", wraps=check_ak) as ak_check, \
+                patch("AKScheduling.models.check_akslot", wraps=check_akslot) as slot_check:
+            slots = list(self.ak.akslot_set.all())
+            with self.captureOnCommitCallbacks(execute=True):
+                self.ak.trashed_at = timezone.now()
+                self.ak.save()
+                for slot in slots:
+                    slot.save()
+        self.assertEqual([call.args[0].pk for call in ak_check.call_args_list], [self.ak.pk])
+        self.assertCountEqual([call.args[0].pk for call in slot_check.call_args_list], [slot.pk for slot in slots])
+
+    def test_reso_deadline_removed(self):
+        """
+        Test that violations of the reso deadline are removed together with the deadline
+        """
+        reso_violations = ConstraintViolation.objects.filter(
+                event=self.event, type=ConstraintViolation.ViolationType.AK_AFTER_RESODEADLINE
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            AK.objects.filter(pk=self.ak.pk).update(reso=True)
+            self.event.reso_deadline = self.event.start
+            self.event.save()
+        self.assertTrue(reso_violations.filter(aks=self.ak).exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.event.reso_deadline = None
+            self.event.save()
+        self.assertFalse(reso_violations.exists())
+
+    def test_savepoint_rollback(self):
+        """
+        Test that checks scheduled after a rolled back savepoint run, even if the collection started in the savepoint
+        """
+        slot, other_slot = AKSlot.objects.get(pk=8), AKSlot.objects.get(pk=1)
+        room_violations = ConstraintViolation.objects.filter(type=ConstraintViolation.ViolationType.ROOM_TWO_SLOTS,
+                                                             ak_slots=slot)
+        with patch("AKScheduling.models.check_akslot", wraps=check_akslot) as slot_check:
+            with self.captureOnCommitCallbacks(execute=True):
+                try:
+                    with transaction.atomic():
+                        other_slot.save()
+                        raise ValueError()
+                except ValueError:
+                    pass
+                slot.start = other_slot.start
+                slot.room = other_slot.room
+                slot.save()
+        self.assertTrue(room_violations.exists())
+        self.assertEqual([call.args[0].pk for call in slot_check.call_args_list], [slot.pk])
+
+
+class ScheduledSlotIndexTest(TestCase):
+    """
+    Tests for finding overlapping slots with the in-memory index
+    """
+    fixtures = ['model.json']
+
+    def setUp(self):
+        self.event = Event.objects.get(pk=2)
+
+    def test_matches_pairwise_comparison(self):
+        """
+        Test that the index finds the same overlapping slots as comparing all pairs of slots
+        """
+        # add slots overlapping the existing ones partially and completely
+        slot = AKSlot.objects.get(pk=1)
+        AKSlot.objects.bulk_create([
+            AKSlot(ak=slot.ak, event=self.event, room=slot.room, start=slot.start + timedelta(minutes=30),
+                   duration=0.5),
+            AKSlot(ak_id=2, event=self.event, room=slot.room, start=slot.start - timedelta(hours=1), duration=4),
+            AKSlot(ak_id=3, event=self.event, room=slot.room, start=slot.end, duration=1),
+        ])
+        slots = list(AKSlot.objects.filter(event=self.event, start__isnull=False).prefetch_related("ak__owners"))
+        index = ScheduledSlotIndex(self.event)
+
+        def overlapping(slot, other_slot):
+            return other_slot.pk != slot.pk and slot.start < other_slot.end and other_slot.start < slot.end
+
+        for slot in slots:
+            with self.subTest(slot=slot.pk):
+                self.assertCountEqual(
+                        [other_slot.pk for other_slot in index.overlapping_in_room(slot.room_id, slot)],
+                        [other_slot.pk for other_slot in slots
+                         if other_slot.room_id == slot.room_id and overlapping(slot, other_slot)]
+                )
+                self.assertCountEqual(
+                        [other_slot.pk for other_slot in index.overlapping_of_ak(slot.ak_id, slot)],
+                        [other_slot.pk for other_slot in slots
+                         if other_slot.ak_id == slot.ak_id and overlapping(slot, other_slot)]
+                )
+                for owner in slot.ak.owners.all():
+                    self.assertCountEqual(
+                            [other_slot.pk for other_slot in index.overlapping_of_owner(owner.pk, slot)],
+                            [other_slot.pk for other_slot in slots
+                             if owner in other_slot.ak.owners.all() and overlapping(slot, other_slot)]
+                    )
+
+    def test_contained_slot(self):
+        """
+        Test that a room collision is found for a slot taking place during a longer slot in the same room
+        """
+        slot, other_slot = AKSlot.objects.get(pk=8), AKSlot.objects.get(pk=1)
+        with self.captureOnCommitCallbacks(execute=True):
+            slot.room = other_slot.room
+            slot.start = other_slot.start + timedelta(minutes=30)
+            slot.duration = 0.5
+            slot.save()
+        self.assertTrue(ConstraintViolation.objects.filter(type=ConstraintViolation.ViolationType.ROOM_TWO_SLOTS,
+                                                           ak_slots=slot).filter(ak_slots=other_slot).exists())
+
+    def test_number_of_queries(self):
+        """
+        Test that the number of queries of the slot check does not depend on the number of slots of the event
+        """
+        slot = AKSlot.objects.get(pk=1)
+        # bring the violations of the slot up to date first
+        check_akslot(slot)
+        with CaptureQueriesContext(connection) as queries:
+            check_akslot(slot)
+        number_of_queries = len(queries)
+
+        AKSlot.objects.bulk_create([
+            AKSlot(ak_id=ak_id, event=self.event, room=slot.room, start=slot.end + timedelta(hours=i), duration=1)
+            for i in range(40) for ak_id in [1, 2, 3]
+        ])
+        with CaptureQueriesContext(connection) as queries:
+            check_akslot(slot)
+        self.assertEqual(len(queries), number_of_queries)
+
+
+@override_settings(CONSTRAINT_CHECKS_ASYNC=True)
+class AsyncConstraintCheckTest(TransactionTestCase):
+    """
+    Tests for running the constraint checks in the background worker
+    """
+    fixtures = ['model.json']
+
+    def setUp(self):
+        self.admin_user = get_user_model().objects.create_superuser(username="admin", password="admin")
+        self.client.force_login(self.admin_user)
+
+    def test_slot_update(self):
+        """
+        Test that moving a slot returns before the checks ran, and the violations are updated afterward
+        """
+        event = Event.get_by_slug('kif42')
+        slot, other_slot = AKSlot.objects.get(pk=8), AKSlot.objects.get(pk=1)
+        room_violations = ConstraintViolation.objects.filter(type=ConstraintViolation.ViolationType.ROOM_TWO_SLOTS,
+                                                             ak_slots=slot)
+        self.assertFalse(room_violations.exists())
+
+        checks_may_run = threading.Event()
+
+        def blocked_check_akslot(instance):
+            checks_may_run.wait(timeout=10)
+            check_akslot(instance)
+
+        with patch("AKScheduling.models.check_akslot", side_effect=blocked_check_akslot):
+            response = self.client.put(
+                    f"/kif42/api/scheduling-event/{slot.pk}/",
+                    json.dumps({
+                        'start': timezone.localtime(other_slot.start, event.timezone).strftime("%Y-%m-%d %H:%M:%S"),
+                        'end': timezone.localtime(other_slot.end, event.timezone).strftime("%Y-%m-%d %H:%M:%S"),
+                        'roomId': other_slot.room_id,
+                    }),
+                    content_type='application/json'
+            )
+            self.assertEqual(response.status_code, 200)
+            # the request did not wait for the (still blocked) checks
+            self.assertFalse(room_violations.exists())
+
+            checks_may_run.set()
+            wait_for_constraint_checks(timeout=10)
+        self.assertTrue(room_violations.exists())
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.messages.views import SuccessMessageMixin
 from django.db.models import Count
@@ -56,6 +57,7 @@ class SchedulingAdminView(AdminViewMixin, FilterByEventSlugMixin, ListView):
         context["end"] = self.event.end
 
         context["akSlotAddForm"] = AKAddSlotForm(self.event)
+        context["constraint_checks_async"] = settings.CONSTRAINT_CHECKS_ASYNC
 
         return context
 
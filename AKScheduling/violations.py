@@ -0,0 +1,483 @@
+"""
+Computation of constraint violations, used by the checks run after changes (cf. :mod:`AKScheduling.models`)
+
+Newly computed violations are compared to the stored ones with :func:`update_constraint_violations`.
+The checks of scheduled slots compute the violations of a single slot from the related data passed to them.
+They are shared by the checks after a slot changed (cf. :func:`AKScheduling.models.check_akslot`), which look up
+the related data in a :class:`ScheduledSlotIndex`, and the checks of a whole event at once
+(cf. :func:`update_constraint_violations_for_event`), which load all related data upfront.
+"""
+import itertools
+from collections import defaultdict
+from typing import Iterable
+
+from django.db.models import QuerySet
+from django.utils.translation import gettext_lazy as _
+
+from AKModel.availability.intervals import OverlapIndex
+from AKModel.availability.models import Availability
+from AKModel.models import AK, AKSlot, ConstraintViolation, Event, Room
+from AKScheduling.constraint_checks import cached_for_run
+
+
+def update_constraint_violations(new_violations, existing_violations_to_check):
+    """
+    Update existing constraint violations (subset for which new violations were computed) based on these new violations.
+    This will add all new violations without a match, preserve the matching ones
+    and delete the obsolete ones (those without a match from the newly calculated violations).
+
+    Violations are matched by the hashes of their signatures (cf. `ConstraintViolation.signature_hash`)
+    using a dict lookup. If the existing violations are given as a queryset, only their primary keys and stored hashes
+    are loaded. New violations without a match are additionally checked against the stored violations with a single
+    query on the indexed hash, hence duplicates of violations outside of the checked subset are not created.
+
+    :param new_violations: list of new (not yet saved) violations that exist after the last change
+    :type new_violations: list[ConstraintViolation]
+    :param existing_violations_to_check: related violations currently in the db
+    :type existing_violations_to_check: QuerySet[ConstraintViolation] | list[ConstraintViolation]
+    """
+    if isinstance(existing_violations_to_check, QuerySet):
+        existing_violations = list(existing_violations_to_check.values_list("pk", "signature_hash"))
+        # Compute and store hashes missing for violations created before they were introduced
+        missing_hash_pks = [pk for pk, signature_hash in existing_violations if not signature_hash]
+        if missing_hash_pks:
+            backfilled_violations = list(ConstraintViolation.objects.filter(pk__in=missing_hash_pks)
+                                         .prefetch_related("aks", "ak_slots"))
+            for violation in backfilled_violations:
+                violation.signature_hash = violation.compute_signature_hash()
+            ConstraintViolation.objects.bulk_update(backfilled_violations, ["signature_hash"])
+            backfilled_hashes = {violation.pk: violation.signature_hash for violation in backfilled_violations}
+            existing_violations = [(pk, signature_hash or backfilled_hashes[pk])
+                                   for pk, signature_hash in existing_violations]
+    else:
+        existing_violations = [(violation.pk, violation.signature_hash or violation.compute_signature_hash())
+                               for violation in existing_violations_to_check]
+
+    # Existing violations per signature hash (reversed, such that the first match is popped first)
+    existing_violations_by_hash = defaultdict(list)
+    for pk, signature_hash in reversed(existing_violations):
+        existing_violations_by_hash[signature_hash].append(pk)
+
+    unmatched_violations = []
+    for new_violation in new_violations:
+        new_violation.signature_hash = new_violation.compute_signature_hash()
+        matching_violations = existing_violations_by_hash.get(new_violation.signature_hash)
+        if matching_violations:
+            # Remove from existing violations since it should stay in db
+            matching_violations.pop()
+        else:
+            unmatched_violations.append(new_violation)
+
+    # Cleanup obsolete violations (ones without matches computed under current conditions)
+    outdated_violation_pks = [pk for pks in existing_violations_by_hash.values() for pk in pks]
+    if outdated_violation_pks:
+        ConstraintViolation.objects.filter(pk__in=outdated_violation_pks).delete()
+
+    if unmatched_violations:
+        # Only save new violations if no match was found, neither in the checked subset nor in the db
+        stored_signatures = set(ConstraintViolation.objects.filter(
+                event_id__in={violation.event_id for violation in unmatched_violations},
+                type__in={violation.type for violation in unmatched_violations},
+                signature_hash__in={violation.signature_hash for violation in unmatched_violations},
+        ).values_list("event_id", "type", "signature_hash"))
+        for new_violation in unmatched_violations:
+            signature = (new_violation.event_id, new_violation.type, new_violation.signature_hash)
+            if signature not in stored_signatures:
+                new_violation.save()
+                stored_signatures.add(signature)
+
+
+def check_capacity_for_slot(slot: AKSlot):
+    """
+    Check whether this slot violates the capacity requirement
+
+    :param slot: slot to check
+    :type slot: AKSlot
+    :return: Violation (if any) or None
+    :rtype: ConstraintViolation or None
+    """
+
+    # If slot is scheduled in a room and interest was specified
+    if slot.room and slot.room.capacity >= 0 and slot.ak.interest >= 0:
+        # Create a violation if interest exceeds room capacity
+        if slot.room.capacity < slot.ak.interest:
+            c = ConstraintViolation(
+                    type=ConstraintViolation.ViolationType.ROOM_CAPACITY_EXCEEDED,
+                    level=ConstraintViolation.ViolationLevel.VIOLATION,
+                    event=slot.event,
+                    room=slot.room,
+                    comment=_("Not enough space for AK interest (Interest: %(interest)d, Capacity: %(capacity)d)")
+                            % {'interest': slot.ak.interest, 'capacity': slot.room.capacity},
+            )
+            c.ak_slots_tmp.add(slot)
+            c.aks_tmp.add(slot.ak)
+            return c
+
+        # Create a warning if interest is close to room capacity
+        if slot.room.capacity < slot.ak.interest + 5 or slot.room.capacity < slot.ak.interest * 1.25:
+            c = ConstraintViolation(
+                    type=ConstraintViolation.ViolationType.ROOM_CAPACITY_EXCEEDED,
+                    level=ConstraintViolation.ViolationLevel.WARNING,
+                    event=slot.event,
+                    room=slot.room,
+                    comment=_("Space is too close to AK interest (Interest: %(interest)d, Capacity: %(capacity)d)")
+                            % {'interest': slot.ak.interest, 'capacity': slot.room.capacity}
+            )
+            c.ak_slots_tmp.add(slot)
+            c.aks_tmp.add(slot.ak)
+            return c
+
+    return None
+
+
+def _slots_overlap(slot: AKSlot, other_slot: AKSlot) -> bool:
+    """
+    Check whether two scheduled slots overlap, regardless of the order in which they are given
+    """
+    return slot.overlaps(other_slot) or other_slot.overlaps(slot)
+
+
+def _overlapping_pairs(slots: list[AKSlot]) -> Iterable[tuple[AKSlot, AKSlot]]:
+    """
+    Find all (unordered) pairs of overlapping slots in a list of scheduled slots
+    """
+    for slot, other_slot in itertools.combinations(slots, 2):
+        if _slots_overlap(slot, other_slot):
+            yield slot, other_slot
+
+
+def _temporary_violation(violation_type, level, event: Event, aks: Iterable[AK], slots: Iterable[AKSlot],
+                         **kwargs) -> ConstraintViolation:
+    """
+    Create a temporary (not yet saved) violation referencing the given AKs and slots
+    """
+    c = ConstraintViolation(type=violation_type, level=level, event=event, **kwargs)
+    c.aks_tmp.update(aks)
+    c.ak_slots_tmp.update(slots)
+    return c
+
+
+def check_reso_deadline_for_slot(slot: AKSlot) -> ConstraintViolation | None:
+    """
+    Check whether the slot of an AK with reso intention ends after the reso deadline of its event
+
+    :param slot: slot to check
+    :return: Violation (if any) or None
+    """
+    event = slot.event
+    if slot.ak.reso and event.reso_deadline and slot.start and slot.end > event.reso_deadline:
+        return _temporary_violation(ConstraintViolation.ViolationType.AK_AFTER_RESODEADLINE,
+                                    ConstraintViolation.ViolationLevel.VIOLATION, event, [slot.ak], [slot])
+    return None
+
+
+def check_owner_collisions_for_slot(slot: AKSlot, owner, overlapping_slots: Iterable[AKSlot]) \
+        -> list[ConstraintViolation]:
+    """
+    Check for slots of other AKs of an owner of the slot's AK that are scheduled at the same time
+
+    :param slot: slot to check
+    :param owner: owner of the AK of the slot
+    :type owner: AKOwner
+    :param overlapping_slots: other slots of AKs of this owner overlapping the slot
+    :return: list of violations
+    """
+    return [_temporary_violation(ConstraintViolation.ViolationType.OWNER_TWO_SLOTS,
+                                 ConstraintViolation.ViolationLevel.VIOLATION, slot.event,
+                                 [slot.ak, other_slot.ak], [slot, other_slot], ak_owner=owner)
+            for other_slot in overlapping_slots if other_slot.ak_id != slot.ak_id]
+
+
+def check_room_collisions_for_slot(slot: AKSlot, overlapping_slots: Iterable[AKSlot]) -> list[ConstraintViolation]:
+    """
+    Check for other slots scheduled in the same room at the same time (warning)
+
+    :param slot: slot to check
+    :param overlapping_slots: other slots in the room of the slot overlapping the slot
+    :return: list of violations
+    """
+    return [_temporary_violation(ConstraintViolation.ViolationType.ROOM_TWO_SLOTS,
+                                 ConstraintViolation.ViolationLevel.WARNING, slot.event,
+                                 [slot.ak, other_slot.ak], [slot, other_slot], room=slot.room)
+            for other_slot in overlapping_slots]
+
+
+def check_ak_collisions_for_slot(slot: AKSlot, overlapping_slots: Iterable[AKSlot]) -> list[ConstraintViolation]:
+    """
+    Check for other slots of the same AK scheduled at the same time (warning)
+
+    :param slot: slot to check
+    :param overlapping_slots: other slots of the AK of the slot overlapping the slot
+    :return: list of violations
+    """
+    return [_temporary_violation(ConstraintViolation.ViolationType.AK_SLOT_COLLISION,
+                                 ConstraintViolation.ViolationLevel.WARNING, slot.event,
+                                 [slot.ak], [slot, other_slot])
+            for other_slot in overlapping_slots]
+
+
+def check_availability_for_slot(slot: AKSlot, availabilities: Iterable[Availability]) -> ConstraintViolation | None:
+    """
+    Check whether a scheduled slot lies outside of the availabilities of its AK
+
+    :param slot: slot to check
+    :param availabilities: availabilities of the AK of the slot
+    :return: Violation (if any) or None
+    """
+    if any(availability.start <= slot.start and availability.end >= slot.end for availability in availabilities):
+        return None
+    return _temporary_violation(ConstraintViolation.ViolationType.SLOT_OUTSIDE_AVAIL,
+                                ConstraintViolation.ViolationLevel.VIOLATION, slot.event, [slot.ak], [slot])
+
+
+def check_requirements_for_slot(slot: AKSlot, requirements: Iterable, room_property_ids: set[int]) \
+        -> list[ConstraintViolation]:
+    """
+    Check for requirements of the slot's AK that are not fulfilled by the room of the slot
+
+    :param slot: slot to check (in a room)
+    :param requirements: requirements of the AK of the slot
+    :type requirements: Iterable[AKRequirement]
+    :param room_property_ids: primary keys of the properties of the room of the slot
+    :return: list of violations
+    """
+    return [_temporary_violation(ConstraintViolation.ViolationType.REQUIRE_NOT_GIVEN,
+                                 ConstraintViolation.ViolationLevel.VIOLATION, slot.event, [slot.ak], [slot],
+                                 requirement=requirement, room=slot.room)
+            for requirement in requirements if requirement.pk not in room_property_ids]
+
+
+def check_conflicts_for_slot(slot: AKSlot, overlapping_slots: Iterable[AKSlot]) -> list[ConstraintViolation]:
+    """
+    Check for slots of conflicting AKs scheduled at the same time
+
+    :param slot: slot to check
+    :param overlapping_slots: slots of AKs conflicting with the AK of the slot overlapping the slot
+    :return: list of violations
+    """
+    return [_temporary_violation(ConstraintViolation.ViolationType.AK_CONFLICT_COLLISION,
+                                 ConstraintViolation.ViolationLevel.VIOLATION, slot.event,
+                                 [slot.ak], [slot, other_slot])
+            for other_slot in overlapping_slots]
+
+
+def check_prerequisites_for_slot(slot: AKSlot, prerequisite_slots: Iterable[AKSlot]) -> list[ConstraintViolation]:
+    """
+    Check for slots of prerequisites of the slot's AK that do not end before the slot starts
+
+    :param slot: slot to check
+    :param prerequisite_slots: scheduled slots of the prerequisites of the AK of the slot
+    :return: list of violations
+    """
+    return [_temporary_violation(ConstraintViolation.ViolationType.AK_BEFORE_PREREQUISITE,
+                                 ConstraintViolation.ViolationLevel.VIOLATION, slot.event,
+                                 [slot.ak, other_slot.ak], [slot, other_slot])
+            for other_slot in prerequisite_slots if other_slot.end > slot.start]
+
+
+class ScheduledSlotIndex:
+    """
+    In-memory index of the scheduled slots of an event to find overlapping slots by room, owner or AK
+
+    Uses one :class:`AKModel.availability.intervals.OverlapIndex` per room, owner and AK, hence the slots overlapping
+    a given slot are found in O(log n + k) time for k candidates. The slots of a room, owner or AK are loaded on first
+    use, such that checking a single slot does not load the whole event. Within a run of the constraint checks,
+    the index is shared by all checks (cf. :meth:`for_event`), hence each room, owner and AK is loaded at most once.
+
+    :param event: event to index
+    """
+
+    def __init__(self, event: Event):
+        self.event = event
+        self._rooms: dict[int, OverlapIndex] = {}
+        self._owners: dict[int, OverlapIndex] = {}
+        self._aks: dict[int, OverlapIndex] = {}
+
+    @classmethod
+    def for_event(cls, event: Event) -> 'ScheduledSlotIndex':
+        """
+        Get the index over the scheduled slots of an event, shared by all checks of the current run of checks
+
+        :param event: event to index
+        :return: index over the scheduled slots of the event
+        :rtype: ScheduledSlotIndex
+        """
+        return cached_for_run(("scheduled_slot_index", event.pk), lambda: cls(event))
+
+    def _scheduled_slots(self) -> QuerySet:
+        return AKSlot.objects.filter(event=self.event, start__isnull=False).select_related("ak")
+
+    @staticmethod
+    def _create_index(slots: Iterable[AKSlot]) -> OverlapIndex:
+        return OverlapIndex((slot.start, slot.end, slot) for slot in slots)
+
+    def load_aks(self, ak_ids: Iterable[int]):
+        """
+        Load the slots of several AKs with a single query (AKs already loaded are skipped)
+
+        :param ak_ids: primary keys of the AKs
+        """
+        missing_ak_ids = set(ak_ids) - self._aks.keys()
+        if missing_ak_ids:
+            slots_per_ak = defaultdict(list)
+            for slot in self._scheduled_slots().filter(ak_id__in=missing_ak_ids):
+                slots_per_ak[slot.ak_id].append(slot)
+            for ak_id in missing_ak_ids:
+                self._aks[ak_id] = self._create_index(slots_per_ak[ak_id])
+
+    def _room_index(self, room_id: int) -> OverlapIndex:
+        if room_id not in self._rooms:
+            self._rooms[room_id] = self._create_index(self._scheduled_slots().filter(room_id=room_id))
+        return self._rooms[room_id]
+
+    def _owner_index(self, owner_id: int) -> OverlapIndex:
+        if owner_id not in self._owners:
+            self._owners[owner_id] = self._create_index(self._scheduled_slots().filter(ak__owners=owner_id))
+        return self._owners[owner_id]
+
+    def _ak_index(self, ak_id: int) -> OverlapIndex:
+        self.load_aks([ak_id])
+        return self._aks[ak_id]
+
+    @staticmethod
+    def _overlapping(index: OverlapIndex, slot: AKSlot) -> list[AKSlot]:
+        return [other_slot for other_slot in index.overlapping(slot.start, slot.end)
+                if other_slot.pk != slot.pk and _slots_overlap(slot, other_slot)]
+
+    def overlapping_in_room(self, room_id: int, slot: AKSlot) -> list[AKSlot]:
+        """
+        Find the other scheduled slots in the given room overlapping the given (scheduled) slot
+        """
+        return self._overlapping(self._room_index(room_id), slot)
+
+    def overlapping_of_owner(self, owner_id: int, slot: AKSlot) -> list[AKSlot]:
+        """
+        Find the other scheduled slots of AKs of the given owner overlapping the given (scheduled) slot
+        """
+        return self._overlapping(self._owner_index(owner_id), slot)
+
+    def overlapping_of_ak(self, ak_id: int, slot: AKSlot) -> list[AKSlot]:
+        """
+        Find the other scheduled slots of the given AK overlapping the given (scheduled) slot
+        """
+        return self._overlapping(self._ak_index(ak_id), slot)
+
+    def slots_of_ak(self, ak_id: int) -> list[AKSlot]:
+        """
+        Get all scheduled slots of the given AK (sorted by start)
+        """
+        return list(self._ak_index(ak_id).items)
+
+
+def update_constraint_violations_for_event(event: Event):
+    """
+    Recompute the slot-related constraint violations of a whole event at once
+
+    This covers the same checks as :func:`AKScheduling.models.check_akslot` does for a single slot, but loads all
+    required data with a fixed number of queries, hence it can be used after changing many slots at once without
+    triggering the signal receivers (e.g., by `bulk_update` when importing a schedule). Violations of all other types
+    are not touched.
+
+    :param event: event to update the violations for
+    :type event: Event
+    """
+    # pylint: disable=too-many-locals,too-many-branches
+    types = ConstraintViolation.ViolationType
+
+    slots = list(AKSlot.objects.filter(event=event).select_related("ak", "room", "event"))
+    scheduled_slots = [slot for slot in slots if slot.start is not None]
+    scheduled_slots_per_ak = defaultdict(list)
+    for slot in scheduled_slots:
+        scheduled_slots_per_ak[slot.ak_id].append(slot)
+
+    owners_per_ak = defaultdict(list)
+    for relation in AK.owners.through.objects.filter(ak__event=event).select_related("akowner"):
+        owners_per_ak[relation.ak_id].append(relation.akowner)
+    requirements_per_ak = defaultdict(list)
+    for relation in AK.requirements.through.objects.filter(ak__event=event).select_related("akrequirement"):
+        requirements_per_ak[relation.ak_id].append(relation.akrequirement)
+    conflicts_per_ak = defaultdict(set)
+    for from_ak_id, to_ak_id in AK.conflicts.through.objects.filter(from_ak__event=event) \
+            .values_list("from_ak_id", "to_ak_id"):
+        conflicts_per_ak[from_ak_id].add(to_ak_id)
+    prerequisites_per_ak = defaultdict(set)
+    for from_ak_id, to_ak_id in AK.prerequisites.through.objects.filter(from_ak__event=event) \
+            .values_list("from_ak_id", "to_ak_id"):
+        prerequisites_per_ak[from_ak_id].add(to_ak_id)
+    properties_per_room = defaultdict(set)
+    for room_id, requirement_id in Room.properties.through.objects.filter(room__event=event) \
+            .values_list("room_id", "akrequirement_id"):
+        properties_per_room[room_id].add(requirement_id)
+    availabilities_per_ak = defaultdict(list)
+    for availability in Availability.objects.filter(ak__event=event):
+        availabilities_per_ak[availability.ak_id].append(availability)
+
+    new_violations = defaultdict(list)
+
+    # == Check for two parallel slots by one of the owners ==
+    slots_per_owner = defaultdict(list)
+    owners = {}
+    for slot in scheduled_slots:
+        for owner in owners_per_ak[slot.ak_id]:
+            slots_per_owner[owner.pk].append(slot)
+            owners[owner.pk] = owner
+    for owner_pk, slots_of_owner in slots_per_owner.items():
+        for slot, other_slot in _overlapping_pairs(slots_of_owner):
+            new_violations[types.OWNER_TWO_SLOTS].extend(
+                    check_owner_collisions_for_slot(slot, owners[owner_pk], [other_slot]))
+
+    # == Check for two aks in the same room at the same time ==
+    slots_per_room = defaultdict(list)
+    for slot in scheduled_slots:
+        if slot.room_id is not None:
+            slots_per_room[slot.room_id].append(slot)
+    for slots_in_room in slots_per_room.values():
+        for slot, other_slot in _overlapping_pairs(slots_in_room):
+            new_violations[types.ROOM_TWO_SLOTS].extend(check_room_collisions_for_slot(slot, [other_slot]))
+
+    for slot in scheduled_slots:
+        # == Check for reso ak after reso deadline ==
+        cv = check_reso_deadline_for_slot(slot)
+        if cv is not None:
+            new_violations[types.AK_AFTER_RESODEADLINE].append(cv)
+
+        # == Check for slot outside availability ==
+        cv = check_availability_for_slot(slot, availabilities_per_ak[slot.ak_id])
+        if cv is not None:
+            new_violations[types.SLOT_OUTSIDE_AVAIL].append(cv)
+
+        # == check for simultaneous slots of conflicting AKs ==
+        for ak_id in conflicts_per_ak[slot.ak_id] - {slot.ak_id}:
+            new_violations[types.AK_CONFLICT_COLLISION].extend(check_conflicts_for_slot(
+                    slot, [other_slot for other_slot in scheduled_slots_per_ak[ak_id]
+                           if _slots_overlap(slot, other_slot)]))
+
+        # == check for missing prerequisites ==
+        for ak_id in prerequisites_per_ak[slot.ak_id] - {slot.ak_id}:
+            new_violations[types.AK_BEFORE_PREREQUISITE].extend(
+                    check_prerequisites_for_slot(slot, scheduled_slots_per_ak[ak_id]))
+
+    # == Check for two slots of the same AK at the same time (warning) ==
+    for slots_of_ak in scheduled_slots_per_ak.values():
+        for slot, other_slot in _overlapping_pairs(slots_of_ak):
+            new_violations[types.AK_SLOT_COLLISION].extend(check_ak_collisions_for_slot(slot, [other_slot]))
+
+    for slot in slots:
+        if slot.room is None:
+            continue
+
+        # == Check for requirement not fulfilled by room ==
+        new_violations[types.REQUIRE_NOT_GIVEN].extend(check_requirements_for_slot(
+                slot, requirements_per_ak[slot.ak_id], properties_per_room[slot.room_id]))
+
+        # == Check for room capacity ==
+        cv = check_capacity_for_slot(slot)
+        if cv is not None:
+            new_violations[types.ROOM_CAPACITY_EXCEEDED].append(cv)
+
+    # Compare to/update the existing violations of the checked types of the whole event
+    for violation_type in [types.OWNER_TWO_SLOTS, types.ROOM_TWO_SLOTS, types.AK_AFTER_RESODEADLINE,
+                           types.SLOT_OUTSIDE_AVAIL, types.AK_CONFLICT_COLLISION, types.AK_BEFORE_PREREQUISITE,
+                           types.AK_SLOT_COLLISION, types.REQUIRE_NOT_GIVEN, types.ROOM_CAPACITY_EXCEEDED]:
+        existing_violations_to_check = event.constraintviolation_set.filter(type=violation_type)
+        update_constraint_violations(new_violations[violation_type], existing_violations_to_check)
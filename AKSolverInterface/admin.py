@@ -0,0 +1,23 @@
+from django.contrib import admin
+
+from AKSolverInterface.models import SolverJob
+
+
+@admin.register(SolverJob)
+class SolverJobAdmin(admin.ModelAdmin):
+    """
+    Admin interface for SolverJob
+
+    Jobs are created and run from the solver view of an event (cf. :class:`AKSolverInterface.views.SolverJobsView`),
+    hence they can only be inspected and deleted here.
+    """
+    model = SolverJob
+    list_display = ['solver', 'event', 'status', 'created', 'export_duration', 'solve_duration', 'import_duration']
+    list_filter = ['event', 'solver', 'status']
+    ordering = ['-created']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -1,4 +1,5 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class AksolverinterfaceConfig(AppConfig):
@@ -7,3 +8,10 @@ class AksolverinterfaceConfig(AppConfig):
     """
 
     name = "AKSolverInterface"
+
+    def ready(self):
+        # pylint: disable=import-outside-toplevel
+        from AKSolverInterface.utils import preload_schema_validators
+
+        if settings.PRELOAD_SCHEMA_VALIDATORS:
+            preload_schema_validators()
@@ -0,0 +1,101 @@
+"""
+Dummy solver to test running solvers locally (cf. :mod:`AKSolverInterface.jobs`)
+
+Reads the solver input from the first file and writes a (not optimized) schedule to the second file.
+Every AK is placed at the first consecutive timeslots of a block and the first room that fulfill its constraints
+and where the room is still free. Participants are not assigned. The script does not depend on Django,
+hence it can be run like any other solver executable::
+
+    python dummy_solver.py input.json output.json [--sleep SECONDS] [--exit-code CODE]
+"""
+import argparse
+import json
+import sys
+import time
+
+
+def _fulfills(required: list[str], fulfilled: list[str]) -> bool:
+    return set(required).issubset(fulfilled)
+
+
+def solve(solver_input: dict) -> list[dict]:
+    """
+    Compute a schedule for the given input
+
+    :param solver_input: input in the format of the solver export
+    :return: list of scheduled AKs in the format of the solver output
+    """
+    blocks = solver_input["timeslots"]["blocks"]
+    rooms = solver_input["rooms"]
+    # timeslots already occupied per room
+    occupied = {room["id"]: set() for room in rooms}
+
+    scheduled_aks = []
+    for ak in solver_input["aks"]:
+        candidate_rooms = [
+            room for room in rooms
+            if _fulfills(ak["room_constraints"], room["fulfilled_room_constraints"])
+        ]
+        placement = None
+        for block in blocks:
+            for start in range(len(block) - ak["duration"] + 1):
+                timeslots = block[start:start + ak["duration"]]
+                if not all(_fulfills(ak["time_constraints"], timeslot["fulfilled_time_constraints"])
+                           for timeslot in timeslots):
+                    continue
+                timeslot_ids = [timeslot["id"] for timeslot in timeslots]
+                room = next(
+                    (room for room in candidate_rooms if occupied[room["id"]].isdisjoint(timeslot_ids)),
+                    None,
+                )
+                if room is not None:
+                    placement = room["id"], timeslot_ids
+                    break
+            if placement is not None:
+                break
+        if placement is None:
+            print(f"Could not place AK {ak['id']}", file=sys.stderr)
+            continue
+
+        room_id, timeslot_ids = placement
+        occupied[room_id].update(timeslot_ids)
+        scheduled_aks.append({
+            "ak_id": ak["id"],
+            "room_id": room_id,
+            "timeslot_ids": timeslot_ids,
+            "participant_ids": [],
+        })
+    return scheduled_aks
+
+
+def main(argv=None) -> int:
+    """
+    Run the dummy solver on the command line arguments
+
+    :return: exit status
+    """
+    parser = argparse.ArgumentParser(description="Dummy solver for AKPlanning")
+    parser.add_argument('input', help="JSON file with the solver input")
+    parser.add_argument('output', help="JSON file to write the solver output to")
+    parser.add_argument('--sleep', type=float, default=0.0,
+                        help="Seconds to wait before solving (to simulate long running solvers)")
+    parser.add_argument('--exit-code', type=int, default=0,
+                        help="Exit with this status without writing an output (to simulate failures)")
+    args = parser.parse_args(argv)
+
+    time.sleep(args.sleep)
+    if args.exit_code:
+        print(f"Failing with exit code {args.exit_code}", file=sys.stderr)
+        return args.exit_code
+
+    with open(args.input, encoding="utf-8") as ff:
+        solver_input = json.load(ff)
+    scheduled_aks = solve(solver_input)
+    with open(args.output, "w", encoding="utf-8") as ff:
+        json.dump({"input": solver_input, "scheduled_aks": scheduled_aks}, ff, ensure_ascii=False)
+    print(f"Scheduled {len(scheduled_aks)} of {len(solver_input['aks'])} AK(s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
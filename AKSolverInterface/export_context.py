@@ -0,0 +1,235 @@
+from collections import defaultdict
+from collections.abc import Iterable
+
+from django.apps import apps
+from django.utils.functional import cached_property
+
+from AKModel.availability.intervals import IntervalSet, to_timestamp
+from AKModel.models import AK, AKCategory, AKOwner, AKSlot, Event, Room
+
+
+def _group_pairs(pairs: Iterable[tuple]) -> dict:
+    """Group (key, value) pairs into a dict mapping each key to the list of its values (in the given order)."""
+    grouped = defaultdict(list)
+    for key, value in pairs:
+        grouped[key].append(value)
+    return grouped
+
+
+class ExportContext:
+    """Data of an event needed for the export to a solver, loaded with a fixed number of queries.
+
+    The serializers of the export read the related data of slots, AKs, rooms and participants from this context
+    instead of querying it per exported object. Each kind of data is loaded with a single query for the whole event
+    when it is first needed, hence the number of queries of an export does not depend on the size of the event.
+
+    The constraint labels are constructed in the same way as by the corresponding model methods
+    (e.g., `AKSlot.get_time_constraints`), which serve as a reference implementation.
+    """
+
+    def __init__(self, event: Event):
+        self.event = event
+        self._event_start = to_timestamp(event.start)
+        self._event_end = to_timestamp(event.end)
+
+    def _covers_event(self, interval_set: IntervalSet) -> bool:
+        """Check whether the intervals cover the whole event (cf. `Availability.is_event_covered`)."""
+        return interval_set.contains(self._event_start, self._event_end)
+
+    # Availabilities
+
+    @cached_property
+    def availabilities(self) -> dict[str, dict[int, IntervalSet]]:
+        """Availabilities of all AKs, persons, rooms and participants of the event.
+
+        :return: dict mapping the kind of entity ('ak', 'person', 'room', 'participant')
+            to a dict mapping the primary key of each entity to the interval set of its availabilities.
+            Entities without availabilities are missing.
+        """
+        # local import to prevent cyclic import
+        # pylint: disable=import-outside-toplevel
+        from AKModel.availability.models import Availability
+
+        availabilities = {
+            "ak": IntervalSet.group_by(Availability.objects.filter(ak__event=self.event), "ak_id"),
+            "person": IntervalSet.group_by(Availability.objects.filter(person__event=self.event), "person_id"),
+            "room": IntervalSet.group_by(Availability.objects.filter(room__event=self.event), "room_id"),
+        }
+        if apps.is_installed("AKPreference"):
+            availabilities["participant"] = IntervalSet.group_by(
+                    Availability.objects.filter(participant__event=self.event), "participant_id"
+            )
+        return availabilities
+
+    # AKs
+
+    @cached_property
+    def _aks(self) -> dict[int, AK]:
+        return {ak.pk: ak for ak in AK.objects.filter(event=self.event).select_related("category")}
+
+    @cached_property
+    def _ak_owners(self) -> dict[int, list[AKOwner]]:
+        through = AK.owners.through.objects.filter(ak__event=self.event)
+        return _group_pairs(
+                (relation.ak_id, relation.akowner)
+                for relation in through.select_related("akowner").order_by("akowner__name", "akowner_id")
+        )
+
+    @cached_property
+    def _ak_requirement_names(self) -> dict[int, list[str]]:
+        through = AK.requirements.through.objects.filter(ak__event=self.event)
+        return _group_pairs(through.order_by("ak_id", "akrequirement_id").values_list("ak_id", "akrequirement__name"))
+
+    @cached_property
+    def _ak_type_names(self) -> dict[int, list[str]]:
+        through = AK.types.through.objects.filter(ak__event=self.event)
+        return _group_pairs(through.order_by("ak_id", "aktype_id").values_list("ak_id", "aktype__name"))
+
+    @cached_property
+    def _ak_conflicts(self) -> dict[int, list[int]]:
+        through = AK.conflicts.through.objects.filter(from_ak__event=self.event)
+        return _group_pairs(through.values_list("from_ak_id", "to_ak_id"))
+
+    @cached_property
+    def _ak_prerequisites(self) -> dict[int, list[int]]:
+        through = AK.prerequisites.through.objects.filter(from_ak__event=self.event)
+        return _group_pairs(through.values_list("from_ak_id", "to_ak_id"))
+
+    @cached_property
+    def _ak_slot_pks(self) -> dict[int, list[int]]:
+        return _group_pairs(AKSlot.objects.filter(ak__event=self.event).order_by().values_list("ak_id", "pk"))
+
+    @cached_property
+    def fixed_slots(self) -> list[AKSlot]:
+        """All fixed and scheduled AKSlots of the event."""
+        return list(AKSlot.objects.filter(event=self.event, fixed=True).exclude(start__isnull=True))
+
+    def ak_owners(self, ak_id: int) -> list[AKOwner]:
+        """Owners of the AK, ordered like `AK.owners.all()`."""
+        return self._ak_owners.get(ak_id, [])
+
+    # AK slots
+
+    def slot_type_names(self, slot: AKSlot) -> list[str]:
+        """Names of all types of the slot's AK (cf. `AKSlot.type_names`)."""
+        return self._ak_type_names.get(slot.ak_id, [])
+
+    def slot_conflict_pks(self, slot: AKSlot) -> list[int]:
+        """Sorted PKs of all AKSlots in conflict to the slot (cf. `AKSlot.conflict_pks`)."""
+        conflict_pks = {
+            pk for ak_id in self._ak_conflicts.get(slot.ak_id, []) for pk in self._ak_slot_pks.get(ak_id, [])
+        }
+        conflict_pks.update(pk for pk in self._ak_slot_pks.get(slot.ak_id, []) if pk != slot.pk)
+        return sorted(conflict_pks)
+
+    def slot_dependency_pks(self, slot: AKSlot) -> list[int]:
+        """Sorted PKs of all AKSlots the slot depends on (cf. `AKSlot.depencency_pks`)."""
+        prerequisite_ak_ids = set(self._ak_prerequisites.get(slot.ak_id, []))
+        return sorted(pk for ak_id in prerequisite_ak_ids for pk in self._ak_slot_pks.get(ak_id, []))
+
+    def slot_room_constraints(self, slot: AKSlot, export_scheduled_aks_as_fixed: bool = False) -> list[str]:
+        """Required room constraint labels of the slot (cf. `AKSlot.get_room_constraints`)."""
+        room_constraints = list(self._ak_requirement_names.get(slot.ak_id, []))
+        if (export_scheduled_aks_as_fixed or slot.fixed) and slot.room_id is not None:
+            room_constraints.append(f"fixed-room-{slot.room_id}")
+
+        if not any(constr.startswith("proxy") for constr in room_constraints):
+            room_constraints.append("no-proxy")
+
+        room_constraints.sort()
+        return room_constraints
+
+    def slot_time_constraints(self, slot: AKSlot, export_scheduled_aks_as_fixed: bool = False,
+                              aks_to_ignore_category_for: set[AK] | None = None) -> list[str]:
+        """Required time constraint labels of the slot (cf. `AKSlot.get_time_constraints`)."""
+        if aks_to_ignore_category_for is None:
+            aks_to_ignore_category_for = set()
+        ak = self._aks[slot.ak_id]
+
+        if (export_scheduled_aks_as_fixed or slot.fixed) and slot.start is not None:
+            time_constraints = [f"fixed-akslot-{slot.id}"]
+        elif not self._covers_event(self.availabilities["ak"].get(ak.pk, IntervalSet())):
+            time_constraints = [f"availability-ak-{ak.pk}"]
+        else:
+            time_constraints = []
+
+        if ak.reso:
+            time_constraints.append("resolution")
+        for owner in self.ak_owners(ak.pk):
+            owner_availabilities = self.availabilities["person"].get(owner.pk)
+            if owner_availabilities and not self._covers_event(owner_availabilities):
+                time_constraints.append(f"availability-person-{owner.pk}")
+
+        # Export category constraint (if not explicitly ignored)
+        if ak.category and ak not in aks_to_ignore_category_for:
+            time_constraints.extend(AKCategory.create_category_optimizer_constraints([ak.category]))
+
+        time_constraints.sort()
+        return time_constraints
+
+    # Rooms
+
+    @cached_property
+    def _room_property_names(self) -> dict[int, list[str]]:
+        through = Room.properties.through.objects.filter(room__event=self.event)
+        return _group_pairs(
+                through.order_by("room_id", "akrequirement_id").values_list("room_id", "akrequirement__name")
+        )
+
+    def room_time_constraints(self, room: Room) -> list[str]:
+        """Required time constraint labels of the room (cf. `Room.get_time_constraints`)."""
+        if self._covers_event(self.availabilities["room"].get(room.pk, IntervalSet())):
+            return []
+        return [f"availability-room-{room.pk}"]
+
+    def room_fulfilled_constraints(self, room: Room) -> list[str]:
+        """Fulfilled room constraint labels of the room (cf. `Room.get_fulfilled_room_constraints`)."""
+        fulfilled_room_constraints = list(self._room_property_names.get(room.pk, []))
+        fulfilled_room_constraints.append(f"fixed-room-{room.pk}")
+
+        if not any(constr.startswith("proxy") for constr in fulfilled_room_constraints):
+            fulfilled_room_constraints.append("no-proxy")
+
+        fulfilled_room_constraints.sort()
+        return fulfilled_room_constraints
+
+    # Participants
+
+    @cached_property
+    def _participant_requirement_names(self) -> dict[int, list[str]]:
+        # local import to decouple
+        # pylint: disable=import-outside-toplevel
+        from AKPreference.models import EventParticipant
+
+        through = EventParticipant.requirements.through.objects.filter(eventparticipant__event=self.event)
+        return _group_pairs(
+                through.order_by("eventparticipant_id", "akrequirement_id")
+                .values_list("eventparticipant_id", "akrequirement__name")
+        )
+
+    @cached_property
+    def _required_participant_pks(self) -> set[int]:
+        # local import to decouple
+        # pylint: disable=import-outside-toplevel
+        from AKPreference.models import AKPreference
+
+        return set(
+                AKPreference.objects.filter(event=self.event, preference=AKPreference.PreferenceLevel.REQUIRED)
+                .order_by().values_list("participant_id", flat=True)
+        )
+
+    def participant_time_constraints(self, participant) -> list[str]:
+        """Required time constraint labels of the participant (cf. `EventParticipant.get_time_constraints`)."""
+        participant_availabilities = self.availabilities["participant"].get(participant.pk)
+        if (
+                participant_availabilities
+                and not self._covers_event(participant_availabilities)
+                and participant.pk in self._required_participant_pks
+        ):
+            # participant has restricted availability and is actually required for AKs
+            return [f"availability-participant-{participant.pk}"]
+        return []
+
+    def participant_room_constraints(self, participant) -> list[str]:
+        """Required room constraint labels of the participant (cf. `EventParticipant.get_room_constraints`)."""
+        return list(self._participant_requirement_names.get(participant.pk, []))
@@ -1,13 +1,85 @@
 import json
+from collections.abc import Generator, Iterable
+from typing import Any
 
 from django import forms
+from django.conf import settings
 from django.core.exceptions import ValidationError
+from django.db.models import Q, QuerySet
 from django.utils.translation import gettext_lazy as _
 from jsonschema.exceptions import best_match
 
 from AKModel.forms import AdminIntermediateForm
 from AKModel.models import AKCategory, AKTrack, AKType, Event
-from AKSolverInterface.utils import construct_schema_validator
+from AKSolverInterface.utils import IncrementalJSONReader, construct_schema_validator, iter_json_object
+
+
+def serialize_export_options(cleaned_data: dict) -> dict:
+    """
+    Convert the cleaned data of a `JSONExportControlForm` into a JSON serializable dict
+
+    Selected objects are represented by their sorted primary keys.
+
+    :param cleaned_data: cleaned data of a `JSONExportControlForm`
+    :return: export options
+    """
+    options = {}
+    for key, value in cleaned_data.items():
+        if isinstance(value, QuerySet):
+            value = sorted(value.values_list("pk", flat=True))
+        elif isinstance(value, (list, tuple)):
+            value = sorted(str(v) for v in value)
+        options[key] = value
+    return options
+
+
+def filter_exported_slots(queryset: QuerySet, export_options: dict) -> QuerySet:
+    """
+    Restrict the slots to export to the tracks, categories and types selected in the export options
+
+    :param queryset: slots to filter
+    :param export_options: cleaned data of a `JSONExportControlForm` or export options
+        (cf. `serialize_export_options`), objects not mentioned are not filtered
+    :return: filtered slots
+    """
+    queryset = queryset.prefetch_related("ak")
+    if "export_tracks" in export_options:
+        queryset = queryset.filter(
+                Q(ak__track__in=export_options["export_tracks"])
+                | Q(ak__track__isnull=True)
+        )
+    if "export_categories" in export_options:
+        queryset = queryset.filter(
+                Q(ak__category__in=export_options["export_categories"])
+                | Q(ak__category__isnull=True)
+        )
+    if "export_types" in export_options:
+        queryset = queryset.filter(
+                Q(ak__types__in=export_options["export_types"])
+                | Q(ak__types__isnull=True)
+        )
+    return queryset.distinct().all()
+
+
+def export_serializer_kwargs(event: Event, export_options: dict) -> dict:
+    """
+    Get the arguments of :class:`AKSolverInterface.serializers.ExportEventSerializer` for the given export options
+
+    Used to repeat an export with the options embedded in it (cf. :meth:`AKModel.models.Event.schedule_from_json`).
+
+    :param event: event to export
+    :param export_options: export options (cf. `serialize_export_options`)
+    :return: keyword arguments of the serializer
+    """
+    return {
+        "filter_slots_cb": lambda queryset: filter_exported_slots(queryset, export_options),
+        "export_scheduled_aks_as_fixed": export_options.get("export_scheduled_aks_as_fixed", False),
+        "export_preferences": export_options.get("export_preferences", True),
+        "aks_to_ignore_category_for": set(event.ak_set.filter(
+                pk__in=export_options.get("ignore_slot_category_mismatches", [])
+        )),
+        "export_options": export_options,
+    }
 
 
 class JSONExportControlForm(forms.Form):
@@ -94,6 +166,34 @@ class JSONExportControlForm(forms.Form):
             (ak.pk, f"{ak.name} ({ak.category})") for ak in self.event.ak_set.select_related('category').all()
         ]
 
+    def filter_exported_slots(self, queryset: QuerySet) -> QuerySet:
+        """
+        Restrict the slots to export to the tracks, categories and types selected in this (valid) form
+
+        :param queryset: slots to filter
+        :return: filtered slots
+        """
+        return filter_exported_slots(queryset, self.cleaned_data)
+
+
+class SolverJobForm(JSONExportControlForm):
+    """Form to export an event and run local solvers on the export (cf. :mod:`AKSolverInterface.jobs`)."""
+
+    solvers = forms.MultipleChoiceField(
+            choices=[],
+            widget=forms.CheckboxSelectMultiple,
+            label=_("Solvers to run"),
+            help_text=_("A separate job is started for every selected solver, the jobs run in parallel."),
+    )
+
+    field_order = ["solvers", *JSONExportControlForm.field_order]
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields["solvers"].choices = [
+            (key, configuration.get("name", key)) for key, configuration in settings.SOLVER_CONFIGURATIONS.items()
+        ]
+
 
 class JSONScheduleImportForm(AdminIntermediateForm):
     """Form to import an AK schedule from a json file."""
@@ -117,6 +217,26 @@ class JSONScheduleImportForm(AdminIntermediateForm):
                 schema="solver-output.schema.json"
         )
 
+    @staticmethod
+    def _format_error(msg: str, error_path: str) -> ValidationError:
+        return ValidationError(
+                _("Invalid JSON format: %(msg)s at %(error_path)s"),
+                "invalid",
+                params={"msg": msg, "error_path": error_path},
+        )
+
+    def _check_json_part(self, validator, instance, path: str = "$"):
+        """Validate (a part of) the JSON data using the given validator.
+
+        :param validator: The validator of the (sub-)schema.
+        :param instance: The decoded JSON data to validate.
+        :param path: JSON path of the validated part in the whole document, used in error messages.
+        :raises ValidationError: if the validation fails, with a description of the cause.
+        """
+        error = best_match(validator.iter_errors(instance))
+        if error:
+            raise self._format_error(error.message, path + error.json_path[1:]) from error
+
     def _check_json_data(self, data: str):
         """Validate `data` against our JSON schema.
 
@@ -130,14 +250,82 @@ class JSONScheduleImportForm(AdminIntermediateForm):
         except json.JSONDecodeError as ex:
             raise ValidationError(_("Cannot decode as JSON"), "invalid") from ex
 
-        error = best_match(self.json_schema_validator.iter_errors(schedule))
-        if error:
-            raise ValidationError(
-                    _("Invalid JSON format: %(msg)s at %(error_path)s"),
-                    "invalid",
-                    params={"msg": error.message, "error_path": error.json_path},
-            ) from error
+        self._check_json_part(self.json_schema_validator, schedule)
+        return schedule
+
+    def _check_schedule_member(self, key: str, value):
+        """Validate a member of the schedule against the corresponding part of our JSON schema.
+
+        :raises ValidationError: if the validation fails, with a description of the cause.
+        """
+        if key not in ["input", "scheduled_aks"]:
+            raise self._format_error(f"Additional properties are not allowed ({key!r} was unexpected)", "$")
+        self._check_json_part(
+                construct_schema_validator(f"solver-output.schema.json#/properties/{key}"), value, f"$.{key}"
+        )
+
+    def _iter_checked_scheduled_aks(self, scheduled_aks: Iterable) -> Generator[dict, None, None]:
+        """Validate the scheduled AKs one after the other while iterating them.
+
+        :raises ValidationError: if the validation of a scheduled AK fails, with a description of the cause.
+        """
+        validator = construct_schema_validator("solver-output.schema.json#/properties/scheduled_aks/items")
+        seen = set()
+        for idx, scheduled_ak in enumerate(scheduled_aks):
+            error_path = f"$.scheduled_aks[{idx}]"
+            self._check_json_part(validator, scheduled_ak, error_path)
+            # the scheduled AKs are small, hence keep a canonical representation to check their uniqueness
+            canonical = json.dumps(scheduled_ak, sort_keys=True)
+            if canonical in seen:
+                raise self._format_error(f"{scheduled_ak!r} is not unique", error_path)
+            seen.add(canonical)
+            yield scheduled_ak
+
+    def _iter_streamed_scheduled_aks(self, scheduled_aks: Iterable,
+                                     remaining_members: Iterable[tuple[str, Any]]) -> Generator[dict, None, None]:
+        """Validate the streamed scheduled AKs and the rest of the document while iterating them.
+
+        :raises ValidationError: if parsing or validating the data fails, with a description of the cause.
+        """
+        try:
+            yield from self._iter_checked_scheduled_aks(scheduled_aks)
+            for key, value in remaining_members:
+                self._check_schedule_member(key, value)
+        except json.JSONDecodeError as ex:
+            raise ValidationError(_("Cannot decode as JSON"), "invalid") from ex
+
+    def _stream_json_file(self, json_file) -> dict:
+        """Parse and validate an uploaded JSON file incrementally.
+
+        The solver input is parsed and validated as a whole, but the scheduled AKs are only parsed and validated
+        one after the other when the returned scheduled AKs are iterated (i.e., when the schedule is applied).
+        Hence, large files are not read into memory at once. Only if the scheduled AKs precede the solver input
+        in the file, they are collected before.
+
+        :param json_file: The uploaded file.
+        :raises ValidationError: if parsing or validating the data up to the scheduled AKs fails.
+            Later errors are raised when iterating the scheduled AKs.
+        :return: The schedule with the parsed solver input and an iterable of the scheduled AKs.
+        """
+        members = iter_json_object(IncrementalJSONReader(json_file), streamed_keys={"scheduled_aks"})
+        schedule = {}
+        try:
+            for key, value in members:
+                if key == "scheduled_aks" and isinstance(value, Generator):
+                    if "input" in schedule:
+                        schedule[key] = self._iter_streamed_scheduled_aks(value, members)
+                        return schedule
+                    # the solver input is needed before applying the schedule, hence collect the scheduled AKs
+                    schedule[key] = list(self._iter_checked_scheduled_aks(value))
+                else:
+                    self._check_schedule_member(key, value)
+                    schedule[key] = value
+        except json.JSONDecodeError as ex:
+            raise ValidationError(_("Cannot decode as JSON"), "invalid") from ex
 
+        for key in ["input", "scheduled_aks"]:
+            if key not in schedule:
+                raise self._format_error(f"{key!r} is a required property", "$")
         return schedule
 
     def clean(self):
@@ -149,6 +337,7 @@ class JSONScheduleImportForm(AdminIntermediateForm):
 
         This function checks that data is entered from exactly one source.
         If so, the entered JSON string is validated against our schema.
+        Uploaded files are parsed and validated incrementally (cf. `_stream_json_file`).
         Any errors are reported at the corresponding form field.
         """
         cleaned_data = super().clean()
@@ -168,12 +357,13 @@ class JSONScheduleImportForm(AdminIntermediateForm):
         else:
             source_field = "json_data"
             data = cleaned_data.get(source_field)
-            if not data:
-                source_field = "json_file"
-                with cleaned_data.get(source_field).open() as ff:
-                    data = ff.read()
             try:
-                cleaned_data["data"] = self._check_json_data(data)
+                if data:
+                    cleaned_data["data"] = self._check_json_data(data)
+                else:
+                    # uploaded files are parsed incrementally, hence the file remains open until the end of the request
+                    source_field = "json_file"
+                    cleaned_data["data"] = self._stream_json_file(cleaned_data.get(source_field).open())
             except ValidationError as ex:
                 self.add_error(source_field, ex)
         return cleaned_data
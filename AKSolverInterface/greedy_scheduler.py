@@ -0,0 +1,261 @@
+"""
+Greedy heuristic scheduler to compute draft schedules without the external optimizer
+
+Works on the same data as the solver (cf. :class:`AKSolverInterface.serializers.ExportEventSerializer`) and produces
+its output format, hence the result can be imported with :meth:`AKModel.models.Event.schedule_from_json`.
+
+The AKs are placed one after another, most constrained AKs first: Fixed AKs, then AKs with the fewest possible
+placements, longer AKs and AKs with more required participants. Apart from fixed AKs, an AK is only placed after
+all of its prerequisites. Every AK is put at the earliest timeslots and the
+least special room that satisfy all hard constraints:
+
+* time constraints of the AK, its room and its required participants (including the owners) are fulfilled,
+* room constraints of the AK and its required participants are fulfilled by the room,
+* the room and the required participants are not occupied by another AK at the same time,
+* conflicting AKs do not overlap and prerequisites take place before the AK.
+
+Preferences of participants that are not required are not optimized. AKs that cannot be placed remain unscheduled.
+
+The module does not depend on Django, hence it can also be run as a solver executable
+(cf. ``settings.SOLVER_CONFIGURATIONS``)::
+
+    python greedy_scheduler.py input.json output.json
+"""
+import argparse
+import heapq
+import json
+import sys
+from collections import defaultdict
+
+
+class GreedyScheduler:
+    """
+    Greedy heuristic scheduler for the solver input of an event
+
+    :param solver_input: input in the format of the solver export
+    """
+
+    def __init__(self, solver_input: dict):
+        self.solver_input = solver_input
+
+        # timeslots are identified by their position in chronological order
+        self.timeslot_ids = []
+        self._timeslot_constraints = []
+        self._blocks = []
+        for block in solver_input["timeslots"]["blocks"]:
+            first_position = len(self.timeslot_ids)
+            for timeslot in block:
+                self.timeslot_ids.append(timeslot["id"])
+                self._timeslot_constraints.append(frozenset(timeslot["fulfilled_time_constraints"]))
+            self._blocks.append(range(first_position, len(self.timeslot_ids)))
+
+        self.rooms = {room["id"]: room for room in solver_input["rooms"]}
+        self.aks = {ak["id"]: ak for ak in solver_input["aks"]}
+
+        self._required_participants = defaultdict(list)
+        for participant in solver_input["participants"]:
+            for preference in participant["preferences"]:
+                if preference["required"]:
+                    self._required_participants[preference["ak_id"]].append(participant)
+
+        # conflicts are symmetric, prerequisites have to take place before their dependent AKs
+        self._conflicts = defaultdict(set)
+        self._dependencies = defaultdict(set)
+        self._dependents = defaultdict(set)
+        for ak in self.aks.values():
+            for other_id in ak["properties"]["conflicts"]:
+                self._conflicts[ak["id"]].add(other_id)
+                self._conflicts[other_id].add(ak["id"])
+            for other_id in ak["properties"]["dependencies"]:
+                self._dependencies[ak["id"]].add(other_id)
+                self._dependents[other_id].add(ak["id"])
+
+        # cache of the possible start positions per set of required time constraints and duration
+        self._start_cache = {}
+
+        # state of the schedule
+        self.placements = {}
+        self.unscheduled = []
+        self._room_occupation = defaultdict(set)
+        self._participant_occupation = defaultdict(set)
+
+    def _possible_starts(self, time_constraints: frozenset, duration: int) -> list[int]:
+        """
+        Positions at which `duration` consecutive timeslots of a block fulfill all given time constraints
+
+        :param time_constraints: required time constraints
+        :param duration: number of timeslots
+        :return: sorted start positions
+        """
+        key = (time_constraints, duration)
+        if key not in self._start_cache:
+            starts = []
+            for block in self._blocks:
+                # length of the run of timeslots fulfilling the constraints up to the current position
+                run_length = 0
+                for position in block:
+                    if time_constraints <= self._timeslot_constraints[position]:
+                        run_length += 1
+                        if run_length >= duration:
+                            starts.append(position - duration + 1)
+                    else:
+                        run_length = 0
+            self._start_cache[key] = starts
+        return self._start_cache[key]
+
+    def _options(self, ak: dict) -> list[tuple[dict, list[int]]]:
+        """
+        Rooms suitable for the AK with the start positions possible in each of them (ignoring other AKs)
+
+        Rooms fulfilling fewer room constraints come first to keep special rooms for AKs requiring them.
+
+        :param ak: AK of the solver input
+        :return: list of rooms and their possible start positions
+        """
+        participants = self._required_participants[ak["id"]]
+        time_constraints = set(ak["time_constraints"])
+        room_constraints = set(ak["room_constraints"])
+        for participant in participants:
+            time_constraints.update(participant["time_constraints"])
+            room_constraints.update(participant["room_constraints"])
+
+        options = []
+        for room in sorted(self.rooms.values(), key=lambda room: (len(room["fulfilled_room_constraints"]), room["id"])):
+            if not room_constraints.issubset(room["fulfilled_room_constraints"]):
+                continue
+            starts = self._possible_starts(frozenset(time_constraints.union(room["time_constraints"])),
+                                           ak["duration"])
+            if starts:
+                options.append((room, starts))
+        return options
+
+    def _is_free(self, ak: dict, room: dict, positions: range) -> bool:
+        """
+        Check whether the AK can be placed at the positions and room given the AKs placed so far
+        """
+        if not self._room_occupation[room["id"]].isdisjoint(positions):
+            return False
+        for participant in self._required_participants[ak["id"]]:
+            if not self._participant_occupation[participant["id"]].isdisjoint(positions):
+                return False
+        for other_id in self._conflicts[ak["id"]]:
+            if other_id in self.placements:
+                other_positions = self.placements[other_id][1]
+                if other_positions.start < positions.stop and positions.start < other_positions.stop:
+                    return False
+        for other_id in self._dependencies[ak["id"]]:
+            if other_id in self.placements and self.placements[other_id][1].stop > positions.start:
+                return False
+        for other_id in self._dependents[ak["id"]]:
+            if other_id in self.placements and self.placements[other_id][1].start < positions.stop:
+                return False
+        return True
+
+    def _place(self, ak: dict, options: list[tuple[dict, list[int]]]) -> bool:
+        """
+        Place the AK at the earliest possible start in the first possible room
+
+        :return: whether the AK could be placed
+        """
+        starts_per_room = [(room, set(starts)) for room, starts in options]
+        for start in sorted(set().union(*(starts for _, starts in starts_per_room))):
+            positions = range(start, start + ak["duration"])
+            for room, starts in starts_per_room:
+                if start in starts and self._is_free(ak, room, positions):
+                    self.placements[ak["id"]] = (room, positions)
+                    self._room_occupation[room["id"]].update(positions)
+                    for participant in self._required_participants[ak["id"]]:
+                        self._participant_occupation[participant["id"]].update(positions)
+                    return True
+        return False
+
+    def schedule(self) -> list[dict]:
+        """
+        Compute the schedule
+
+        AKs that cannot be placed are listed in `unscheduled` afterwards.
+
+        :return: list of scheduled AKs in the format of the solver output
+        """
+        options = {ak_id: self._options(ak) for ak_id, ak in self.aks.items()}
+        fixed = {
+            ak_id for ak_id, ak in self.aks.items()
+            if any(constraint.startswith("fixed-akslot-") for constraint in ak["time_constraints"])
+        }
+        priorities = {
+            ak_id: (ak_id not in fixed, sum(len(starts) for _, starts in options[ak_id]), -ak["duration"],
+                    -len(self._required_participants[ak_id]), ak_id)
+            for ak_id, ak in self.aks.items()
+        }
+
+        # AKs are placed after their prerequisites (to have them take place earlier), fixed AKs are placed first
+        missing_dependencies = {
+            ak_id: {other_id for other_id in self._dependencies[ak_id] if other_id in self.aks and other_id != ak_id}
+            for ak_id in self.aks
+        }
+        ready = [priorities[ak_id] for ak_id in self.aks if ak_id in fixed or not missing_dependencies[ak_id]]
+        heapq.heapify(ready)
+        processed = set()
+        while len(processed) < len(self.aks):
+            if not ready:
+                # cyclic dependencies, continue with the most constrained remaining AK
+                heapq.heappush(ready, min(priorities[ak_id] for ak_id in self.aks if ak_id not in processed))
+            ak_id = heapq.heappop(ready)[-1]
+            if ak_id in processed:
+                continue
+            processed.add(ak_id)
+            if not self._place(self.aks[ak_id], options[ak_id]):
+                self.unscheduled.append(ak_id)
+            for other_id in self._dependents[ak_id]:
+                if other_id in missing_dependencies:
+                    missing_dependencies[other_id].discard(ak_id)
+                    if not missing_dependencies[other_id] and other_id not in processed:
+                        heapq.heappush(ready, priorities[other_id])
+
+        return [
+            {
+                "ak_id": ak_id,
+                "room_id": room["id"],
+                "timeslot_ids": [self.timeslot_ids[position] for position in positions],
+                "participant_ids": [participant["id"] for participant in self._required_participants[ak_id]],
+            }
+            for ak_id, (room, positions) in sorted(self.placements.items())
+        ]
+
+
+def solve(solver_input: dict) -> tuple[dict, list]:
+    """
+    Compute a draft schedule for the solver input
+
+    :param solver_input: input in the format of the solver export
+    :return: output in the format of the solver and the ids of all AKs that could not be scheduled
+    """
+    scheduler = GreedyScheduler(solver_input)
+    scheduled_aks = scheduler.schedule()
+    return {"input": solver_input, "scheduled_aks": scheduled_aks}, scheduler.unscheduled
+
+
+def main(argv=None) -> int:
+    """
+    Run the scheduler on the command line arguments
+
+    :return: exit status
+    """
+    parser = argparse.ArgumentParser(description="Greedy draft scheduler for AKPlanning")
+    parser.add_argument('input', help="JSON file with the solver input")
+    parser.add_argument('output', help="JSON file to write the solver output to")
+    args = parser.parse_args(argv)
+
+    with open(args.input, encoding="utf-8") as ff:
+        solver_input = json.load(ff)
+    output, unscheduled = solve(solver_input)
+    with open(args.output, "w", encoding="utf-8") as ff:
+        json.dump(output, ff, ensure_ascii=False)
+    print(f"Scheduled {len(output['scheduled_aks'])} of {len(solver_input['aks'])} AK(s)")
+    if unscheduled:
+        print(f"Could not place AK(s) {', '.join(map(str, unscheduled))}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
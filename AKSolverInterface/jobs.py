@@ -0,0 +1,268 @@
+"""
+Run solvers locally on the export of an event
+
+The solvers are configured in ``settings.SOLVER_CONFIGURATIONS``. For each job, the export is written to the
+job directory and the solver executable is run on it as a subprocess with the configured timeout.
+The subprocesses are started by a pool of worker threads, hence up to ``settings.SOLVER_MAX_PARALLEL_JOBS``
+solvers run in parallel (on different cores) without blocking the request handling.
+State and timings of the jobs are tracked in :class:`AKSolverInterface.models.SolverJob`.
+
+The pool lives in the web server process, hence the limit applies per process: If the web server runs
+several processes (e.g. uwsgi ``processes``), up to that number times ``settings.SOLVER_MAX_PARALLEL_JOBS``
+solvers may run at the same time. Jobs that are pending or running when their process stops are not resumed,
+they are marked as failed once they are stale (cf. :func:`fail_stale_solver_jobs`).
+"""
+import os
+import shutil
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.db import connection, transaction
+from django.db.models import Q, QuerySet
+from django.utils import timezone
+
+from AKModel.models import Event
+from AKScheduling.constraint_checks import LazyThreadPoolExecutor
+from AKSolverInterface.forms import JSONExportControlForm, JSONScheduleImportForm, serialize_export_options
+from AKSolverInterface.models import SolverJob
+from AKSolverInterface.serializers import ExportEventSerializer
+
+# Number of characters of the solver output that are stored with the job
+LOG_TAIL_LENGTH = 10000
+# Time (in seconds) a running job may exceed the timeout of its solver before it is considered stale
+STALE_JOB_GRACE_PERIOD = 60
+
+# the pool of workers running the solvers
+_solver_workers = LazyThreadPoolExecutor(
+        lambda: ThreadPoolExecutor(max_workers=settings.SOLVER_MAX_PARALLEL_JOBS, thread_name_prefix="solver-job"))
+
+
+def _read_log_tail(path: str) -> str:
+    """
+    Read the end of the output of a solver process
+
+    :param path: path of the log file
+    :return: the last `LOG_TAIL_LENGTH` characters of the log
+    """
+    try:
+        with open(path, encoding="utf-8", errors="replace") as ff:
+            return ff.read()[-LOG_TAIL_LENGTH:]
+    except OSError:
+        return ""
+
+
+def write_export(event: Event, form: JSONExportControlForm, path: str):
+    """
+    Write the solver export of an event to a file
+
+    :param event: event to export
+    :param form: valid form with the export options
+    :param path: path of the file to write the export to
+    :raises ValueError: if the event cannot be discretized into timeslots
+    """
+    # errors cannot be reported once the output started, hence the discretization is done (and cached) first
+    for _ in event.discretize_timeslots():
+        pass
+
+    serialized_event = ExportEventSerializer(
+            event,
+            filter_slots_cb=form.filter_exported_slots,
+            export_scheduled_aks_as_fixed=form.cleaned_data["export_scheduled_aks_as_fixed"],
+            export_preferences=form.cleaned_data["export_preferences"],
+            export_options=serialize_export_options(form.cleaned_data),
+            aks_to_ignore_category_for=set(event.ak_set.filter(
+                    pk__in=form.cleaned_data.get("ignore_slot_category_mismatches", [])
+            )),
+    )
+    with open(path, "w", encoding="utf-8") as ff:
+        for chunk in serialized_event.iter_json():
+            ff.write(chunk)
+
+
+def create_solver_jobs(event: Event, solvers: list[str], form: JSONExportControlForm) -> list[SolverJob]:
+    """
+    Create jobs to run the given solvers on the export of an event
+
+    The event is exported once, all jobs get a copy of the export. The jobs are not started yet
+    (cf. :func:`submit_solver_job`).
+
+    :param event: event to export
+    :param solvers: names of the solver configurations to run
+    :param form: valid form with the export options
+    :return: the created jobs
+    :raises ValueError: if a solver is not configured or the event cannot be exported
+    """
+    for solver in solvers:
+        if solver not in settings.SOLVER_CONFIGURATIONS:
+            raise ValueError(f"Solver '{solver}' is not configured")
+
+    export_options = serialize_export_options(form.cleaned_data)
+    jobs = [SolverJob.objects.create(event=event, solver=solver, export_options=export_options)
+            for solver in solvers]
+    if not jobs:
+        return jobs
+    for job in jobs:
+        os.makedirs(job.directory, exist_ok=True)
+
+    start = time.perf_counter()
+    try:
+        write_export(event, form, jobs[0].input_path)
+    except ValueError:
+        for job in jobs:
+            shutil.rmtree(job.directory, ignore_errors=True)
+            job.delete()
+        raise
+    for job in jobs[1:]:
+        shutil.copyfile(jobs[0].input_path, job.input_path)
+    export_duration = time.perf_counter() - start
+
+    for job in jobs:
+        job.export_duration = export_duration
+    SolverJob.objects.bulk_update(jobs, ["export_duration"])
+    return jobs
+
+
+def run_solver_job(job_pk: int) -> SolverJob:
+    """
+    Run the solver of a pending job on its exported input (synchronously)
+
+    The job is marked as finished if the solver exits successfully and wrote its output,
+    as timed out if it exceeded the configured timeout (the process is killed then) and as failed otherwise.
+
+    :param job_pk: primary key of the job to run
+    :return: the job after the run
+    """
+    job = SolverJob.objects.select_related("event").get(pk=job_pk)
+    if job.status != SolverJob.Status.PENDING:
+        return job
+
+    job.status = SolverJob.Status.RUNNING
+    job.started = timezone.now()
+    job.save(update_fields=["status", "started"])
+
+    error = ""
+    start = time.perf_counter()
+    try:
+        configuration = settings.SOLVER_CONFIGURATIONS[job.solver]
+        command = [str(part).format(input=job.input_path, output=job.output_path)
+                   for part in configuration["command"]]
+        with open(job.log_path, "wb") as log:
+            process = subprocess.run(command, cwd=job.directory, stdin=subprocess.DEVNULL, stdout=log,
+                                     stderr=subprocess.STDOUT, timeout=configuration.get("timeout"), check=False)
+        job.return_code = process.returncode
+        if process.returncode != 0:
+            job.status = SolverJob.Status.FAILED
+        elif not os.path.exists(job.output_path):
+            job.status = SolverJob.Status.FAILED
+            error = "Solver did not write an output"
+        else:
+            job.status = SolverJob.Status.FINISHED
+    except subprocess.TimeoutExpired:
+        job.status = SolverJob.Status.TIMEOUT
+        error = f"Solver was killed after {configuration.get('timeout')} seconds"
+    except (KeyError, OSError) as ex:
+        job.status = SolverJob.Status.FAILED
+        error = f"Solver could not be run: {ex!r}"
+
+    job.solve_duration = time.perf_counter() - start
+    job.finished = timezone.now()
+    job.log = _read_log_tail(job.log_path)
+    if error:
+        job.log = f"{job.log}\n{error}".lstrip()[-LOG_TAIL_LENGTH:]
+    job.save(update_fields=["status", "finished", "solve_duration", "return_code", "log"])
+    return job
+
+
+def _run_solver_job_in_worker(job_pk: int):
+    """
+    Run a job in a worker thread of the pool
+    """
+    try:
+        run_solver_job(job_pk)
+    finally:
+        # every worker thread uses its own database connection
+        connection.close()
+
+
+def submit_solver_job(job: SolverJob):
+    """
+    Run the job in the worker pool once the current transaction is committed
+
+    :param job: pending job to run
+    """
+    transaction.on_commit(lambda: _solver_workers.get().submit(_run_solver_job_in_worker, job.pk))
+
+
+def fail_stale_solver_jobs(jobs: QuerySet[SolverJob] | None = None) -> int:
+    """
+    Mark jobs as failed whose worker apparently stopped before finishing them
+
+    The worker pool does not survive a restart or reload of the web server process, such jobs would stay
+    pending or running forever otherwise. A running job is stale once it exceeded the timeout of its solver
+    by more than `STALE_JOB_GRACE_PERIOD` (the solver process is killed at the timeout),
+    a pending job once it was not started within ``settings.SOLVER_PENDING_TIMEOUT``.
+    Running jobs of solvers that are no longer configured are stale, too.
+
+    :param jobs: jobs to consider (all jobs if not given)
+    :return: number of jobs marked as failed
+    """
+    if jobs is None:
+        jobs = SolverJob.objects.all()
+    now = timezone.now()
+
+    stale = Q(status=SolverJob.Status.PENDING, created__lt=now - timedelta(seconds=settings.SOLVER_PENDING_TIMEOUT))
+    stale |= Q(status=SolverJob.Status.RUNNING) & ~Q(solver__in=settings.SOLVER_CONFIGURATIONS.keys())
+    for solver, configuration in settings.SOLVER_CONFIGURATIONS.items():
+        timeout = configuration.get("timeout")
+        if timeout is not None:
+            stale |= Q(status=SolverJob.Status.RUNNING, solver=solver,
+                       started__lt=now - timedelta(seconds=timeout + STALE_JOB_GRACE_PERIOD))
+
+    failed = 0
+    for job in jobs.filter(stale):
+        error = "Job was not started by a worker" if job.status == SolverJob.Status.PENDING \
+            else "Worker stopped before the job finished"
+        # only update the job if its worker did not finish it meanwhile
+        failed += SolverJob.objects.filter(pk=job.pk, status=job.status).update(
+                status=SolverJob.Status.FAILED,
+                finished=now,
+                log=f"{job.log}\n{error}".lstrip()[-LOG_TAIL_LENGTH:],
+        )
+    return failed
+
+
+def import_solver_job(job: SolverJob) -> int:
+    """
+    Import the schedule computed by a finished job into its event
+
+    The output is parsed and validated like an uploaded file
+    (cf. :class:`AKSolverInterface.forms.JSONScheduleImportForm`) and applied with
+    :meth:`AKModel.models.Event.schedule_from_json`, including the check whether the data of the event changed
+    since the export.
+
+    :param job: finished job
+    :return: number of changed slots
+    :raises ValueError: if the job cannot be imported or the schedule does not match the event
+    :raises ValidationError: if the output of the solver is invalid
+    """
+    if not job.can_be_imported:
+        raise ValueError(f"Job has status '{job.get_status_display()}' and cannot be imported")
+
+    start = time.perf_counter()
+    with open(job.output_path, "rb") as ff:
+        form = JSONScheduleImportForm(data={}, files={"json_file": File(ff, name="output.json")})
+        if not form.is_valid():
+            raise ValidationError([message for messages in form.errors.values() for message in messages])
+        with transaction.atomic():
+            # the scheduled AKs are parsed and validated while they are imported
+            number_of_slots_changed = job.event.schedule_from_json(form.cleaned_data["data"])
+            job.status = SolverJob.Status.IMPORTED
+            job.slots_imported = number_of_slots_changed
+            job.import_duration = time.perf_counter() - start
+            job.save(update_fields=["status", "slots_imported", "import_duration"])
+    return number_of_slots_changed
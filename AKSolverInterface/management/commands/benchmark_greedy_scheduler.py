@@ -0,0 +1,127 @@
+import random
+import timeit
+from functools import partial
+
+from django.core.management.base import BaseCommand
+
+from AKSolverInterface.greedy_scheduler import GreedyScheduler
+
+
+def synthetic_solver_input(number_of_aks: int, rnd: random.Random) -> dict:
+    """
+    Generate a synthetic solver input resembling a large event
+
+    The event has four days with two blocks of 32 timeslots (15 minutes) each and one room per 15 AKs.
+    AKs take 1 to 2 hours and have random category and person availability constraints, room properties,
+    owners, conflicts and prerequisites.
+
+    :param number_of_aks: number of AKs
+    :param rnd: random generator
+    :return: input in the format of the solver export
+    """
+    categories = [f"availability-cat-{i}" for i in range(4)]
+    properties = ["beamer", "blackboard", "accessible"]
+
+    blocks = []
+    timeslot_id = 0
+    for block_index in range(8):
+        # every block is open to three of the four categories
+        block_categories = rnd.sample(categories, 3)
+        block = []
+        for _ in range(32):
+            block.append({
+                "id": timeslot_id,
+                "info": {},
+                "fulfilled_time_constraints": [*block_categories, f"availability-block-{block_index}"],
+            })
+            timeslot_id += 1
+        blocks.append(block)
+
+    rooms = [
+        {
+            "id": room_id,
+            "capacity": rnd.randrange(10, 100),
+            "time_constraints": [],
+            "fulfilled_room_constraints": sorted([*rnd.sample(properties, rnd.randrange(0, 3)),
+                                                  f"fixed-room-{room_id}", "no-proxy"]),
+            "info": {},
+        }
+        for room_id in range(number_of_aks // 15 + 1)
+    ]
+
+    aks = []
+    for ak_id in range(number_of_aks):
+        time_constraints = [rnd.choice(categories)]
+        if rnd.random() < 0.2:
+            # owner is only available for some of the blocks
+            time_constraints.append(f"availability-block-{rnd.randrange(8)}")
+        aks.append({
+            "id": ak_id,
+            "duration": rnd.randrange(4, 9),
+            "properties": {
+                "conflicts": [other_id for other_id in rnd.sample(range(number_of_aks), 2) if other_id != ak_id],
+                "dependencies": rnd.sample(range(ak_id), 1) if ak_id and rnd.random() < 0.05 else [],
+            },
+            "room_constraints": sorted([*rnd.sample(properties, rnd.randrange(0, 2)), "no-proxy"]),
+            "time_constraints": time_constraints,
+            "info": {},
+        })
+
+    # one owner per two AKs, owners are required for their AKs
+    participants = [
+        {
+            "id": participant_id,
+            "info": {},
+            "room_constraints": [],
+            "time_constraints": [],
+            "preferences": [],
+        }
+        for participant_id in range(number_of_aks // 2 + 1)
+    ]
+    for ak in aks:
+        rnd.choice(participants)["preferences"].append(
+                {"ak_id": ak["id"], "required": True, "preference_score": -1}
+        )
+
+    return {
+        "aks": aks,
+        "rooms": rooms,
+        "timeslots": {"info": {"duration": 0.25, "blocknames": []}, "blocks": blocks},
+        "participants": participants,
+        "info": {},
+    }
+
+
+def _schedule(solver_input: dict) -> list[dict]:
+    """
+    Schedule the AKs of a solver input with a new scheduler
+    """
+    return GreedyScheduler(solver_input).schedule()
+
+
+class Command(BaseCommand):
+    """
+    Benchmark for the greedy draft scheduler
+
+    Measures :class:`AKSolverInterface.greedy_scheduler.GreedyScheduler` on synthetic events
+    (cf. :func:`synthetic_solver_input`) of different sizes. No database access is needed.
+    """
+    help = "Benchmark the greedy draft scheduler on synthetic events"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[100, 250, 500, 1000],
+                            help="Number of AKs")
+        parser.add_argument('--repeat', type=int, default=3, help="Number of repetitions per measurement")
+        parser.add_argument('--seed', type=int, default=42, help="Seed for the random generator")
+
+    def handle(self, *args, **options):
+        rnd = random.Random(options['seed'])
+
+        self.stdout.write(f"{'AKs':>6} {'rooms':>6} {'timeslots':>10} {'scheduled':>10} {'time [ms]':>10}")
+        for size in options['sizes']:
+            solver_input = synthetic_solver_input(size, rnd)
+            duration = min(timeit.repeat(partial(_schedule, solver_input), number=1, repeat=options['repeat']))
+            scheduled_aks = GreedyScheduler(solver_input).schedule()
+            number_of_timeslots = sum(len(block) for block in solver_input["timeslots"]["blocks"])
+            self.stdout.write(f"{size:6d} {len(solver_input['rooms']):6d} {number_of_timeslots:10d} "
+                              f"{len(scheduled_aks):10d} {duration * 1000:10.2f}")
@@ -0,0 +1,67 @@
+import timeit
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+from jsonschema import Draft202012Validator
+from referencing import Registry
+
+from AKSolverInterface.forms import JSONScheduleImportForm
+from AKSolverInterface.utils import construct_schema_validator, retrieve_schema_from_disk
+
+
+def _uncached_construct_schema_validator(schema: str) -> Draft202012Validator:
+    """
+    Reference implementation of the previous construction of a validator with a new registry per call,
+    used for comparison only
+    """
+    registry = Registry(retrieve=retrieve_schema_from_disk)
+    schema_uri = str(Path("schemas") / schema)
+    return Draft202012Validator(schema=registry.get_or_retrieve(schema_uri).value.contents, registry=registry)
+
+
+class Command(BaseCommand):
+    """
+    Micro-benchmark for constructing the JSON schedule import form
+
+    Compares the construction of the form (and the validation of a small schedule with it) using the cached
+    schema validators against constructing a new registry and validator per form. No database access is needed.
+    """
+    help = "Benchmark constructing the JSON schedule import form with cached and uncached schema validators"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--number', type=int, default=100, help="Number of forms per measurement")
+        parser.add_argument('--repeat', type=int, default=3, help="Number of repetitions per measurement")
+
+    def handle(self, *args, **options):
+        schedule = {
+            "input": {"aks": [], "rooms": [], "participants": [], "timeslots": {"info": {}, "blocks": []}},
+            "scheduled_aks": [{"ak_id": 1, "room_id": 1, "timeslot_ids": [1, 2], "participant_ids": []}],
+        }
+        schema = "solver-output.schema.json"
+        # the previous implementation also cached the schema files themselves, hence read them once for both variants
+        construct_schema_validator(schema)
+
+        def _construct_cached():
+            return JSONScheduleImportForm().json_schema_validator
+
+        def _construct_uncached():
+            # form construction including the previous construction of its validator
+            JSONScheduleImportForm()
+            return _uncached_construct_schema_validator(schema)
+
+        self.stdout.write(f"{'forms':>6} {'cached [ms]':>12} {'uncached [ms]':>14} {'speedup':>9}")
+        for variant_name, cached, uncached in [
+            ("construction", _construct_cached, _construct_uncached),
+            ("construction and validation",
+             lambda: list(_construct_cached().iter_errors(schedule)),
+             lambda: list(_construct_uncached().iter_errors(schedule))),
+        ]:
+            cached_time = min(timeit.repeat(cached, number=options['number'], repeat=options['repeat']))
+            uncached_time = min(timeit.repeat(uncached, number=options['number'], repeat=options['repeat']))
+            self.stdout.write(f"{options['number']:6d} {cached_time * 1000:12.2f} {uncached_time * 1000:14.2f} "
+                              f"{uncached_time / cached_time:8.1f}x  ({variant_name})")
+
+        cached_errors = [error.message for error in _construct_cached().iter_errors(schedule)]
+        uncached_errors = [error.message for error in _construct_uncached().iter_errors(schedule)]
+        if cached_errors != uncached_errors:
+            self.stderr.write(self.style.ERROR("Validation results differ"))
@@ -0,0 +1,68 @@
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from AKModel.models import AKSlot, Event
+from AKSolverInterface.greedy_scheduler import GreedyScheduler
+from AKSolverInterface.serializers import ExportEventSerializer
+from AKSolverInterface.utils import PhaseTimer
+
+
+class Command(BaseCommand):
+    """
+    Compute a draft schedule for an event with the greedy scheduler and import it
+
+    Runs :class:`AKSolverInterface.greedy_scheduler.GreedyScheduler` in-process on the solver export of the event
+    and applies the result with :meth:`AKModel.models.Event.schedule_from_json`.
+    The duration and number of queries of each phase are reported.
+    """
+    help = "Compute a draft schedule for an event with the greedy scheduler and import it"
+
+    def add_arguments(self, parser):
+        parser.add_argument('event_slug', help="Slug of the event to schedule")
+        parser.add_argument('--fixed', action='store_true', dest='export_scheduled_aks_as_fixed',
+                            help="Keep all scheduled slots at their current time and room")
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Roll back all changes after the import")
+
+    def handle(self, *args, **options):
+        try:
+            event = Event.objects.get(slug=options['event_slug'])
+        except Event.DoesNotExist as ex:
+            raise CommandError(f"Event '{options['event_slug']}' does not exist") from ex
+
+        timer = PhaseTimer()
+        try:
+            with timer.phase("export"):
+                serialized_event = ExportEventSerializer(
+                        event, export_scheduled_aks_as_fixed=options['export_scheduled_aks_as_fixed'],
+                )
+                solver_input = json.loads("".join(serialized_event.iter_json()))
+
+            with timer.phase("scheduling"):
+                scheduler = GreedyScheduler(solver_input)
+                scheduled_aks = scheduler.schedule()
+
+            with transaction.atomic():
+                with timer.phase("import of the schedule"):
+                    number_of_slots_changed = event.schedule_from_json(
+                            {"input": solver_input, "scheduled_aks": scheduled_aks},
+                            check_for_data_inconsistency=False,
+                    )
+                if options['dry_run']:
+                    transaction.set_rollback(True)
+        except (ValueError, ValidationError) as ex:
+            reason = " ".join(ex.messages) if isinstance(ex, ValidationError) else str(ex)
+            raise CommandError(f"Scheduling the event failed! Reason: {reason}") from ex
+
+        for slot in AKSlot.objects.filter(pk__in=scheduler.unscheduled).select_related("ak"):
+            self.stderr.write(self.style.WARNING(f"Could not schedule {slot}"))
+        if options['dry_run']:
+            self.stdout.write(f"Would schedule {number_of_slots_changed} slot(s), changes were rolled back")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Successfully scheduled {number_of_slots_changed} slot(s)"))
+        if options['verbosity'] >= 1:
+            for line in timer.report():
+                self.stdout.write(line)
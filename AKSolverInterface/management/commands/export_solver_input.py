@@ -0,0 +1,127 @@
+import json
+from contextlib import nullcontext
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import QuerySet
+
+from AKModel.models import Event
+from AKSolverInterface.forms import JSONExportControlForm, serialize_export_options
+from AKSolverInterface.serializers import ExportEventSerializer
+from AKSolverInterface.utils import PhaseTimer
+
+
+class Command(BaseCommand):
+    """
+    Export an event as input for the solver
+
+    Headless version of the export view :class:`AKSolverInterface.views.AKJSONExportView` with the same filter options
+    (cf. :class:`AKSolverInterface.forms.JSONExportControlForm`). The export is written to a file or to stdout,
+    the duration and number of queries of each phase are reported on stderr.
+    """
+    help = "Export an event as JSON input for the solver"
+
+    # command options for the model choice fields of the export form
+    FILTER_OPTIONS = {
+        "categories": "export_categories",
+        "tracks": "export_tracks",
+        "types": "export_types",
+    }
+
+    def add_arguments(self, parser):
+        parser.add_argument('event_slug', help="Slug of the event to export")
+        parser.add_argument('-o', '--output', help="File to write the export to (default: stdout)")
+        parser.add_argument('--fixed', action='store_true', dest='export_scheduled_aks_as_fixed',
+                            help="Fixate all scheduled slots for the solver")
+        parser.add_argument('--no-preferences', action='store_false', dest='export_preferences',
+                            help="Do not export the preferences of participants")
+        for option in self.FILTER_OPTIONS:
+            parser.add_argument(f'--{option}', type=int, nargs='*', metavar='PK',
+                                help=f"Primary keys of the AK {option} to include in the export (default: all)")
+        parser.add_argument('--ignore-category-mismatches', type=int, nargs='*', default=[], metavar='AK_PK',
+                            help="Primary keys of AKs for whose slots the category constraints are removed")
+        parser.add_argument('--indent', type=int, help="Indentation of the JSON output (default: compact)")
+
+    def handle(self, *args, **options):
+        try:
+            event = Event.objects.get(slug=options['event_slug'])
+        except Event.DoesNotExist as ex:
+            raise CommandError(f"Event '{options['event_slug']}' does not exist") from ex
+
+        timer = PhaseTimer()
+        with timer.phase("form validation"):
+            form = self._validated_form(event, options)
+
+        try:
+            with timer.phase("discretization"):
+                # errors cannot be reported once the output started, hence the discretization is done (and cached) first
+                for _ in event.discretize_timeslots():
+                    pass
+        except ValueError as ex:
+            raise CommandError(f"Exporting AKs for the solver failed! Reason: {ex}") from ex
+
+        export_warnings = []
+        serialized_event = self._serializer(event, form, export_warnings)
+
+        with open(options['output'], "w", encoding="utf-8") if options['output'] else nullcontext() as output:
+            write = output.write if output else lambda chunk: self.stdout.write(chunk, ending="")
+            if options['indent'] is None:
+                with timer.phase("serialization and output"):
+                    for chunk in serialized_event.iter_json():
+                        write(chunk)
+            else:
+                with timer.phase("serialization"):
+                    data = serialized_event.data
+                with timer.phase("output"):
+                    write(json.dumps(data, indent=options['indent'], ensure_ascii=False))
+            write("\n")
+
+        for warning in export_warnings:
+            self.stderr.write(self.style.WARNING(warning))
+        if options['verbosity'] >= 1:
+            for line in timer.report():
+                self.stderr.write(line)
+
+    @staticmethod
+    def _serializer(event: Event, form: JSONExportControlForm, export_warnings: list[str]) -> ExportEventSerializer:
+        """Create the serializer of the export, warnings about empty parts of the export are added to the list."""
+        def _check_exported(queryset: QuerySet, warning: str) -> QuerySet:
+            if not queryset.exists():
+                export_warnings.append(warning)
+            return queryset
+
+        return ExportEventSerializer(
+                event,
+                filter_slots_cb=lambda queryset: _check_exported(
+                        form.filter_exported_slots(queryset), "No AKSlots are exported"
+                ),
+                filter_rooms_cb=lambda queryset: _check_exported(queryset.all(), "No Rooms are exported"),
+                filter_participants_cb=lambda queryset: _check_exported(
+                        queryset.all(), "No real participants are exported"
+                ),
+                export_scheduled_aks_as_fixed=form.cleaned_data["export_scheduled_aks_as_fixed"],
+                export_preferences=form.cleaned_data["export_preferences"],
+                export_options=serialize_export_options(form.cleaned_data),
+                aks_to_ignore_category_for=set(event.ak_set.filter(
+                        pk__in=form.cleaned_data.get("ignore_slot_category_mismatches", [])
+                )),
+        )
+
+    def _validated_form(self, event: Event, options) -> JSONExportControlForm:
+        """Fill the export form with the command options, by default all objects of the event are exported."""
+        data = {
+            "export_scheduled_aks_as_fixed": options['export_scheduled_aks_as_fixed'],
+            "export_preferences": options['export_preferences'],
+            "ignore_slot_category_mismatches": options['ignore_category_mismatches'],
+        }
+        unbound_form = JSONExportControlForm(event=event)
+        for option, field_name in self.FILTER_OPTIONS.items():
+            if field_name in unbound_form.fields:
+                pks = options[option]
+                if pks is None:
+                    pks = list(unbound_form.fields[field_name].queryset.values_list("pk", flat=True))
+                data[field_name] = pks
+
+        form = JSONExportControlForm(data=data, event=event)
+        if not form.is_valid():
+            raise CommandError(f"Invalid export options:\n{form.errors.as_text()}")
+        return form
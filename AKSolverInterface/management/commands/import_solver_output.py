@@ -0,0 +1,66 @@
+from pathlib import Path
+
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from AKModel.models import Event
+from AKSolverInterface.forms import JSONScheduleImportForm
+from AKSolverInterface.utils import PhaseTimer
+
+
+class Command(BaseCommand):
+    """
+    Import an AK schedule from the output of the solver
+
+    Headless version of the import view :class:`AKSolverInterface.views.AKScheduleJSONImportView`.
+    The file is parsed and validated like an upload (cf. :class:`AKSolverInterface.forms.JSONScheduleImportForm`)
+    and applied with :meth:`AKModel.models.Event.schedule_from_json`.
+    The duration and number of queries of each phase are reported.
+    """
+    help = "Import an AK schedule from a JSON file with the output of the solver"
+
+    def add_arguments(self, parser):
+        parser.add_argument('event_slug', help="Slug of the event to import the schedule for")
+        parser.add_argument('file', help="JSON file with the output of the solver")
+        parser.add_argument('--no-check', action='store_false', dest='check_for_data_inconsistency',
+                            help="Do not check whether the data of the event changed since the export")
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Roll back all changes after the import (e.g., for profiling)")
+
+    def handle(self, *args, **options):
+        try:
+            event = Event.objects.get(slug=options['event_slug'])
+        except Event.DoesNotExist as ex:
+            raise CommandError(f"Event '{options['event_slug']}' does not exist") from ex
+
+        timer = PhaseTimer()
+        try:
+            with open(options['file'], "rb") as ff:
+                with timer.phase("parsing and validation of the input"):
+                    form = JSONScheduleImportForm(data={}, files={"json_file": File(ff, name=Path(ff.name).name)})
+                    if not form.is_valid():
+                        raise CommandError(f"Invalid solver output:\n{form.errors.as_text()}")
+                    schedule = form.cleaned_data["data"]
+
+                with transaction.atomic():
+                    if options['check_for_data_inconsistency']:
+                        with timer.phase("consistency check"):
+                            event.check_solver_input_consistency(schedule["input"])
+                    # the scheduled AKs are parsed and validated while they are imported
+                    with timer.phase("import of the schedule"):
+                        number_of_slots_changed = event.schedule_from_json(schedule, check_for_data_inconsistency=False)
+                    if options['dry_run']:
+                        transaction.set_rollback(True)
+        except (ValueError, ValidationError) as ex:
+            reason = " ".join(ex.messages) if isinstance(ex, ValidationError) else str(ex)
+            raise CommandError(f"Importing an AK schedule failed! Reason: {reason}") from ex
+
+        if options['dry_run']:
+            self.stdout.write(f"Would import {number_of_slots_changed} slot(s), changes were rolled back")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Successfully imported {number_of_slots_changed} slot(s)"))
+        if options['verbosity'] >= 1:
+            for line in timer.report():
+                self.stdout.write(line)
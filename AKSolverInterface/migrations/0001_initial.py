@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('AKModel', '0074_ak_trash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SolverJob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('solver', models.CharField(help_text='Name of the solver configuration (cf. SOLVER_CONFIGURATIONS)', max_length=64, verbose_name='Solver')),
+                ('export_options', models.JSONField(blank=True, default=dict, help_text='Options the event was exported with', verbose_name='Export options')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('finished', 'Finished'), ('failed', 'Failed'), ('timeout', 'Timed out'), ('imported', 'Imported')], default='pending', max_length=16, verbose_name='Status')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Created')),
+                ('started', models.DateTimeField(blank=True, null=True, verbose_name='Started')),
+                ('finished', models.DateTimeField(blank=True, null=True, verbose_name='Finished')),
+                ('export_duration', models.FloatField(blank=True, help_text='Time needed to write the export (in seconds)', null=True, verbose_name='Export duration')),
+                ('solve_duration', models.FloatField(blank=True, help_text='Time needed by the solver (in seconds)', null=True, verbose_name='Solve duration')),
+                ('import_duration', models.FloatField(blank=True, help_text='Time needed to import the schedule (in seconds)', null=True, verbose_name='Import duration')),
+                ('return_code', models.IntegerField(blank=True, help_text='Exit status of the solver process', null=True, verbose_name='Return code')),
+                ('log', models.TextField(blank=True, help_text='End of the output of the solver process', verbose_name='Log')),
+                ('slots_imported', models.PositiveIntegerField(blank=True, help_text='Number of slots changed by the import', null=True, verbose_name='Imported slots')),
+                ('event', models.ForeignKey(help_text='Associated event', on_delete=django.db.models.deletion.CASCADE, to='AKModel.event', verbose_name='Event')),
+            ],
+            options={
+                'verbose_name': 'Solver Job',
+                'verbose_name_plural': 'Solver Jobs',
+                'ordering': ['-created'],
+            },
+        ),
+    ]
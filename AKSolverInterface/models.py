@@ -0,0 +1,107 @@
+import os
+
+from django.conf import settings
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+from AKModel.models import Event
+
+
+class SolverJob(models.Model):
+    """
+    A run of a local solver on the export of an event (cf. :mod:`AKSolverInterface.jobs`)
+
+    The export is written to the directory of the job, the solver is run on it in a background worker
+    and the schedule computed by the solver can be imported into the event once the job finished.
+    """
+
+    class Meta:
+        verbose_name = _('Solver Job')
+        verbose_name_plural = _('Solver Jobs')
+        ordering = ['-created']
+
+    class Status(models.TextChoices):
+        """
+        State of a solver job
+        """
+        PENDING = "pending", _("Pending")
+        RUNNING = "running", _("Running")
+        FINISHED = "finished", _("Finished")
+        FAILED = "failed", _("Failed")
+        TIMEOUT = "timeout", _("Timed out")
+        IMPORTED = "imported", _("Imported")
+
+    event = models.ForeignKey(to=Event, on_delete=models.CASCADE, verbose_name=_('Event'),
+                              help_text=_('Associated event'))
+    solver = models.CharField(max_length=64, verbose_name=_('Solver'),
+                              help_text=_('Name of the solver configuration (cf. SOLVER_CONFIGURATIONS)'))
+    export_options = models.JSONField(default=dict, blank=True, verbose_name=_('Export options'),
+                                      help_text=_('Options the event was exported with'))
+    status = models.CharField(max_length=16, choices=Status.choices, default=Status.PENDING,
+                              verbose_name=_('Status'))
+
+    created = models.DateTimeField(auto_now_add=True, verbose_name=_('Created'))
+    started = models.DateTimeField(null=True, blank=True, verbose_name=_('Started'))
+    finished = models.DateTimeField(null=True, blank=True, verbose_name=_('Finished'))
+
+    export_duration = models.FloatField(null=True, blank=True, verbose_name=_('Export duration'),
+                                        help_text=_('Time needed to write the export (in seconds)'))
+    solve_duration = models.FloatField(null=True, blank=True, verbose_name=_('Solve duration'),
+                                       help_text=_('Time needed by the solver (in seconds)'))
+    import_duration = models.FloatField(null=True, blank=True, verbose_name=_('Import duration'),
+                                        help_text=_('Time needed to import the schedule (in seconds)'))
+
+    return_code = models.IntegerField(null=True, blank=True, verbose_name=_('Return code'),
+                                      help_text=_('Exit status of the solver process'))
+    log = models.TextField(blank=True, verbose_name=_('Log'),
+                           help_text=_('End of the output of the solver process'))
+    slots_imported = models.PositiveIntegerField(null=True, blank=True, verbose_name=_('Imported slots'),
+                                                 help_text=_('Number of slots changed by the import'))
+
+    def __str__(self) -> str:
+        return f"{self.event} - {self.solver} #{self.pk} ({self.get_status_display()})"
+
+    @property
+    def directory(self) -> str:
+        """
+        Directory the input, output and log of this job are stored in
+
+        :return: path of the directory
+        :rtype: str
+        """
+        return os.path.join(settings.SOLVER_JOB_DIR, self.event.slug, str(self.pk))
+
+    @property
+    def input_path(self) -> str:
+        """
+        Path of the exported input for the solver
+        """
+        return os.path.join(self.directory, "input.json")
+
+    @property
+    def output_path(self) -> str:
+        """
+        Path the solver is expected to write its output to
+        """
+        return os.path.join(self.directory, "output.json")
+
+    @property
+    def log_path(self) -> str:
+        """
+        Path the output of the solver process is written to
+        """
+        return os.path.join(self.directory, "solver.log")
+
+    @property
+    def is_active(self) -> bool:
+        """
+        Is this job still waiting or running?
+        """
+        return self.status in (self.Status.PENDING, self.Status.RUNNING)
+
+    @property
+    def can_be_imported(self) -> bool:
+        """
+        Can the schedule computed by this job be imported?
+        """
+        return self.status == self.Status.FINISHED
@@ -1,11 +1,19 @@
-from collections.abc import Callable
+import hashlib
+import json
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from collections.abc import Callable, Iterable, Iterator
+from itertools import islice
 
 from django.apps import apps
+from django.db.models import BooleanField, ExpressionWrapper, Q, Value
 from django.db.models.query import QuerySet
+from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
 
-from AKModel.models import AK, AKSlot, Event, Room
-from AKModel.serializers import IntListField, StringListField
+from AKModel.availability.intervals import to_timestamp
+from AKModel.models import AK, AKSlot, Event, OptimizerTimeslot, Room
+from AKSolverInterface.export_context import ExportContext
 
 
 def _apply_filter_cb_to_queryset(
@@ -16,6 +24,131 @@ def _apply_filter_cb_to_queryset(
     return cb(queryset) if isinstance(queryset, QuerySet) else queryset
 
 
+# number of objects loaded from the database at once when streaming an export
+EXPORT_CHUNK_SIZE = 500
+
+
+def _iter_chunks(iterable: Iterable, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[list]:
+    """Split an iterable into lists of at most `chunk_size` consecutive elements."""
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, chunk_size)):
+        yield chunk
+
+
+def _iter_objects(queryset: QuerySet | Iterable) -> Iterator:
+    """Iterate over a queryset in chunks without caching the results (other iterables are returned as they are)."""
+    if isinstance(queryset, QuerySet):
+        return queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    return iter(queryset)
+
+
+def _canonical_json(representation) -> str:
+    """Canonical JSON encoding of a representation (sorted keys, no whitespace), used for hashing."""
+    return json.dumps(representation, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def _iter_json_list(representations: Iterable, hasher=None) -> Iterator[str]:
+    """Encode a list element by element, producing the same JSON as `json.dumps(list(representations))`.
+
+    If a hash object is given, it is updated with the canonical encoding of the list (cf. `_canonical_json`).
+    """
+    separator = "["
+    for representation in representations:
+        if hasher is not None:
+            hasher.update((separator[0] + _canonical_json(representation)).encode("utf-8"))
+        yield separator + json.dumps(representation, ensure_ascii=False)
+        separator = ", "
+    if hasher is not None:
+        hasher.update(b"[]" if separator == "[" else b"]")
+    yield "[]" if separator == "[" else "]"
+
+
+# fields of the export covered by the export hash (in this order), 'info' contains the hash itself
+EXPORT_HASHED_FIELDS = ["participants", "rooms", "timeslots", "aks"]
+# fields of the export info that describe the export itself and not the event
+EXPORT_META_INFO_FIELDS = ["content_fingerprint", "export_hash", "export_options"]
+
+
+def export_hash(export: dict) -> str:
+    """Compute a stable hash of an export to the solver.
+
+    The hash covers the canonical JSON encoding of all fields except 'info' (cf. `EXPORT_HASHED_FIELDS`).
+    Thus, it does not depend on formatting or the order of keys and can be recomputed from an imported export.
+
+    :param export: serialized export, e.g., the 'input' of a schedule returned by the solver.
+    :return: hash as hex digest
+    """
+    hasher = hashlib.sha256()
+    for key in EXPORT_HASHED_FIELDS:
+        hasher.update(_canonical_json(export.get(key)).encode("utf-8"))
+    return hasher.hexdigest()
+
+
+def export_differences(exported: dict, current: dict) -> list[str]:
+    """Describe the differences between two exports of the same event.
+
+    Participants, rooms, AK slots and timeslots are matched by their ids,
+    the fields describing the export itself are ignored (cf. `EXPORT_META_INFO_FIELDS`).
+
+    :param exported: previous export, e.g., the 'input' of a schedule returned by the solver.
+    :param current: current export.
+    :return: human-readable descriptions of the differences, empty if there are none
+    """
+    differences = []
+
+    def _timeslots(export: dict) -> list[dict]:
+        return [timeslot for block in export.get("timeslots", {}).get("blocks", []) for timeslot in block]
+
+    object_lists = [
+        (_("Participants"), exported.get("participants", []), current.get("participants", [])),
+        (_("Rooms"), exported.get("rooms", []), current.get("rooms", [])),
+        (_("AK slots"), exported.get("aks", []), current.get("aks", [])),
+        (_("Timeslots"), _timeslots(exported), _timeslots(current)),
+    ]
+    for kind, exported_objects, current_objects in object_lists:
+        exported_by_id = {obj.get("id"): obj for obj in exported_objects}
+        current_by_id = {obj.get("id"): obj for obj in current_objects}
+        changes = [
+            (_("removed"), exported_by_id.keys() - current_by_id.keys()),
+            (_("added"), current_by_id.keys() - exported_by_id.keys()),
+            (_("changed"), {
+                pk for pk in exported_by_id.keys() & current_by_id.keys() if exported_by_id[pk] != current_by_id[pk]
+            }),
+        ]
+        for change, pks in changes:
+            if pks:
+                differences.append(_("{kind} {change}: {ids}").format(
+                        kind=kind, change=change, ids=", ".join(str(pk) for pk in sorted(pks, key=str))
+                ))
+
+    if exported.get("timeslots", {}).get("info") != current.get("timeslots", {}).get("info"):
+        differences.append(_("Timeslot information changed"))
+
+    def _event_info(export: dict) -> dict:
+        return {key: value for key, value in export.get("info", {}).items() if key not in EXPORT_META_INFO_FIELDS}
+
+    if _event_info(exported) != _event_info(current):
+        differences.append(_("Event information changed"))
+    return differences
+
+
+def _get_export_context(serializer: serializers.BaseSerializer, instance: Event | Room | AKSlot) -> ExportContext:
+    """Get the export context shared by all serializers of an export.
+
+    If there is none yet (e.g., if the serializer is used on its own), a new context is created
+    and stored in the (root) serializer's context to be reused for all other objects.
+
+    :param serializer: serializer to get the context for.
+    :param instance: event or object of the event that is serialized.
+    """
+    event_id = instance.pk if isinstance(instance, Event) else instance.event_id
+    export_context = serializer.context.get("export_context")
+    if export_context is None or export_context.event.pk != event_id:
+        export_context = ExportContext(instance if isinstance(instance, Event) else instance.event)
+        serializer.context["export_context"] = export_context
+    return export_context
+
+
 class ExportRoomInfoSerializer(serializers.ModelSerializer):
     """Serializer of Room objects for the 'info' field.
 
@@ -39,12 +172,21 @@ class ExportRoomSerializer(serializers.ModelSerializer):
     https://github.com/Die-KoMa/ak-plan-optimierung/wiki/Input-&-output-format#input--output-format
     """
 
-    time_constraints = StringListField(source="get_time_constraints", read_only=True)
-    fulfilled_room_constraints = StringListField(
-            source="get_fulfilled_room_constraints", read_only=True
-    )
+    time_constraints = serializers.SerializerMethodField()
+    fulfilled_room_constraints = serializers.SerializerMethodField()
     info = ExportRoomInfoSerializer(source="*")
 
+    def get_time_constraints(self, room: Room) -> list[str]:
+        """Get serialized representation for time_constraints (cf. `Room.get_time_constraints`)."""
+        return _get_export_context(self, room).room_time_constraints(room)
+
+    def get_fulfilled_room_constraints(self, room: Room) -> list[str]:
+        """Get serialized representation for fulfilled_room_constraints.
+
+        Cf. `Room.get_fulfilled_room_constraints`.
+        """
+        return _get_export_context(self, room).room_fulfilled_constraints(room)
+
     class Meta:
         model = Room
         fields = [
@@ -78,11 +220,15 @@ class ExportAKSlotInfoSerializer(serializers.ModelSerializer):
     description = serializers.CharField(source="ak.description")
     duration_in_hours = serializers.FloatField(source="duration")
     django_ak_id = serializers.IntegerField(source="ak.pk")
-    types = StringListField(source="type_names")
+    types = serializers.SerializerMethodField()
 
     def get_head(self, slot: AKSlot) -> str:
         """Get string representation for 'head' field."""
-        return ", ".join([str(owner) for owner in slot.ak.owners.all()])
+        return ", ".join([str(owner) for owner in _get_export_context(self, slot).ak_owners(slot.ak_id)])
+
+    def get_types(self, slot: AKSlot) -> list[str]:
+        """Get serialized representation for 'types' field (cf. `AKSlot.type_names`)."""
+        return _get_export_context(self, slot).slot_type_names(slot)
 
     class Meta:
         model = AKSlot
@@ -115,8 +261,16 @@ class ExportAKSlotPropertiesSerializer(serializers.ModelSerializer):
     https://github.com/Die-KoMa/ak-plan-optimierung/wiki/Input-&-output-format#input--output-format
     """
 
-    conflicts = IntListField(source="conflict_pks")
-    dependencies = IntListField(source="depencency_pks")
+    conflicts = serializers.SerializerMethodField()
+    dependencies = serializers.SerializerMethodField()
+
+    def get_conflicts(self, slot: AKSlot) -> list[int]:
+        """Get serialized representation for 'conflicts' field (cf. `AKSlot.conflict_pks`)."""
+        return _get_export_context(self, slot).slot_conflict_pks(slot)
+
+    def get_dependencies(self, slot: AKSlot) -> list[int]:
+        """Get serialized representation for 'dependencies' field (cf. `AKSlot.depencency_pks`)."""
+        return _get_export_context(self, slot).slot_dependency_pks(slot)
 
     class Meta:
         model = AKSlot
@@ -146,18 +300,20 @@ class ExportAKSlotSerializer(serializers.ModelSerializer):
     def get_room_constraints(self, slot: AKSlot):
         """Get serialized representation for room_constraints.
 
-        Used to pass `export_scheduled_aks_as_fixed` to AKSlot's function.
+        Cf. `AKSlot.get_room_constraints`.
         """
-        return slot.get_room_constraints(
+        return _get_export_context(self, slot).slot_room_constraints(
+                slot,
                 export_scheduled_aks_as_fixed=self.export_scheduled_aks_as_fixed,
         )
 
     def get_time_constraints(self, slot: AKSlot):
         """Get serialized representation for time_constraints.
 
-        Used to pass `export_scheduled_aks_as_fixed` to AKSlot's function.
+        Cf. `AKSlot.get_time_constraints`.
         """
-        return slot.get_time_constraints(
+        return _get_export_context(self, slot).slot_time_constraints(
+                slot,
                 export_scheduled_aks_as_fixed=self.export_scheduled_aks_as_fixed,
                 aks_to_ignore_category_for=self.aks_to_ignore_category_for
         )
@@ -183,6 +339,12 @@ class ExportAKSlotSerializer(serializers.ModelSerializer):
 
 
 class ExportFilteredAKSlotSerializer(serializers.BaseSerializer):
+    """Export serializer for a list of AKSlot objects.
+
+    Serializes each slot with `ExportAKSlotSerializer` and restricts its conflicts and dependencies
+    to the exported slots, since the solver cannot resolve references to slots missing from the export.
+    """
+
     def __init__(self, *args, export_scheduled_aks_as_fixed: bool = False,
                  aks_to_ignore_category_for, **kwargs):
         super().__init__(*args, **kwargs)
@@ -198,28 +360,38 @@ class ExportFilteredAKSlotSerializer(serializers.BaseSerializer):
     def update(self, instance, validated_data):
         raise ValueError("`ExportFilteredAKSlotSerializer` is read-only.")
 
-    def to_representation(self, instance):
-        slot_queryset = instance
-        slot_pks = set(slot_queryset.values_list("id", flat=True))
+    def iter_representation(self, instance) -> Iterator[dict]:
+        """Construct serialized representations of the slots one by one.
+
+        The slots are loaded from the database in chunks, hence they never need to be held in memory all at once.
+        """
+        slot_queryset = _apply_filter_cb_to_queryset(lambda queryset: queryset.select_related("event", "ak"), instance)
+        if isinstance(slot_queryset, QuerySet):
+            slot_pks = set(slot_queryset.values_list("pk", flat=True))
+        else:
+            slot_pks = {slot.pk for slot in slot_queryset}
 
         def _restrict_to_slots(pk_list: list[int]):
             return sorted(set(pk_list) & slot_pks)
 
-        serialized_slots = ExportAKSlotSerializer(
-                slot_queryset,
+        slot_serializer = ExportAKSlotSerializer(
                 export_scheduled_aks_as_fixed=self.export_scheduled_aks_as_fixed,
-                many=True,
                 aks_to_ignore_category_for=self.aks_to_ignore_category_for,
-        ).data
+                context=self.context,
+        )
 
-        for slot_dict in serialized_slots:
+        for slot in _iter_objects(slot_queryset):
+            slot_dict = slot_serializer.to_representation(slot)
             slot_dict["properties"]["conflicts"] = _restrict_to_slots(
                     slot_dict["properties"]["conflicts"],
             )
             slot_dict["properties"]["dependencies"] = _restrict_to_slots(
                     slot_dict["properties"]["dependencies"],
             )
-        return serialized_slots
+            yield slot_dict
+
+    def to_representation(self, instance):
+        return list(self.iter_representation(instance))
 
 
 class ExportParticipantAndDummiesSerializer(serializers.BaseSerializer):
@@ -258,57 +430,77 @@ class ExportParticipantAndDummiesSerializer(serializers.BaseSerializer):
     def update(self, instance, validated_data):
         raise ValueError("`ExportParticipantAndDummiesSerializer` is read-only.")
 
-    def to_representation(self, instance: Event):
+    def iter_representation(self, instance: Event) -> Iterator[dict]:
+        """Construct serialized representations of the participants (including dummies) one by one.
+
+        Real participants and their preferences are loaded from the database in chunks,
+        hence they never need to be held in memory all at once.
+        """
         event = instance
 
         # default case
-        real_participants = []
         next_participant_pk = 1
 
         # set variable values if AKPreference app is installed
         if apps.is_installed("AKPreference") and self.export_preferences:
             # local import to decouple
             # pylint: disable=import-outside-toplevel
-            from AKPreference.models import EventParticipant
-            from AKPreference.serializers import ExportParticipantSerializer
+            from AKPreference.models import AKPreference, EventParticipant
+            from AKPreference.serializers import ExportAKPreferencePerSlotSerializer, ExportParticipantSerializer
 
             participants = _apply_filter_cb_to_queryset(self.filter_participants_cb, event.participants)
-            real_participants = ExportParticipantSerializer(participants, many=True).data
+            # preferences are restricted to the exported slots
+            slots_per_ak = ExportAKPreferencePerSlotSerializer.slots_per_ak(
+                    AKSlot.objects.filter(ak__event=event), self.slots_qs
+            )
+            for chunk in _iter_chunks(_iter_objects(participants)):
+                # serialize the preferences of all participants of the chunk at once
+                participant_preferences = ExportAKPreferencePerSlotSerializer.bulk_representation(
+                        AKPreference.objects.filter(participant__in=[participant.pk for participant in chunk]),
+                        slots_per_ak,
+                )
+                participant_serializer = ExportParticipantSerializer(
+                        context={**self.context, "participant_preferences": participant_preferences},
+                )
+                for participant in chunk:
+                    yield participant_serializer.to_representation(participant)
 
             if EventParticipant.objects.exists():
                 next_participant_pk = EventParticipant.objects.latest("pk").pk + 1
 
-        dummies = []
+        # slots of each owner, loaded with a single query over the AK-owner relation
+        # a slot is flagged if it is exported, i.e., contained in `slots_qs`
+        owned_slots = event.slots.order_by("pk")
+        if self.slots_qs is not None:
+            owned_slots = owned_slots.annotate(exported=ExpressionWrapper(
+                    Q(pk__in=self.slots_qs.values("pk")), output_field=BooleanField()
+            ))
+        else:
+            owned_slots = owned_slots.annotate(exported=Value(True))
+        slots_per_owner = defaultdict(list)
+        for owner_pk, slot_pk, exported in owned_slots.values_list("ak__owners", "pk", "exported"):
+            if owner_pk is not None:
+                slots_per_owner[owner_pk].append((slot_pk, exported))
+
         # add one dummy participant per owner
         # this ensures that the hard constraints from each owner are considered
         for new_pk, owner in enumerate(event.owners, next_participant_pk):
-            owned_slots = event.slots.filter(ak__owners=owner).order_by().all()
-            if not owned_slots:
+            if owner.pk not in slots_per_owner:
                 continue
-            new_participant_data = {
+            yield {
                 "id": new_pk,
                 "info": {"name": f"{owner} [AKOwner]"},
                 "room_constraints": [],
                 "time_constraints": [],
                 "preferences": [
-                    {"ak_id": slot.pk, "required": True, "preference_score": -1}
-                    for slot in owned_slots
+                    {"ak_id": slot_pk, "required": True, "preference_score": -1}
+                    for slot_pk, exported in slots_per_owner[owner.pk]
+                    if exported
                 ]
             }
-            dummies.append(new_participant_data)
-        all_participants = real_participants + dummies
 
-        if self.slots_qs is not None:
-            slot_pks = set(self.slots_qs.values_list("id", flat=True))
-
-            def _filter_to_slots_qs(preference: dict):
-                return preference["ak_id"] in slot_pks
-
-            for participant in all_participants:
-                participant["preferences"] = list(
-                        filter(_filter_to_slots_qs, participant["preferences"])
-                )
-        return all_participants
+    def to_representation(self, instance: Event):
+        return list(self.iter_representation(instance))
 
 
 class ExportEventInfoSerializer(serializers.ModelSerializer):
@@ -350,73 +542,94 @@ class ExportTimeslotBlockSerializer(serializers.BaseSerializer):
     def update(self, instance, validated_data):
         raise ValueError("`ExportTimeslotBlockSerializer` is read-only.")
 
+    @staticmethod
+    def _availability_constraints(
+            export_context: ExportContext, timeslots: list[OptimizerTimeslot]
+    ) -> list[list[str]]:
+        """Compute the fulfilled availability constraints of all timeslots at once.
+
+        The availabilities of all AKs, persons, rooms and participants are taken from the export context,
+        where they are loaded with a single query per kind of entity and converted to interval sets.
+        For each entity that is not available for the full event, one row of a boolean coverage matrix
+        (entities x timeslots) is computed in a single linear sweep over its intervals and the timeslots.
+        The constraint labels of a timeslot are then read from the corresponding column.
+
+        :param export_context: context of the export of the event.
+        :param timeslots: all timeslots of the discretization.
+        :return: list of availability constraint labels per timeslot (in the order of `timeslots`).
+        :rtype: list of lists of strings
+        """
+        event = export_context.event
+        starts = [to_timestamp(timeslot.avail.start) for timeslot in timeslots]
+        ends = [to_timestamp(timeslot.avail.end) for timeslot in timeslots]
+        event_start, event_end = to_timestamp(event.start), to_timestamp(event.end)
+
+        columns = [[] for _ in timeslots]
+        for avail_label, interval_sets in export_context.availabilities.items():
+            for pk, interval_set in interval_sets.items():
+                # entities available for the whole event do not need a constraint
+                if interval_set.contains(event_start, event_end):
+                    continue
+                coverage_row = interval_set.covers_each(starts, ends)
+                constraint = f"availability-{avail_label}-{pk}"
+                for position, covered in enumerate(coverage_row):
+                    if covered:
+                        columns[position].append(constraint)
+        return columns
+
+    def _fixed_slot_constraints(
+            self, export_context: ExportContext, timeslots: list[OptimizerTimeslot]
+    ) -> list[list[str]]:
+        """Compute the fulfilled constraints of all fixed AKSlots for all timeslots at once.
+
+        A timeslot fulfills the constraint 'fixed-akslot-<pk>' if it overlaps with the scheduled time
+        of a fixed AKSlot. The timeslots are sorted and do not overlap partially, hence the range of timeslots
+        overlapping with a fixed slot is found with a binary search on their start and end timestamps.
+
+        :param export_context: context of the export of the event.
+        :param timeslots: all timeslots of the discretization (sorted by start).
+        :return: list of fixed slot constraint labels per timeslot (in the order of `timeslots`).
+        :rtype: list of lists of strings
+        """
+        starts = [to_timestamp(timeslot.avail.start) for timeslot in timeslots]
+        ends = [to_timestamp(timeslot.avail.end) for timeslot in timeslots]
+
+        columns = [[] for _ in timeslots]
+        for ak_slot in export_context.fixed_slots:
+            if not (ak_slot.fixed or self.export_scheduled_aks_as_fixed):
+                continue
+            slot_start, slot_end = to_timestamp(ak_slot.start), to_timestamp(ak_slot.end)
+            constraint = f"fixed-akslot-{ak_slot.id}"
+            # candidates are all timeslots that at least touch the fixed slot,
+            # the exact check then matches the semantics of `Availability.overlaps(strict=True)`
+            for position in range(bisect_left(ends, slot_start), bisect_right(starts, slot_end)):
+                start, end = starts[position], ends[position]
+                if (
+                        slot_start <= start < slot_end
+                        or slot_start < end <= slot_end
+                        or start <= slot_start < end
+                        or start < slot_end <= end
+                ):
+                    columns[position].append(constraint)
+        return columns
+
     def to_representation(self, instance: Event):
         """Construct serialized representation of the timeslots of an event."""
-        # pylint: disable=import-outside-toplevel
-        from AKModel.availability.models import Availability
-
         event = instance
+        export_context = _get_export_context(self, event)
         blocks = list(event.discretize_timeslots())
 
-        def _check_event_not_covered(availabilities: list[Availability]) -> bool:
-            """Test if event is not covered by availabilities."""
-            return not Availability.is_event_covered(event, availabilities)
-
-        def _check_akslot_fixed_in_timeslot(
-                ak_slot: AKSlot, timeslot: Availability
-        ) -> bool:
-            """Test if an AKSlot is fixed to overlap a timeslot slot."""
-            if ak_slot.start is None:
-                return False
-
-            if not (ak_slot.fixed or self.export_scheduled_aks_as_fixed):
-                return False
-
-            fixed_avail = Availability(
-                    event=event, start=ak_slot.start, end=ak_slot.end
-            )
-            return fixed_avail.overlaps(timeslot, strict=True)
-
-        def _check_add_constraint(
-                slot: Availability, availabilities: list[Availability]
-        ) -> bool:
-            """Test if object is not available for whole event and may happen during slot."""
-            return _check_event_not_covered(availabilities) and slot.is_covered(
-                    availabilities
-            )
-
-        def _generate_time_constraints(
-                avail_label: str,
-                avail_dict: dict,
-                timeslot_avail: Availability,
-                prefix: str = "availability",
-        ) -> list[str]:
-            return [
-                f"{prefix}-{avail_label}-{pk}"
-                for pk, availabilities in avail_dict.items()
-                if _check_add_constraint(timeslot_avail, availabilities)
-            ]
-
         timeslots = {
             "info": {"duration": float(event.export_slot)},
             "blocks": [],
         }
 
-        ak_availabilities = {
-            ak.pk: Availability.union(ak.availabilities.all())
-            for ak in AK.objects.filter(event=event).all()
-        }
-        room_availabilities = {
-            room.pk: Availability.union(room.availabilities.all()) for room in event.rooms
-        }
-        person_availabilities = {
-            person.pk: Availability.union(person.availabilities.all())
-            for person in event.owners
-        }
-        participant_availabilities = {
-            participant.pk: Availability.union(participant.availabilities.all())
-            for participant in event.participants
-        }
+        # fulfilled availability and fixed slot constraints per timeslot
+        # (same order as the flattened timeslots of all blocks)
+        all_timeslots = [timeslot for block in blocks for timeslot in block]
+        availability_constraints = self._availability_constraints(export_context, all_timeslots)
+        fixed_slot_constraints = self._fixed_slot_constraints(export_context, all_timeslots)
+        timeslot_position = 0
 
         block_names = []
         for block_idx, block in enumerate(blocks):
@@ -457,42 +670,13 @@ class ExportTimeslotBlockSerializer(serializers.BaseSerializer):
                 ):
                     time_constraints.append("resolution")
 
-                # add fulfilled time constraints for all AKs that cannot happen during full event
-                time_constraints.extend(
-                        _generate_time_constraints("ak", ak_availabilities, timeslot.avail)
-                )
-
-                # add fulfilled time constraints for all persons that are not available for full event
-                time_constraints.extend(
-                        _generate_time_constraints(
-                                "person", person_availabilities, timeslot.avail
-                        )
-                )
-
-                # add fulfilled time constraints for all rooms that are not available for full event
-                time_constraints.extend(
-                        _generate_time_constraints(
-                                "room", room_availabilities, timeslot.avail
-                        )
-                )
-
-                # add fulfilled time constraints for all participants that are not available for full event
-                time_constraints.extend(
-                        _generate_time_constraints(
-                                "participant", participant_availabilities, timeslot.avail
-                        )
-                )
+                # add fulfilled time constraints for all AKs, persons, rooms and participants
+                # that are not available for full event but during this timeslot
+                time_constraints.extend(availability_constraints[timeslot_position])
 
                 # add fulfilled time constraints for all AKSlots fixed to happen during timeslot
-                time_constraints.extend(
-                        [
-                            f"fixed-akslot-{slot.id}"
-                            for slot in AKSlot.objects.filter(
-                                event=event, fixed=True
-                        ).exclude(start__isnull=True)
-                            if _check_akslot_fixed_in_timeslot(slot, timeslot.avail)
-                        ]
-                )
+                time_constraints.extend(fixed_slot_constraints[timeslot_position])
+                timeslot_position += 1
 
                 time_constraints.extend(timeslot.constraints)
                 time_constraints.extend(block_timeconstraints)
@@ -524,7 +708,9 @@ class ExportEventSerializer(serializers.BaseSerializer):
     """Export serializer for an Event object.
 
     Allows filtering of the exported AKSlots and Rooms by
-    passing a filter callback function as a kwarg to __init__
+    passing a filter callback function as a kwarg to __init__.
+    Filtered exports should also pass the export options the filters were derived from,
+    they are embedded into the export to repeat it for consistency checks on import.
 
     Used to serialize an Event for the export to a solver.
     Part of the implementation of the format of the KoMa solver:
@@ -540,6 +726,7 @@ class ExportEventSerializer(serializers.BaseSerializer):
             export_scheduled_aks_as_fixed: bool = False,
             export_preferences: bool = True,
             aks_to_ignore_category_for: set[AK] | None = None,
+            export_options: dict | None = None,
             **kwargs,
     ):
         def _identity(queryset: QuerySet) -> QuerySet:
@@ -552,6 +739,7 @@ class ExportEventSerializer(serializers.BaseSerializer):
         self.export_scheduled_aks_as_fixed = export_scheduled_aks_as_fixed
         self.export_preferences = export_preferences
         self.aks_to_ignore_category_for = aks_to_ignore_category_for
+        self.export_options = export_options
 
         super().__init__(*args, **kwargs)
 
@@ -564,36 +752,94 @@ class ExportEventSerializer(serializers.BaseSerializer):
     def update(self, instance, validated_data):
         raise ValueError("`ExportEventSerializer` is read-only.")
 
-    def to_representation(self, instance: Event):
-        """
-        Object instance -> Dict of primitive datatypes.
-        """
-        event = instance
+    def _field_serializers(self, event: Event) -> dict[str, serializers.BaseSerializer]:
+        """Construct the serializers of all fields of the export except 'info' (cf. `EXPORT_HASHED_FIELDS`)."""
+        # related data of all serialized objects is loaded once and shared by all serializers
+        context = {**self.context, "export_context": ExportContext(event)}
 
-        info = ExportEventInfoSerializer(event)
-        timeslots = ExportTimeslotBlockSerializer(event)
+        timeslots = ExportTimeslotBlockSerializer(event, context=context)
         # we support filtering of Rooms and AKSlots
         rooms = ExportRoomSerializer(
                 _apply_filter_cb_to_queryset(self.filter_rooms_cb, event.rooms),
                 many=True,
+                context=context,
         )
         slots_qs = _apply_filter_cb_to_queryset(self.filter_slots_cb, event.slots)
         slots = ExportFilteredAKSlotSerializer(
                 slots_qs,
                 export_scheduled_aks_as_fixed=self.export_scheduled_aks_as_fixed,
                 aks_to_ignore_category_for=self.aks_to_ignore_category_for,
+                context=context,
         )
         participants = ExportParticipantAndDummiesSerializer(
                 event,
                 slots_qs=slots_qs,
                 filter_participants_cb=self.filter_participants_cb,
                 export_preferences=self.export_preferences,
+                context=context,
         )
 
         return {
-            "participants": participants.data,
-            "rooms": rooms.data,
-            "timeslots": timeslots.data,
-            "info": info.data,
-            "aks": slots.data,
+            "participants": participants,
+            "rooms": rooms,
+            "timeslots": timeslots,
+            "aks": slots,
         }
+
+    def _info(self, event: Event, content_fingerprint: str, hash_of_export: str) -> dict:
+        """Construct the 'info' field of the export.
+
+        Besides the event information, it contains the content fingerprint of the event at the time of the export
+        and the hash of the export (cf. `export_hash`), which are used to detect changes when importing a schedule.
+        If the export was filtered, the export options are included as well, such that the export can be repeated
+        with the same filters for the comparison (cf. `AKSolverInterface.forms.export_serializer_kwargs`).
+        """
+        info = {
+            **ExportEventInfoSerializer(event).data,
+            "content_fingerprint": content_fingerprint,
+            "export_hash": hash_of_export,
+        }
+        if self.export_options is not None:
+            info["export_options"] = self.export_options
+        return info
+
+    def to_representation(self, instance: Event):
+        """
+        Object instance -> Dict of primitive datatypes.
+        """
+        # fingerprint before the serialization, so changes during the serialization are detected on import
+        content_fingerprint = instance.content_fingerprint()
+        representation = {key: serializer.data for key, serializer in self._field_serializers(instance).items()}
+        representation["info"] = self._info(instance, content_fingerprint, export_hash(representation))
+        return representation
+
+    def iter_json(self) -> Iterator[str]:
+        """Encode the serialized event as JSON chunk by chunk.
+
+        Produces the same JSON as `json.dumps(self.data, ensure_ascii=False)`,
+        but participants, rooms and AKs are serialized and encoded one by one.
+        Hence, the export never needs to be held in memory as a whole and can be streamed to the client.
+        The export hash is computed along the way, which is why 'info' is the last field of the export.
+        """
+        event = self.instance
+        content_fingerprint = event.content_fingerprint()
+        hasher = hashlib.sha256()
+
+        separator = "{"
+        for key, serializer in self._field_serializers(event).items():
+            yield f"{separator}{json.dumps(key)}: "
+            if isinstance(serializer, serializers.ListSerializer):
+                yield from _iter_json_list(
+                        (serializer.child.to_representation(obj) for obj in _iter_objects(serializer.instance)),
+                        hasher,
+                )
+            elif hasattr(serializer, "iter_representation"):
+                yield from _iter_json_list(serializer.iter_representation(serializer.instance), hasher)
+            else:
+                representation = serializer.data
+                hasher.update(_canonical_json(representation).encode("utf-8"))
+                yield json.dumps(representation, ensure_ascii=False)
+            separator = ", "
+
+        info = self._info(event, content_fingerprint, hasher.hexdigest())
+        yield f'{separator}"info": {json.dumps(info, ensure_ascii=False)}}}'
@@ -0,0 +1,116 @@
+import json
+import math
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from AKModel.models import AKSlot, Event
+from AKSolverInterface.serializers import ExportEventSerializer
+
+
+class SolverCommandsTest(TestCase):
+    """Test the management commands for the export to and import from the solver."""
+
+    fixtures = ["model.json"]
+
+    def setUp(self):
+        self.event = Event.objects.get(pk=2)
+        self.tmp_dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(self.tmp_dir.cleanup)
+
+    def _export(self, *args) -> tuple[dict, str]:
+        output_path = Path(self.tmp_dir.name) / "export.json"
+        stderr = StringIO()
+        call_command("export_solver_input", self.event.slug, "-o", str(output_path), *args, stderr=stderr)
+        with output_path.open(encoding="utf-8") as ff:
+            return json.load(ff), stderr.getvalue()
+
+    def test_export(self):
+        """Test that the command exports the same data as the serializer and reports the phases."""
+        export, report = self._export()
+        # the options of the (unfiltered) export are embedded to repeat it on import
+        self.assertEqual(
+                export,
+                json.loads(json.dumps(ExportEventSerializer(
+                        self.event, export_options=export["info"]["export_options"]
+                ).data)),
+        )
+        self.assertIn("discretization", report)
+        self.assertIn("total", report)
+
+        # same result if written to stdout and with indentation
+        stdout = StringIO()
+        call_command("export_solver_input", self.event.slug, "--indent", "2", stdout=stdout, stderr=StringIO())
+        self.assertEqual(json.loads(stdout.getvalue()), export)
+
+    def test_export_filters(self):
+        """Test that the filter options of the export form are applied."""
+        category = self.event.akcategory_set.first()
+        export, _ = self._export("--categories", str(category.pk), "--fixed", "--no-preferences")
+        self.assertEqual(export["info"]["export_options"]["export_categories"], [category.pk])
+        self.assertEqual(
+                json.loads(json.dumps(ExportEventSerializer(
+                        self.event,
+                        filter_slots_cb=lambda queryset: queryset.filter(ak__category=category),
+                        export_scheduled_aks_as_fixed=True,
+                        export_preferences=False,
+                        export_options=export["info"]["export_options"],
+                ).data)),
+                export,
+        )
+
+        with self.assertRaises(CommandError):
+            self._export("--categories", "-1")
+        with self.assertRaises(CommandError):
+            call_command("export_solver_input", "no-such-event", stderr=StringIO())
+
+    def _write_schedule(self, export: dict) -> tuple[str, AKSlot]:
+        slot = AKSlot.objects.filter(event=self.event, fixed=False).first()
+        number_of_timeslots = math.ceil(float(slot.duration) / export["timeslots"]["info"]["duration"] - 1e-4)
+        block = next(block for block in export["timeslots"]["blocks"] if len(block) >= number_of_timeslots)
+        schedule = {
+            "input": export,
+            "scheduled_aks": [{
+                "ak_id": slot.pk,
+                "room_id": next(room["id"] for room in export["rooms"] if room["id"] != slot.room_id),
+                "timeslot_ids": [timeslot["id"] for timeslot in block[:number_of_timeslots]],
+                "participant_ids": [],
+            }],
+        }
+        schedule_path = Path(self.tmp_dir.name) / "schedule.json"
+        with schedule_path.open("w", encoding="utf-8") as ff:
+            json.dump(schedule, ff)
+        return str(schedule_path), slot
+
+    def test_import(self):
+        """Test the round trip of exporting an event and importing a schedule for it."""
+        export, _ = self._export()
+        schedule_path, slot = self._write_schedule(export)
+        room_id = slot.room_id
+
+        stdout = StringIO()
+        call_command("import_solver_output", self.event.slug, schedule_path, "--dry-run", stdout=stdout)
+        self.assertIn("rolled back", stdout.getvalue())
+        self.assertIn("consistency check", stdout.getvalue())
+        slot.refresh_from_db()
+        self.assertEqual(slot.room_id, room_id)
+
+        call_command("import_solver_output", self.event.slug, schedule_path, stdout=StringIO())
+        slot.refresh_from_db()
+        self.assertNotEqual(slot.room_id, room_id)
+
+        # the data changed since the export
+        slot.duration += 1
+        slot.save()
+        with self.assertRaisesMessage(CommandError, "Data has changed since the export"):
+            call_command("import_solver_output", self.event.slug, schedule_path, stdout=StringIO())
+
+    def test_invalid_import(self):
+        """Test that invalid solver outputs are rejected."""
+        schedule_path = Path(self.tmp_dir.name) / "schedule.json"
+        schedule_path.write_text(json.dumps({"input": {}, "scheduled_aks": []}), encoding="utf-8")
+        with self.assertRaisesMessage(CommandError, "Invalid solver output"):
+            call_command("import_solver_output", self.event.slug, str(schedule_path), stdout=StringIO())
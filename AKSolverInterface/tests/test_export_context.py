@@ -0,0 +1,156 @@
+from datetime import timedelta
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from AKModel.availability.models import Availability
+from AKModel.models import AK, AKOwner, AKRequirement, AKSlot, Event, Room
+from AKPreference.models import AKPreference, EventParticipant
+from AKPreference.serializers import ExportAKPreferencePerSlotSerializer
+from AKSolverInterface.export_context import ExportContext
+from AKSolverInterface.serializers import (
+    ExportFilteredAKSlotSerializer,
+    ExportParticipantAndDummiesSerializer,
+    ExportRoomSerializer,
+    ExportTimeslotBlockSerializer,
+)
+
+
+class ExportContextTest(TestCase):
+    """Test the export context that loads the related data of all exported objects at once."""
+
+    fixtures = ["model.json"]
+
+    def test_matches_model_methods(self):
+        """Test that the context constructs the same constraints as the model methods."""
+        for event in Event.objects.all():
+            export_context = ExportContext(event)
+            aks_to_ignore_category_for = set(AK.objects.filter(event=event)[:1])
+            for slot in AKSlot.objects.filter(event=event):
+                with self.subTest(slot=slot):
+                    self.assertEqual(export_context.slot_type_names(slot), list(slot.type_names))
+                    self.assertEqual(export_context.slot_conflict_pks(slot), sorted(slot.conflict_pks))
+                    self.assertEqual(export_context.slot_dependency_pks(slot), sorted(slot.depencency_pks))
+                    self.assertEqual(export_context.ak_owners(slot.ak_id), list(slot.ak.owners.all()))
+                    for fixed in [False, True]:
+                        self.assertEqual(export_context.slot_room_constraints(slot, fixed),
+                                         slot.get_room_constraints(fixed))
+                        self.assertEqual(
+                                export_context.slot_time_constraints(slot, fixed, aks_to_ignore_category_for),
+                                slot.get_time_constraints(fixed, aks_to_ignore_category_for),
+                        )
+            for room in Room.objects.filter(event=event):
+                with self.subTest(room=room):
+                    self.assertEqual(export_context.room_time_constraints(room), room.get_time_constraints())
+                    self.assertEqual(export_context.room_fulfilled_constraints(room),
+                                     room.get_fulfilled_room_constraints())
+            for participant in EventParticipant.objects.filter(event=event):
+                with self.subTest(participant=participant):
+                    self.assertEqual(export_context.participant_time_constraints(participant),
+                                     participant.get_time_constraints())
+                    self.assertEqual(export_context.participant_room_constraints(participant),
+                                     participant.get_room_constraints())
+
+    def _count_queries(self, event: Event) -> int:
+        with CaptureQueriesContext(connection) as queries:
+            context = {"export_context": ExportContext(event)}
+            _ = ExportFilteredAKSlotSerializer(
+                    event.slots, aks_to_ignore_category_for=set(), context=context
+            ).data
+            _ = ExportRoomSerializer(event.rooms, many=True, context=context).data
+        return len(queries)
+
+    def test_number_of_queries(self):
+        """Test that the number of queries to serialize slots and rooms does not depend on their number."""
+        event = Event.objects.get(pk=2)
+        number_of_queries = self._count_queries(event)
+
+        requirement = AKRequirement.objects.filter(event=event).first()
+        owner = AKOwner.objects.filter(event=event).first()
+        other_ak = AK.objects.filter(event=event).first()
+        for i in range(10):
+            ak = AK.objects.create(name=f"New AK {i}", short_name=f"new{i}", event=event, category=other_ak.category)
+            ak.owners.add(owner)
+            ak.requirements.add(requirement)
+            ak.types.set(other_ak.types.all())
+            ak.conflicts.add(other_ak)
+            ak.prerequisites.add(other_ak)
+            AKSlot.objects.create(ak=ak, event=event, duration=1)
+            room = Room.objects.create(name=f"New Room {i}", event=event, capacity=10)
+            room.properties.add(requirement)
+
+        self.assertEqual(self._count_queries(event), number_of_queries)
+
+    def test_fixed_slot_constraints(self):
+        """Test that the fixed slot constraints of the timeslots match a direct overlap check."""
+        for event in Event.objects.all():
+            slot = AKSlot.objects.filter(event=event).first()
+            # fix a slot at an odd time to also get partially overlapping timeslots
+            slot.start, slot.fixed = event.start + timedelta(hours=10, minutes=10), True
+            slot.save()
+
+            timeslots = [timeslot for block in event.discretize_timeslots() for timeslot in block]
+            fixed_slot_constraints = ExportTimeslotBlockSerializer(event)._fixed_slot_constraints(
+                    ExportContext(event), timeslots
+            )
+            for timeslot, constraints in zip(timeslots, fixed_slot_constraints):
+                with self.subTest(event=event, timeslot=timeslot):
+                    expected = [
+                        f"fixed-akslot-{ak_slot.pk}"
+                        for ak_slot in AKSlot.objects.filter(event=event, fixed=True, start__isnull=False)
+                        if Availability(event=event, start=ak_slot.start, end=ak_slot.end).overlaps(
+                            timeslot.avail, strict=True)
+                    ]
+                    self.assertCountEqual(constraints, expected)
+
+    def test_number_of_queries_dummy_participants(self):
+        """Test that the number of queries to create the dummy participants does not depend on the number of owners."""
+        event = Event.objects.get(pk=2)
+
+        def _count_queries():
+            with CaptureQueriesContext(connection) as queries:
+                _ = ExportParticipantAndDummiesSerializer(
+                        event,
+                        slots_qs=event.slots.exclude(pk=AKSlot.objects.filter(event=event).first().pk),
+                        filter_participants_cb=lambda queryset: queryset.none(),
+                ).data
+            return len(queries)
+
+        number_of_queries = _count_queries()
+        category = AK.objects.filter(event=event).first().category
+        for i in range(10):
+            ak = AK.objects.create(name=f"New AK {i}", short_name=f"new{i}", event=event, category=category)
+            ak.owners.add(AKOwner.objects.create(name=f"New Owner {i}", event=event))
+            AKSlot.objects.create(ak=ak, event=event, duration=1)
+        self.assertEqual(_count_queries(), number_of_queries)
+
+    def test_bulk_preferences(self):
+        """Test that the preferences serialized in bulk match the serialization per participant."""
+        for event in Event.objects.all():
+            # preferences of all levels, including AKs with several slots
+            for i in range(3):
+                participant = EventParticipant.objects.create(name=f"Participant {i}", event=event)
+                for j, ak in enumerate(AK.objects.filter(event=event)):
+                    AKPreference.objects.create(event=event, participant=participant, ak=ak, preference=(i + j) % 4)
+            participants = EventParticipant.objects.filter(event=event)
+            exported_slots = event.slots.exclude(pk=AKSlot.objects.filter(event=event).first().pk)
+            for slot_queryset in [None, exported_slots]:
+                preferences = ExportAKPreferencePerSlotSerializer.bulk_representation(
+                        AKPreference.objects.filter(participant__in=participants),
+                        ExportAKPreferencePerSlotSerializer.slots_per_ak(
+                                AKSlot.objects.filter(ak__event=event), slot_queryset
+                        ),
+                )
+                exported_slot_pks = set(
+                        (event.slots if slot_queryset is None else slot_queryset).values_list("pk", flat=True)
+                )
+                for participant in participants:
+                    with self.subTest(participant=participant, filtered=slot_queryset is not None):
+                        expected = [
+                            pref for pref in ExportAKPreferencePerSlotSerializer().to_representation(
+                                participant.export_preferences
+                            )
+                            if pref["ak_id"] in exported_slot_pks
+                        ]
+                        self.assertEqual(preferences.get(participant.pk, []), expected)
@@ -0,0 +1,160 @@
+import json
+import random
+import time
+from collections import defaultdict
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from AKModel.models import AKSlot, Event
+from AKSolverInterface.greedy_scheduler import GreedyScheduler, solve
+from AKSolverInterface.management.commands.benchmark_greedy_scheduler import synthetic_solver_input
+from AKSolverInterface.serializers import ExportEventSerializer
+from AKSolverInterface.utils import construct_schema_validator
+
+
+class GreedySchedulerTest(TestCase):
+    """Test the greedy draft scheduler."""
+
+    fixtures = ["model.json"]
+
+    def assertFeasible(self, solver_input: dict, scheduled_aks: list[dict]):  # pylint: disable=invalid-name
+        """Assert that the scheduled AKs satisfy all hard constraints of the solver input."""
+        positions = {}
+        timeslot_constraints = {}
+        for block_index, block in enumerate(solver_input["timeslots"]["blocks"]):
+            for index, timeslot in enumerate(block):
+                positions[timeslot["id"]] = (block_index, index)
+                timeslot_constraints[timeslot["id"]] = set(timeslot["fulfilled_time_constraints"])
+        rooms = {room["id"]: room for room in solver_input["rooms"]}
+        aks = {ak["id"]: ak for ak in solver_input["aks"]}
+        required_participants = defaultdict(list)
+        for participant in solver_input["participants"]:
+            for preference in participant["preferences"]:
+                if preference["required"]:
+                    required_participants[preference["ak_id"]].append(participant)
+
+        scheduled = {}
+        room_occupation = defaultdict(set)
+        participant_occupation = defaultdict(set)
+        for scheduled_ak in scheduled_aks:
+            ak, room = aks[scheduled_ak["ak_id"]], rooms[scheduled_ak["room_id"]]
+            timeslot_positions = [positions[timeslot_id] for timeslot_id in scheduled_ak["timeslot_ids"]]
+            with self.subTest(ak=ak["id"]):
+                self.assertEqual(len(timeslot_positions), ak["duration"])
+                block_index, first_index = timeslot_positions[0]
+                self.assertEqual(timeslot_positions,
+                                 [(block_index, first_index + i) for i in range(ak["duration"])])
+
+                participants = required_participants[ak["id"]]
+                time_constraints = set(ak["time_constraints"]).union(room["time_constraints"], *(
+                    participant["time_constraints"] for participant in participants
+                ))
+                room_constraints = set(ak["room_constraints"]).union(*(
+                    participant["room_constraints"] for participant in participants
+                ))
+                self.assertTrue(room_constraints.issubset(room["fulfilled_room_constraints"]))
+                for timeslot_id in scheduled_ak["timeslot_ids"]:
+                    self.assertTrue(time_constraints.issubset(timeslot_constraints[timeslot_id]))
+
+                self.assertTrue(room_occupation[room["id"]].isdisjoint(scheduled_ak["timeslot_ids"]))
+                room_occupation[room["id"]].update(scheduled_ak["timeslot_ids"])
+                for participant in participants:
+                    self.assertTrue(participant_occupation[participant["id"]].isdisjoint(scheduled_ak["timeslot_ids"]))
+                    participant_occupation[participant["id"]].update(scheduled_ak["timeslot_ids"])
+            scheduled[ak["id"]] = [positions[timeslot_id] for timeslot_id in scheduled_ak["timeslot_ids"]]
+
+        for ak_id, ak_positions in scheduled.items():
+            with self.subTest(ak=ak_id):
+                for other_id in aks[ak_id]["properties"]["conflicts"]:
+                    self.assertTrue(set(scheduled.get(other_id, [])).isdisjoint(ak_positions))
+                for other_id in aks[ak_id]["properties"]["dependencies"]:
+                    if other_id in scheduled:
+                        self.assertLess(max(scheduled[other_id]), min(ak_positions))
+
+    def test_events(self):
+        """Test that the schedules of the test events are valid solver outputs and can be imported."""
+        validator = construct_schema_validator("solver-output.schema.json")
+        for event in Event.objects.all():
+            with self.subTest(event=event):
+                solver_input = json.loads("".join(ExportEventSerializer(event).iter_json()))
+                output, unscheduled = solve(solver_input)
+                self.assertTrue(validator.is_valid(output))
+                self.assertFeasible(solver_input, output["scheduled_aks"])
+                self.assertEqual(len(output["scheduled_aks"]) + len(unscheduled), len(solver_input["aks"]))
+
+                event.schedule_from_json(output)
+                for scheduled_ak in output["scheduled_aks"]:
+                    slot = AKSlot.objects.get(pk=scheduled_ak["ak_id"])
+                    self.assertEqual(slot.room_id, scheduled_ak["room_id"])
+                    self.assertIsNotNone(slot.start)
+
+    def test_fixed_slots(self):
+        """Test that a draft schedule is kept if all scheduled slots are fixed."""
+        event = Event.objects.get(pk=2)
+        output, _ = solve(json.loads("".join(ExportEventSerializer(event).iter_json())))
+        event.schedule_from_json(output)
+        scheduled_slots = AKSlot.objects.filter(
+                pk__in=[scheduled_ak["ak_id"] for scheduled_ak in output["scheduled_aks"]]
+        )
+        scheduled_slots.update(fixed=True)
+        scheduled_slots = {slot.pk: (slot.room_id, slot.start) for slot in scheduled_slots}
+
+        solver_input = json.loads("".join(ExportEventSerializer(event).iter_json()))
+        output, unscheduled = solve(solver_input)
+        self.assertFalse(set(scheduled_slots) & set(unscheduled))
+        self.assertFeasible(solver_input, output["scheduled_aks"])
+        event.schedule_from_json(output)
+        for pk, (room_id, start) in scheduled_slots.items():
+            slot = AKSlot.objects.get(pk=pk)
+            self.assertEqual((slot.room_id, slot.start), (room_id, start))
+
+    def test_conflicts_and_dependencies(self):
+        """Test that conflicting AKs do not overlap and prerequisites come first, regardless of the priority."""
+        timeslots = [{"id": i, "info": {}, "fulfilled_time_constraints": []} for i in range(6)]
+        solver_input = {
+            "aks": [
+                # the dependent AK is most constrained (longest), hence placed first
+                {"id": 1, "duration": 3, "properties": {"conflicts": [], "dependencies": [2]},
+                 "room_constraints": [], "time_constraints": [], "info": {}},
+                {"id": 2, "duration": 1, "properties": {"conflicts": [], "dependencies": []},
+                 "room_constraints": [], "time_constraints": [], "info": {}},
+                {"id": 3, "duration": 2, "properties": {"conflicts": [1], "dependencies": []},
+                 "room_constraints": [], "time_constraints": [], "info": {}},
+            ],
+            "rooms": [{"id": room_id, "capacity": 10, "time_constraints": [], "fulfilled_room_constraints": [],
+                       "info": {}} for room_id in range(3)],
+            "timeslots": {"info": {"duration": 1.0, "blocknames": []}, "blocks": [timeslots]},
+            "participants": [],
+            "info": {},
+        }
+        scheduler = GreedyScheduler(solver_input)
+        scheduled_aks = scheduler.schedule()
+        self.assertEqual(scheduler.unscheduled, [])
+        self.assertFeasible(solver_input, scheduled_aks)
+
+    def test_synthetic_event(self):
+        """Test that a large synthetic event is scheduled feasibly within a few seconds."""
+        solver_input = synthetic_solver_input(500, random.Random(42))
+        start = time.perf_counter()
+        scheduler = GreedyScheduler(solver_input)
+        scheduled_aks = scheduler.schedule()
+        self.assertLess(time.perf_counter() - start, 5)
+        self.assertFeasible(solver_input, scheduled_aks)
+        self.assertGreater(len(scheduled_aks), 0.9 * len(solver_input["aks"]))
+
+    def test_command(self):
+        """Test that the command schedules and imports the event."""
+        event = Event.objects.get(pk=2)
+        AKSlot.objects.filter(event=event, fixed=False).update(start=None, room=None)
+
+        stdout = StringIO()
+        call_command("draft_schedule", event.slug, "--dry-run", stdout=stdout, stderr=StringIO())
+        self.assertIn("rolled back", stdout.getvalue())
+        self.assertFalse(AKSlot.objects.filter(event=event, fixed=False, start__isnull=False).exists())
+
+        stdout = StringIO()
+        call_command("draft_schedule", event.slug, stdout=stdout, stderr=StringIO())
+        self.assertIn("Successfully scheduled", stdout.getvalue())
+        self.assertTrue(AKSlot.objects.filter(event=event, fixed=False, start__isnull=False).exists())
@@ -24,6 +24,7 @@ from AKModel.models import (
 )
 from AKPreference.models import AKPreference, EventParticipant
 from AKSolverInterface.forms import JSONExportControlForm
+from AKSolverInterface.serializers import export_hash
 from AKSolverInterface.utils import construct_schema_validator
 
 
@@ -206,13 +207,15 @@ class JSONExportTest(TestCase):
                         info_keys[attr] = attr
                 self.assertEqual(
                         self.export_dict["info"].keys(),
-                        info_keys.keys(),
+                        info_keys.keys() | {"content_fingerprint", "export_hash", "export_options"},
                         "info keys not as expected",
                 )
                 for attr, attr_field in info_keys.items():
                     self.assertEqual(
                             getattr(self.event, attr_field), self.export_dict["info"][attr]
                     )
+                self.assertEqual(self.export_dict["info"]["content_fingerprint"], self.event.content_fingerprint())
+                self.assertEqual(self.export_dict["info"]["export_hash"], export_hash(self.export_dict))
 
     def test_ak_durations(self):
         """Test if all AK durations are correct."""
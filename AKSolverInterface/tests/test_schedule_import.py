@@ -0,0 +1,290 @@
+import io
+import json
+import math
+import random
+
+from django.contrib.messages import get_messages
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from AKModel.models import AK, AKSlot, Event
+from AKModel.tests.test_views import BasicViewTests
+from AKScheduling.models import ak_conflicts_changed_handler
+from AKSolverInterface.forms import JSONScheduleImportForm, export_serializer_kwargs
+from AKSolverInterface.serializers import ExportEventSerializer, export_hash
+from AKSolverInterface.utils import IncrementalJSONReader, iter_json_object
+
+
+class ScheduleImportConsistencyTest(TestCase):
+    """Test the check for data changes between the export to the solver and the import of a schedule."""
+
+    fixtures = ["model.json"]
+
+    def setUp(self):
+        self.event = Event.objects.get(pk=2)
+        self.category = self.event.akcategory_set.first()
+
+    def _filtered_export(self) -> dict:
+        return ExportEventSerializer(
+                self.event, **export_serializer_kwargs(self.event, {"export_categories": [self.category.pk]})
+        ).data
+
+    @staticmethod
+    def _schedule(export: dict) -> str:
+        # round trip through JSON as for a real import
+        return json.dumps({"input": export, "scheduled_aks": []})
+
+    def test_unchanged_filtered_export(self):
+        """Test that filtered exports are accepted without a new export if nothing changed."""
+        schedule = self._schedule(self._filtered_export())
+        with CaptureQueriesContext(connection) as import_queries:
+            self.assertEqual(self.event.schedule_from_json(schedule), 0)
+        with CaptureQueriesContext(connection) as export_queries:
+            self._filtered_export()
+        self.assertLess(len(import_queries), len(export_queries))
+
+    def test_changed_data(self):
+        """Test that changes since the export are detected and reported."""
+        schedule = self._schedule(self._filtered_export())
+        slot = AKSlot.objects.filter(event=self.event, ak__category=self.category).first()
+        slot.duration += 1
+        slot.save()
+        with self.assertRaisesMessage(ValueError, f"AK slots changed: {slot.pk}"):
+            self.event.schedule_from_json(schedule)
+
+    def test_filtered_export_after_unrelated_change(self):
+        """Test that filtered exports are compared to an export with the same options if the fingerprint changed."""
+        export = self._filtered_export()
+        self.assertEqual(export["info"]["export_options"], {"export_categories": [self.category.pk]})
+        schedule = self._schedule(export)
+
+        # slots that are not exported are changed
+        slot = AKSlot.objects.filter(event=self.event).exclude(ak__category=self.category).first()
+        slot.duration += 1
+        slot.save()
+        self.assertEqual(self.event.schedule_from_json(schedule), 0)
+
+    def test_modified_input(self):
+        """Test that modifications of the exported data are detected even if the event did not change."""
+        export = ExportEventSerializer(self.event).data
+        export["rooms"][0]["capacity"] += 1
+        with self.assertRaisesMessage(ValueError, f"Rooms changed: {export['rooms'][0]['id']}"):
+            self.event.schedule_from_json(self._schedule(export))
+
+    def test_export_without_hash(self):
+        """Test that unfiltered exports without hash and fingerprint are compared to a new export."""
+        export = ExportEventSerializer(self.event).data
+        self.assertEqual(export["info"]["export_hash"], export_hash(export))
+        del export["info"]["export_hash"]
+        del export["info"]["content_fingerprint"]
+        self.assertEqual(self.event.schedule_from_json(self._schedule(export)), 0)
+
+
+class ScheduleImportTest(TestCase):
+    """Test importing a schedule into an event."""
+
+    fixtures = ["model.json"]
+
+    def setUp(self):
+        self.event = Event.objects.get(pk=2)
+        self.export = ExportEventSerializer(self.event).data
+
+    def _schedule(self) -> dict:
+        """Schedule all non-fixed slots at the start of the first timeslot block that is long enough."""
+        blocks = self.export["timeslots"]["blocks"]
+        timeslot_duration = self.export["timeslots"]["info"]["duration"]
+        rooms = [room["id"] for room in self.export["rooms"]]
+        scheduled_aks = []
+        for i, slot in enumerate(AKSlot.objects.filter(event=self.event, fixed=False).order_by("pk")):
+            number_of_timeslots = math.ceil(float(slot.duration) / timeslot_duration - 1e-4)
+            block = next(block for block in blocks if len(block) >= number_of_timeslots)
+            scheduled_aks.append({
+                "ak_id": slot.pk,
+                "room_id": rooms[i % len(rooms)],
+                "timeslot_ids": [timeslot["id"] for timeslot in block[:number_of_timeslots]],
+                "participant_ids": [],
+            })
+        return {"input": self.export, "scheduled_aks": scheduled_aks}
+
+    @staticmethod
+    def _violations(event: Event) -> list[tuple]:
+        return sorted(
+                (cv.type, cv.level, cv.ak_owner_id, cv.room_id, cv.requirement_id,
+                 tuple(sorted(ak.pk for ak in cv.aks.all())), tuple(sorted(slot.pk for slot in cv.ak_slots.all())))
+                for cv in event.constraintviolation_set.all()
+        )
+
+    def test_import(self):
+        """Test that the scheduled slots are updated."""
+        schedule = self._schedule()
+        self.assertEqual(self.event.schedule_from_json(json.dumps(schedule)), len(schedule["scheduled_aks"]))
+        timeslots = {
+            timeslot.idx: timeslot.avail
+            for block in self.event.discretize_timeslots(
+                    slots_in_an_hour=1.0 / self.export["timeslots"]["info"]["duration"]
+            )
+            for timeslot in block
+        }
+        for scheduled_slot in schedule["scheduled_aks"]:
+            slot = AKSlot.objects.get(pk=scheduled_slot["ak_id"])
+            self.assertEqual(slot.room_id, scheduled_slot["room_id"])
+            self.assertEqual(slot.start, timeslots[scheduled_slot["timeslot_ids"][0]].start)
+
+    def test_constraint_violations(self):
+        """Test that the violations recomputed after the import match the checks of the individual slots and AKs."""
+        self.event.schedule_from_json(self._schedule())
+        violations = self._violations(self.event)
+        self.assertTrue(violations)
+
+        # the checks of the signal receivers must neither find new nor obsolete violations
+        with self.captureOnCommitCallbacks(execute=True):
+            for slot in AKSlot.objects.filter(event=self.event):
+                slot.save()
+        # the check for conflicts of a single slot replaces the violations of all slots of its AK,
+        # hence check the conflicts of the whole AKs again
+        with self.captureOnCommitCallbacks(execute=True):
+            for ak in AK.objects.filter(event=self.event):
+                ak_conflicts_changed_handler(sender=AK.conflicts.through, instance=ak, action="post_add")
+        self.assertEqual(self._violations(self.event), violations)
+
+    def test_number_of_queries(self):
+        """Test that the import needs fewer queries than saving the slots individually."""
+        schedule = self._schedule()
+        with CaptureQueriesContext(connection) as import_queries:
+            self.event.schedule_from_json(schedule)
+
+        slots = list(AKSlot.objects.filter(event=self.event, fixed=False))
+        with CaptureQueriesContext(connection) as save_queries:
+            for slot in slots:
+                # every slot is saved (and checked) in a transaction of its own
+                with self.captureOnCommitCallbacks(execute=True):
+                    slot.save()
+        self.assertLess(len(import_queries), len(save_queries))
+
+
+class ScheduleUploadTest(BasicViewTests, TestCase):
+    """Test importing a schedule from an uploaded file, which is parsed incrementally."""
+
+    fixtures = ["model.json"]
+
+    def setUp(self):
+        super().setUp()
+        self.event = Event.objects.get(pk=2)
+        export = ExportEventSerializer(self.event).data
+        slot = AKSlot.objects.filter(event=self.event, fixed=False, start__isnull=False).first()
+        # move a scheduled slot to the first timeslots of the event that are long enough
+        timeslot_duration = export["timeslots"]["info"]["duration"]
+        number_of_timeslots = math.ceil(float(slot.duration) / timeslot_duration - 1e-4)
+        block = next(block for block in export["timeslots"]["blocks"] if len(block) >= number_of_timeslots)
+        self.slot = slot
+        self.schedule = {
+            "input": export,
+            "scheduled_aks": [{
+                "ak_id": slot.pk,
+                "room_id": next(room["id"] for room in export["rooms"] if room["id"] != slot.room_id),
+                "timeslot_ids": [timeslot["id"] for timeslot in block[:number_of_timeslots]],
+                "participant_ids": [],
+            }],
+        }
+
+    @staticmethod
+    def _upload(content: str):
+        return SimpleUploadedFile("schedule.json", content.encode("utf-8"), content_type="application/json")
+
+    def _form(self, content: str) -> JSONScheduleImportForm:
+        return JSONScheduleImportForm(data={}, files={"json_file": self._upload(content)})
+
+    def test_upload(self):
+        """Test that uploaded schedules are imported."""
+        self.client.force_login(self.admin_user)
+        response = self.client.post(
+                reverse("admin:ak_schedule_json_import", kwargs={"event_slug": self.event.slug}),
+                data={"json_file": self._upload(json.dumps(self.schedule))},
+        )
+        self.assertRedirects(response, reverse("admin:event_status", kwargs={"event_slug": self.event.slug}),
+                             fetch_redirect_response=False)
+        self.assertEqual([message.level_tag for message in get_messages(response.wsgi_request)], ["success"])
+        self.slot.refresh_from_db()
+        self.assertEqual(self.slot.room_id, self.schedule["scheduled_aks"][0]["room_id"])
+
+    def test_streamed_scheduled_aks(self):
+        """Test that the scheduled AKs are only parsed when the schedule is applied."""
+        form = self._form(json.dumps(self.schedule))
+        self.assertTrue(form.is_valid(), form.errors)
+        self.assertEqual(form.cleaned_data["data"]["input"], self.schedule["input"])
+        self.assertNotIsInstance(form.cleaned_data["data"]["scheduled_aks"], list)
+        self.assertEqual(list(form.cleaned_data["data"]["scheduled_aks"]), self.schedule["scheduled_aks"])
+
+        # if the scheduled AKs precede the input, they have to be parsed in advance
+        form = self._form(json.dumps(
+                {"scheduled_aks": self.schedule["scheduled_aks"], "input": self.schedule["input"]}
+        ))
+        self.assertTrue(form.is_valid(), form.errors)
+        self.assertEqual(form.cleaned_data["data"], self.schedule)
+
+    def test_invalid_upload(self):
+        """Test that invalid uploads are rejected, also if the errors are found while importing."""
+        for content in [
+            "",
+            json.dumps({"input": self.schedule["input"]}),
+            json.dumps(self.schedule | {"unexpected": 1}),
+            json.dumps(self.schedule)[:-1],
+            json.dumps({"input": {}, "scheduled_aks": []}),
+            json.dumps(self.schedule | {"scheduled_aks": self.schedule["scheduled_aks"] * 2}),
+            json.dumps(self.schedule | {"scheduled_aks": self.schedule["scheduled_aks"] + [{"ak_id": -1}]}),
+        ]:
+            with self.subTest(content=content[-100:]):
+                form = self._form(content)
+                if form.is_valid():
+                    with self.assertRaises(ValidationError):
+                        self.event.schedule_from_json(form.cleaned_data["data"])
+                self.slot.refresh_from_db()
+                self.assertNotEqual(self.slot.room_id, self.schedule["scheduled_aks"][0]["room_id"])
+
+
+class IncrementalJSONReaderTest(TestCase):
+    """Test the incremental parsing of JSON documents."""
+
+    @staticmethod
+    def _parse(content: str, chunk_size: int) -> dict:
+        reader = IncrementalJSONReader(io.BytesIO(content.encode("utf-8")), chunk_size=chunk_size)
+        return {
+            key: list(value) if key == "items" else value
+            for key, value in iter_json_object(reader, streamed_keys={"items"})
+        }
+
+    def test_matches_json_loads(self):
+        """Test that documents split into chunks of arbitrary sizes are parsed like by `json.loads`."""
+        rnd = random.Random(42)
+
+        def _random_value(depth=0):
+            kind = rnd.randrange(6 if depth < 3 else 4)
+            if kind == 0:
+                return rnd.choice([rnd.randrange(-10 ** 6, 10 ** 6), rnd.random() * 10 ** rnd.randrange(-20, 20)])
+            if kind == 1:
+                return rnd.choice([True, False, None])
+            if kind in (2, 3):
+                return "".join(rnd.choice('ab "\\äü€\n') for _ in range(rnd.randrange(10)))
+            if kind == 4:
+                return [_random_value(depth + 1) for _ in range(rnd.randrange(5))]
+            return {str(rnd.randrange(100)): _random_value(depth + 1) for _ in range(rnd.randrange(5))}
+
+        for _ in range(100):
+            document = {"a": _random_value(), "items": [_random_value() for _ in range(rnd.randrange(5))],
+                        "b": _random_value()}
+            content = json.dumps(document, ensure_ascii=rnd.random() < 0.5, indent=rnd.choice([None, 2]))
+            for chunk_size in [1, 2, 3, 7, 1024]:
+                with self.subTest(content=content, chunk_size=chunk_size):
+                    self.assertEqual(self._parse(content, chunk_size), json.loads(content))
+
+    def test_invalid(self):
+        """Test that invalid documents are rejected."""
+        for content in ["", "[1]", "{", '{"a": 1', '{"a": 1}x', '{"a" 1}', "{1: 2}", '{"items": [1 2]}', '{"a": 1.']:
+            for chunk_size in [1, 1024]:
+                with self.subTest(content=content, chunk_size=chunk_size):
+                    with self.assertRaises(json.JSONDecodeError):
+                        self._parse(content, chunk_size)
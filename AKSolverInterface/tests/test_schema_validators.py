@@ -0,0 +1,41 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.test import SimpleTestCase
+from jsonschema import Draft202012Validator
+from referencing import Registry
+
+from AKSolverInterface.forms import JSONScheduleImportForm
+from AKSolverInterface.utils import construct_schema_validator, retrieve_schema_from_disk, schema_registry
+
+
+class SchemaValidatorTest(SimpleTestCase):
+    """Test the process-wide cached schema validators."""
+
+    def test_registry_contains_all_schemas(self):
+        """Test that all schemas are loaded into the registry in advance."""
+        schema_paths = list((Path(settings.BASE_DIR) / "schemas").rglob("*.json"))
+        self.assertTrue(schema_paths)
+        for schema_path in schema_paths:
+            uri = str(schema_path.relative_to(settings.BASE_DIR))
+            with self.subTest(uri=uri):
+                self.assertIn(uri, schema_registry())
+
+    def test_validators_are_shared(self):
+        """Test that forms share their validator and that it validates like a newly constructed one."""
+        self.assertIs(JSONScheduleImportForm().json_schema_validator, JSONScheduleImportForm().json_schema_validator)
+
+        registry = Registry(retrieve=retrieve_schema_from_disk)
+        schema = registry.get_or_retrieve("schemas/solver-output.schema.json").value.contents
+        uncached_validator = Draft202012Validator(schema=schema, registry=registry)
+        for instance in [
+            {},
+            {"input": {}, "scheduled_aks": [{"ak_id": -1}]},
+            {"input": {"aks": [], "rooms": [], "participants": [], "timeslots": {}}, "scheduled_aks": []},
+        ]:
+            with self.subTest(instance=instance):
+                self.assertEqual(
+                        [error.message for error in construct_schema_validator("solver-output.schema.json")
+                            .iter_errors(instance)],
+                        [error.message for error in uncached_validator.iter_errors(instance)],
+                )
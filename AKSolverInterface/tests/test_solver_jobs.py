@@ -0,0 +1,185 @@
+import json
+import os
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from AKModel.models import AKSlot, Event
+from AKModel.tests.test_views import BasicViewTests
+from AKSolverInterface.forms import SolverJobForm
+from AKSolverInterface.jobs import create_solver_jobs, fail_stale_solver_jobs, import_solver_job, run_solver_job
+from AKSolverInterface.models import SolverJob
+
+DUMMY_SOLVER_COMMAND = settings.SOLVER_CONFIGURATIONS["dummy"]["command"]
+
+
+class SolverJobTest(BasicViewTests, TestCase):
+    """Test running local solvers on the export of an event and importing their results."""
+
+    fixtures = ["model.json"]
+
+    def setUp(self):
+        super().setUp()
+        self.event = Event.objects.get(pk=2)
+        self.tmp_dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(self.tmp_dir.cleanup)
+        solver_settings = override_settings(
+                SOLVER_JOB_DIR=self.tmp_dir.name,
+                SOLVER_CONFIGURATIONS={
+                    "dummy": {"command": DUMMY_SOLVER_COMMAND, "timeout": 60},
+                    "other": {"command": DUMMY_SOLVER_COMMAND, "timeout": 60},
+                    "slow": {"command": [*DUMMY_SOLVER_COMMAND, "--sleep", "10"], "timeout": 0.5},
+                    "failing": {"command": [*DUMMY_SOLVER_COMMAND, "--exit-code", "3"], "timeout": 60},
+                    "missing": {"command": [os.path.join(self.tmp_dir.name, "no-such-solver")], "timeout": 60},
+                },
+        )
+        solver_settings.enable()
+        self.addCleanup(solver_settings.disable)
+
+    def _form_data(self, solvers: list[str]) -> dict:
+        return {
+            "solvers": solvers,
+            "export_preferences": "on",
+            "export_categories": [category.pk for category in self.event.akcategory_set.all()],
+            "export_tracks": [track.pk for track in self.event.aktrack_set.all()],
+            "export_types": [ak_type.pk for ak_type in self.event.aktype_set.all()],
+        }
+
+    def _create_jobs(self, solvers: list[str]) -> list[SolverJob]:
+        form = SolverJobForm(data=self._form_data(solvers), event=self.event)
+        self.assertTrue(form.is_valid(), form.errors)
+        return create_solver_jobs(self.event, solvers, form)
+
+    def test_run_and_import(self):
+        """Test that a finished job can be imported and schedules the slots as computed by the solver."""
+        job, other_job = self._create_jobs(["dummy", "other"])
+        self.assertEqual(job.status, SolverJob.Status.PENDING)
+        self.assertIsNotNone(job.export_duration)
+        # every job gets the same export
+        with open(job.input_path, encoding="utf-8") as ff, open(other_job.input_path, encoding="utf-8") as other_ff:
+            self.assertEqual(json.load(ff), json.load(other_ff))
+
+        job = run_solver_job(job.pk)
+        self.assertEqual(job.status, SolverJob.Status.FINISHED, job.log)
+        self.assertEqual(job.return_code, 0)
+        self.assertIsNotNone(job.solve_duration)
+        self.assertIn("Scheduled", job.log)
+
+        with open(job.output_path, encoding="utf-8") as ff:
+            scheduled_aks = json.load(ff)["scheduled_aks"]
+        self.assertTrue(scheduled_aks)
+
+        number_of_slots_changed = import_solver_job(job)
+        job.refresh_from_db()
+        self.assertEqual(job.status, SolverJob.Status.IMPORTED)
+        self.assertEqual(job.slots_imported, number_of_slots_changed)
+        self.assertIsNotNone(job.import_duration)
+        for scheduled_ak in scheduled_aks:
+            slot = AKSlot.objects.get(pk=scheduled_ak["ak_id"])
+            self.assertEqual(slot.room_id, scheduled_ak["room_id"])
+
+        # imported jobs cannot be imported again
+        with self.assertRaises(ValueError):
+            import_solver_job(job)
+
+    def test_filtered_import(self):
+        """Test that jobs with filtered exports can be imported after the content fingerprint changed."""
+        category = self.event.akcategory_set.first()
+        form = SolverJobForm(data={**self._form_data(["dummy"]), "export_categories": [category.pk]},
+                             event=self.event)
+        self.assertTrue(form.is_valid(), form.errors)
+        job = run_solver_job(create_solver_jobs(self.event, ["dummy"], form)[0].pk)
+        self.assertEqual(job.status, SolverJob.Status.FINISHED, job.log)
+
+        # slots that are not exported are changed
+        slot = AKSlot.objects.filter(event=self.event).exclude(ak__category=category).first()
+        slot.duration += 1
+        slot.save()
+        import_solver_job(job)
+        job.refresh_from_db()
+        self.assertEqual(job.status, SolverJob.Status.IMPORTED)
+
+    def test_failures(self):
+        """Test that failing, timed out and misconfigured solvers are tracked."""
+        slow_job, failing_job, missing_job = self._create_jobs(["slow", "failing", "missing"])
+
+        slow_job = run_solver_job(slow_job.pk)
+        self.assertEqual(slow_job.status, SolverJob.Status.TIMEOUT)
+        self.assertLess(slow_job.solve_duration, 10)
+
+        failing_job = run_solver_job(failing_job.pk)
+        self.assertEqual(failing_job.status, SolverJob.Status.FAILED)
+        self.assertEqual(failing_job.return_code, 3)
+        self.assertIn("Failing with exit code 3", failing_job.log)
+
+        missing_job = run_solver_job(missing_job.pk)
+        self.assertEqual(missing_job.status, SolverJob.Status.FAILED)
+        self.assertIsNone(missing_job.return_code)
+
+        for job in [slow_job, failing_job, missing_job]:
+            with self.assertRaises(ValueError):
+                import_solver_job(job)
+
+        form = SolverJobForm(data=self._form_data(["dummy"]), event=self.event)
+        self.assertTrue(form.is_valid(), form.errors)
+        with self.assertRaises(ValueError):
+            create_solver_jobs(self.event, ["unknown"], form)
+
+    def test_stale_jobs(self):
+        """Test that jobs abandoned by their worker are marked as failed."""
+        pending_job, running_job, stale_pending_job, stale_running_job = \
+            self._create_jobs(["dummy", "dummy", "dummy", "other"])
+        now = timezone.now()
+        SolverJob.objects.filter(pk=running_job.pk).update(status=SolverJob.Status.RUNNING, started=now)
+        SolverJob.objects.filter(pk=stale_pending_job.pk).update(
+                created=now - timedelta(seconds=settings.SOLVER_PENDING_TIMEOUT + 1))
+        SolverJob.objects.filter(pk=stale_running_job.pk).update(status=SolverJob.Status.RUNNING,
+                                                                 started=now - timedelta(hours=1))
+
+        self.client.force_login(self.admin_user)
+        response = self.client.get(reverse("admin:solver_jobs", kwargs={"event_slug": self.event.slug}))
+        self.assertTrue(response.context["has_active_jobs"])
+        self.assertEqual(SolverJob.objects.get(pk=pending_job.pk).status, SolverJob.Status.PENDING)
+        self.assertEqual(SolverJob.objects.get(pk=running_job.pk).status, SolverJob.Status.RUNNING)
+        for job in [stale_pending_job, stale_running_job]:
+            job.refresh_from_db()
+            self.assertEqual(job.status, SolverJob.Status.FAILED)
+            self.assertIsNotNone(job.finished)
+        # a stale job is not run anymore once a worker picks it up
+        self.assertEqual(run_solver_job(stale_pending_job.pk).status, SolverJob.Status.FAILED)
+
+        # running jobs of solvers that are no longer configured are stale as well
+        SolverJob.objects.filter(pk=running_job.pk).update(solver="removed")
+        pending_job.delete()
+        self.assertEqual(fail_stale_solver_jobs(), 1)
+        response = self.client.get(reverse("admin:solver_jobs", kwargs={"event_slug": self.event.slug}))
+        self.assertFalse(response.context["has_active_jobs"])
+
+    def test_views(self):
+        """Test starting jobs and importing their results from the admin view."""
+        self.client.force_login(self.admin_user)
+        url = reverse("admin:solver_jobs", kwargs={"event_slug": self.event.slug})
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            response = self.client.post(url, data=self._form_data(["dummy", "failing"]))
+        self.assertRedirects(response, url, fetch_redirect_response=False)
+        # the jobs are submitted to the worker pool once the transaction is committed
+        self.assertEqual(len(callbacks), 2)
+
+        jobs = SolverJob.objects.filter(event=self.event)
+        for job in jobs:
+            run_solver_job(job.pk)
+        response = self.client.get(url)
+        self.assertContains(response, "Finished")
+        self.assertContains(response, "Failed")
+
+        for job in jobs:
+            response = self.client.post(
+                    reverse("admin:solver_job_import", kwargs={"event_slug": self.event.slug, "pk": job.pk})
+            )
+            self.assertRedirects(response, url, fetch_redirect_response=False)
+        self.assertEqual(SolverJob.objects.get(event=self.event, solver="dummy").status, SolverJob.Status.IMPORTED)
+        self.assertEqual(SolverJob.objects.get(event=self.event, solver="failing").status, SolverJob.Status.FAILED)
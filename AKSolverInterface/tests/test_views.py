@@ -1,4 +1,13 @@
+from unittest.mock import patch
+
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from AKModel.models import AKSlot, Event
 
 from AKModel.tests.test_views import BasicViewTests
 
@@ -13,4 +22,93 @@ class ModelViewTests(BasicViewTests, TestCase):
     VIEWS_STAFF_ONLY = [
         ("admin:ak_json_export", {"event_slug": "kif42"}),
         ("admin:ak_schedule_json_import", {"event_slug": "kif42"}),
+        ("admin:solver_jobs", {"event_slug": "kif42"}),
     ]
+
+    def test_json_export_download(self):
+        """Test that the streamed download contains the same JSON as the export view."""
+        self.client.force_login(self.admin_user)
+        event = Event.objects.get(slug="kif42")
+        data = {
+            "export_scheduled_aks_as_fixed": "on",
+            "export_preferences": "on",
+            "export_categories": [category.pk for category in event.akcategory_set.all()],
+        }
+
+        response = self.client.post(reverse("admin:ak_json_export_download", kwargs={"event_slug": event.slug}),
+                                    data=data)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertIn("attachment", response["Content-Disposition"])
+
+        export_response = self.client.post(reverse("admin:ak_json_export", kwargs={"event_slug": event.slug}),
+                                           data=data)
+        self.assertEqual(
+                b"".join(response.streaming_content).decode("utf-8"),
+                export_response.context["json_data_oneline"],
+        )
+
+    def test_json_export_cache(self):
+        """Test that unchanged exports are served from the cache and changes are exported."""
+        self.client.force_login(self.admin_user)
+        event = Event.objects.get(slug="kif42")
+        url = reverse("admin:ak_json_export", kwargs={"event_slug": event.slug})
+        data = {"export_categories": [category.pk for category in event.akcategory_set.all()]}
+
+        response = self.client.post(url, data=data)
+        self.assertTrue(response.context["is_valid"])
+        self.assertIn("ETag", response)
+
+        with CaptureQueriesContext(connection) as uncached_queries:
+            self.client.post(url, data={**data, "export_preferences": "on"})
+        with CaptureQueriesContext(connection) as cached_queries:
+            cached_response = self.client.post(url, data={**data, "export_preferences": "on"})
+        self.assertLess(len(cached_queries), len(uncached_queries))
+        self.assertNotEqual(cached_response["ETag"], response["ETag"])
+
+        # a change of the event content produces a new export
+        slot = AKSlot.objects.filter(event=event).first()
+        slot.duration += 1
+        slot.save()
+        changed_response = self.client.post(url, data={**data, "export_preferences": "on"})
+        self.assertNotEqual(changed_response["ETag"], cached_response["ETag"])
+        self.assertNotEqual(changed_response.context["json_data"], cached_response.context["json_data"])
+
+    def test_json_export_download_conditional(self):
+        """Test that the download can be requested with GET and supports conditional requests."""
+        self.client.force_login(self.admin_user)
+        event = Event.objects.get(slug="kif42")
+        url = reverse("admin:ak_json_export_download", kwargs={"event_slug": event.slug})
+        data = {"export_categories": [category.pk for category in event.akcategory_set.all()]}
+
+        response = self.client.get(url, data=data)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get(url, data=data, HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 304)
+
+        AKSlot.objects.filter(event=event).first().save()
+        self.assertEqual(self.client.get(url, data=data, HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 200)
+
+    def test_json_export_download_error(self):
+        """Test that a failing discretization is reported and redirects to the export form."""
+        self.client.force_login(self.admin_user)
+        event = Event.objects.get(slug="kif42")
+        url = reverse("admin:ak_json_export_download", kwargs={"event_slug": event.slug})
+        data = {"export_categories": [category.pk for category in event.akcategory_set.all()]}
+
+        def fail_immediately(_event):
+            raise ValueError("Broken event")
+            yield  # pylint: disable=unreachable
+
+        def fail_after_first_block(_event):
+            yield []
+            raise ValueError("Broken event")
+
+        for discretize_timeslots in [fail_immediately, fail_after_first_block]:
+            with self.subTest(discretize_timeslots=discretize_timeslots.__name__):
+                # make sure the export is not served from the cache
+                cache.clear()
+                with patch.object(Event, "discretize_timeslots", discretize_timeslots):
+                    response = self.client.post(url, data=data)
+                self.assertRedirects(response, reverse("admin:ak_json_export", kwargs={"event_slug": event.slug}),
+                                     fetch_redirect_response=False)
+                self.assertTrue(any("Broken event" in str(message) for message in get_messages(response.wsgi_request)))
@@ -1,6 +1,12 @@
 from django.urls import path
 
-from .views import AKJSONExportView, AKScheduleJSONImportView
+from .views import (
+    AKJSONExportDownloadView,
+    AKJSONExportView,
+    AKScheduleJSONImportView,
+    SolverJobImportView,
+    SolverJobsView,
+)
 
 
 def get_admin_urls_solver_interface(admin_site):
@@ -10,9 +16,24 @@ def get_admin_urls_solver_interface(admin_site):
                 admin_site.admin_view(AKJSONExportView.as_view()),
                 name="ak_json_export",
         ),
+        path(
+                "<slug:event_slug>/ak-json-export/download/",
+                admin_site.admin_view(AKJSONExportDownloadView.as_view()),
+                name="ak_json_export_download",
+        ),
         path(
                 "<slug:event_slug>/ak-schedule-json-import/",
                 admin_site.admin_view(AKScheduleJSONImportView.as_view()),
                 name="ak_schedule_json_import",
         ),
+        path(
+                "<slug:event_slug>/solver-jobs/",
+                admin_site.admin_view(SolverJobsView.as_view()),
+                name="solver_jobs",
+        ),
+        path(
+                "<slug:event_slug>/solver-jobs/<int:pk>/import/",
+                admin_site.admin_view(SolverJobImportView.as_view()),
+                name="solver_job_import",
+        ),
     ]
@@ -1,9 +1,18 @@
+import codecs
+import functools
+import json
+import re
+import time
+from collections.abc import Generator
+from contextlib import contextmanager
 from pathlib import Path
+from typing import Any, BinaryIO
 
 import referencing.retrieval
+from django.db import connection
 from jsonschema import Draft202012Validator
 from jsonschema.protocols import Validator
-from referencing import Registry
+from referencing import Registry, Resource
 
 from AKPlanning import settings
 
@@ -29,15 +38,219 @@ def retrieve_schema_from_disk(uri: str) -> str:
         return ff.read()
 
 
+@functools.cache
+def schema_registry() -> Registry:
+    """Construct a registry containing all schemas from the 'schemas' directory.
+
+    The schemas are read and crawled only once per process,
+    hence references between them can be resolved without accessing the disk.
+    Schemas that are not found in the registry are still retrieved from disk.
+    """
+    schema_base_path = Path(settings.BASE_DIR).resolve()
+    resources = []
+    for schema_path in sorted((schema_base_path / "schemas").rglob("*.json")):
+        with schema_path.open("r") as ff:
+            resources.append(
+                    (str(schema_path.relative_to(schema_base_path)), Resource.from_contents(json.load(ff)))
+            )
+    return Registry(retrieve=retrieve_schema_from_disk).with_resources(resources).crawl()
+
+
+@functools.cache
+def _cached_schema_validator(schema: str) -> Validator:
+    """Construct the validator for a schema from the 'schemas' directory once per process."""
+    registry = schema_registry()
+    schema_uri = str(Path("schemas") / schema)
+    return Draft202012Validator(schema=registry.get_or_retrieve(schema_uri).value.contents, registry=registry)
+
+
+@functools.cache
+def _cached_schema_validator_for_ref(schema: str) -> Validator:
+    """Construct the validator for a subschema of a schema from the 'schemas' directory once per process."""
+    return Draft202012Validator(schema={"$ref": str(Path("schemas") / schema)}, registry=schema_registry())
+
+
 def construct_schema_validator(schema: str | dict) -> Validator:
     """Construct a validator for a JSON schema.
 
     In particular, all schemas from the 'schemas' directory
     are loaded into the registry.
+    Validators for schemas from this directory (given by their file name,
+    optionally followed by a JSON pointer to a subschema) are cached
+    and shared between all callers, which is safe since validators are immutable.
     """
-    registry = Registry(retrieve=retrieve_schema_from_disk)
-
     if isinstance(schema, str):
-        schema_uri = str(Path("schemas") / schema)
-        schema = registry.get_or_retrieve(schema_uri).value.contents
-    return Draft202012Validator(schema=schema, registry=registry)
+        if "#" in schema:
+            # subschema of a schema file, e.g. 'solver-output.schema.json#/properties/input'
+            return _cached_schema_validator_for_ref(schema)
+        return _cached_schema_validator(schema)
+    return Draft202012Validator(schema=schema, registry=schema_registry())
+
+
+def preload_schema_validators():
+    """Load all schemas and construct the validators for the top-level schemas in advance.
+
+    Called when the app is ready (if `PRELOAD_SCHEMA_VALIDATORS` is set) such that the first request does not
+    need to read the schemas from disk.
+    """
+    schema_base_path = Path(settings.BASE_DIR).resolve()
+    for schema_path in sorted((schema_base_path / "schemas").glob("*.schema.json")):
+        construct_schema_validator(schema_path.name)
+
+
+JSON_READ_CHUNK_SIZE = 64 * 1024
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_NUMBER_CONTINUATION = frozenset("0123456789+-.eE")
+
+
+class IncrementalJSONReader:
+    """Read a JSON document from a binary stream (e.g., an uploaded file) piece by piece.
+
+    Only the part of the document that is currently parsed is kept in memory,
+    hence the items of large arrays can be processed one after the other (cf. `iter_json_object`)
+    without reading the whole document into a string first.
+    """
+
+    def __init__(self, stream: BinaryIO, chunk_size: int = JSON_READ_CHUNK_SIZE):
+        self._stream = stream
+        self._chunk_size = chunk_size
+        self._bytes_decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        self._json_decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+
+    def _read(self, size: int):
+        """Append the next `size` bytes of the stream to the buffer (dropping the part already parsed)."""
+        data = self._stream.read(size)
+        self._eof = not data
+        self._buffer = self._buffer[self._pos:] + self._bytes_decoder.decode(data, final=self._eof)
+        self._pos = 0
+
+    def error(self, msg: str) -> json.JSONDecodeError:
+        """Construct a decoding error at the current position."""
+        return json.JSONDecodeError(msg, self._buffer, self._pos)
+
+    def peek(self) -> str:
+        """Skip whitespace and return the next character without consuming it (empty string at the end)."""
+        while True:
+            self._pos = _WHITESPACE.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer) or self._eof:
+                return self._buffer[self._pos:self._pos + 1]
+            self._read(self._chunk_size)
+
+    def expect(self, char: str):
+        """Consume the next (non-whitespace) character, which has to be `char`."""
+        if self.peek() != char:
+            raise self.error(f"Expecting {char!r}")
+        self._pos += 1
+
+    def value(self) -> Any:
+        """Parse the next JSON value completely."""
+        self.peek()
+        size = self._chunk_size
+        while True:
+            try:
+                value, end = self._json_decoder.raw_decode(self._buffer, self._pos)
+                # a number at the end of the buffer (or followed by a partial fraction or exponent)
+                # might continue in the next chunk
+                incomplete = end == len(self._buffer) or (
+                        isinstance(value, (int, float)) and self._buffer[end] in _NUMBER_CONTINUATION
+                )
+                if not incomplete or self._eof:
+                    self._pos = end
+                    return value
+            except json.JSONDecodeError as ex:
+                if self._eof:
+                    raise self.error(ex.msg) from ex
+            # the value is incomplete, double the size of the next read to parse large values in linear time
+            self._read(size)
+            size *= 2
+
+    def iter_array(self) -> Generator[Any, None, None]:
+        """Parse the next JSON array and yield its items one after the other."""
+        self.expect("[")
+        if self.peek() == "]":
+            self.expect("]")
+            return
+        while True:
+            yield self.value()
+            if self.peek() != ",":
+                self.expect("]")
+                return
+            self.expect(",")
+
+
+def iter_json_object(reader: IncrementalJSONReader,
+                     streamed_keys: set[str] | None = None) -> Generator[tuple[str, Any], None, None]:
+    """Parse a JSON document consisting of an object and yield its members as (key, value) pairs.
+
+    :param reader: Reader for the document.
+    :param streamed_keys: Keys of members whose (array) values are not parsed at once.
+        Instead, a generator of their items is yielded as value. Items not consumed when
+        the next member is requested are skipped.
+    :raises json.JSONDecodeError: if the document cannot be parsed.
+    """
+    streamed_keys = streamed_keys or set()
+    reader.expect("{")
+    if reader.peek() == "}":
+        reader.expect("}")
+    else:
+        while True:
+            key = reader.value()
+            if not isinstance(key, str):
+                raise reader.error("Expecting property name enclosed in double quotes")
+            reader.expect(":")
+            if key in streamed_keys and reader.peek() == "[":
+                items = reader.iter_array()
+                yield key, items
+                for _ in items:
+                    pass
+            else:
+                yield key, reader.value()
+            if reader.peek() != ",":
+                reader.expect("}")
+                break
+            reader.expect(",")
+    if reader.peek():
+        raise reader.error("Extra data")
+
+
+class PhaseTimer:
+    """Measure the duration and the number of database queries of consecutive phases, e.g., of an export.
+
+    Usage::
+
+        timer = PhaseTimer()
+        with timer.phase("serialization"):
+            ...
+        print("\\n".join(timer.report()))
+    """
+
+    def __init__(self):
+        self.phases: list[tuple[str, float, int]] = []
+
+    @contextmanager
+    def phase(self, name: str):
+        """Measure the phase executed within this context (also if it fails)."""
+        number_of_queries = 0
+
+        def _count_queries(execute, sql, params, many, context):
+            nonlocal number_of_queries
+            number_of_queries += 1
+            return execute(sql, params, many, context)
+
+        start = time.perf_counter()
+        try:
+            with connection.execute_wrapper(_count_queries):
+                yield
+        finally:
+            self.phases.append((name, time.perf_counter() - start, number_of_queries))
+
+    def report(self) -> list[str]:
+        """Format the measured phases (and their total) as lines of a table."""
+        width = max([len(name) for name, _, _ in self.phases] + [len("total")])
+        rows = self.phases + [(
+            "total", sum(duration for _, duration, _ in self.phases), sum(queries for _, _, queries in self.phases)
+        )]
+        return [f"{name:<{width}} {duration * 1000:10.1f} ms {queries:7d} queries" for name, duration, queries in rows]
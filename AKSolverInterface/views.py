@@ -1,11 +1,18 @@
+import hashlib
 import json
 
+from django.conf import settings
 from django.contrib import messages
-from django.db.models import Count, Q
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db.models import Count
 from django.db.models.query import QuerySet
-from django.shortcuts import redirect
+from django.http import HttpResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404, redirect
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
 from django.utils.translation import gettext_lazy as _
-from django.views.generic import FormView
+from django.views.generic import FormView, View
 
 from AKModel.metaviews.admin import (
     AdminViewMixin,
@@ -14,10 +21,36 @@ from AKModel.metaviews.admin import (
 )
 from AKModel.models import AK, Event
 from AKScheduling.checks import aks_not_in_default_schedules
-from AKSolverInterface.forms import JSONExportControlForm, JSONScheduleImportForm
+from AKSolverInterface.forms import (
+    JSONExportControlForm,
+    JSONScheduleImportForm,
+    SolverJobForm,
+    serialize_export_options,
+)
+from AKSolverInterface.jobs import create_solver_jobs, fail_stale_solver_jobs, import_solver_job, submit_solver_job
+from AKSolverInterface.models import SolverJob
 from AKSolverInterface.serializers import ExportEventSerializer
 
 
+def _export_fingerprint(event: Event, cleaned_data: dict) -> str:
+    """
+    Compute the fingerprint of an export: Combination of the content fingerprint of the event and the export options
+
+    Used as cache key and ETag of the export.
+
+    :param event: exported event
+    :param cleaned_data: cleaned data of a `JSONExportControlForm`
+    :return: fingerprint as hex digest
+    """
+    options = serialize_export_options(cleaned_data)
+    content = json.dumps([event.content_fingerprint(), options], sort_keys=True, default=str)
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def _export_cache_key(event: Event, fingerprint: str) -> str:
+    return f"aksolverinterface-export-{event.pk}-{fingerprint}"
+
+
 class AKJSONExportView(EventSlugMixin, AdminViewMixin, FormView):
     """
     View: Export all AK slots of this event in JSON format ordered by tracks
@@ -70,16 +103,32 @@ class AKJSONExportView(EventSlugMixin, AdminViewMixin, FormView):
         self.produce_exceptions(form)
         context = self.get_context_data(form=form)
         self.try_producing_export(context, form)
-        return self.render_to_response(context)
+        return self._render_export(context)
 
     def form_valid(self, form):
         # Form will be shown both if valid and invalid (for re-adjustment of export params)
         self.produce_exceptions(form)
         context = self.get_context_data(form=form)
         self.try_producing_export(context, form)
-        return self.render_to_response(context)
+        return self._render_export(context)
+
+    def _render_export(self, context):
+        response = self.render_to_response(context)
+        if "fingerprint" in context:
+            response["ETag"] = quote_etag(context["fingerprint"])
+        return response
 
     def try_producing_export(self, context, form):
+        """
+        Produce the export for the given (valid) form and add it to the context
+
+        Warnings about AKs, slots, rooms, participants or timeslots missing from the export are added as messages.
+        The serialized export is cached until the content of the event changes.
+        If the event cannot be exported, an error message is added instead and the export is not shown.
+
+        :param context: context of the view to add the export to
+        :param form: form with the export options
+        """
         try:
             # Find AKs that are not wishes but nevertheless have no slots
             aks_without_slot = AK.objects.annotate(num_owners=Count('owners')).filter(event=self.event,
@@ -113,60 +162,56 @@ class AKJSONExportView(EventSlugMixin, AdminViewMixin, FormView):
                         )
                 )
 
-            def _filter_slots_cb(queryset: QuerySet) -> QuerySet:
-                queryset = queryset.prefetch_related("ak")
-                if "export_tracks" in form.cleaned_data:
-                    queryset = queryset.filter(
-                            Q(ak__track__in=form.cleaned_data["export_tracks"])
-                            | Q(ak__track__isnull=True)
-                    )
-                if "export_categories" in form.cleaned_data:
-                    queryset = queryset.filter(
-                            Q(ak__category__in=form.cleaned_data["export_categories"])
-                            | Q(ak__category__isnull=True)
-                    )
-                if "export_types" in form.cleaned_data:
-                    queryset = queryset.filter(
-                            Q(ak__types__in=form.cleaned_data["export_types"])
-                            | Q(ak__types__isnull=True)
-                    )
+            # the serialized export is cached until the content of the event changes (cf. `_export_fingerprint`)
+            fingerprint = _export_fingerprint(self.event, form.cleaned_data)
+            cache_key = _export_cache_key(self.event, fingerprint)
+            cached_export = cache.get(cache_key)
 
-                queryset = queryset.distinct().all()
-                if not queryset.exists():
-                    messages.warning(
-                            self.request,
-                            _("No AKSlots are exported"),
-                    )
+            if cached_export is None:
+                # warnings of the serialization are cached with the export
+                export_warnings = []
 
-                return queryset
+                def _filter_slots_cb(queryset: QuerySet) -> QuerySet:
+                    queryset = form.filter_exported_slots(queryset)
+                    if not queryset.exists():
+                        export_warnings.append(_("No AKSlots are exported"))
+                    return queryset
 
-            def _filter_rooms_cb(queryset: QuerySet) -> QuerySet:
-                queryset = queryset.all()
-                if not queryset.exists():
-                    messages.warning(self.request, _("No Rooms are exported"))
-                return queryset
+                def _filter_rooms_cb(queryset: QuerySet) -> QuerySet:
+                    queryset = queryset.all()
+                    if not queryset.exists():
+                        export_warnings.append(_("No Rooms are exported"))
+                    return queryset
 
-            def _filter_participants_cb(queryset: QuerySet) -> QuerySet:
-                queryset = queryset.all()
-                if not queryset.exists():
-                    messages.warning(self.request, _("No real participants are exported"))
-                return queryset
+                def _filter_participants_cb(queryset: QuerySet) -> QuerySet:
+                    queryset = queryset.all()
+                    if not queryset.exists():
+                        export_warnings.append(_("No real participants are exported"))
+                    return queryset
 
-            serialized_event = ExportEventSerializer(
-                    context["event"],
-                    filter_slots_cb=_filter_slots_cb,
-                    filter_rooms_cb=_filter_rooms_cb,
-                    filter_participants_cb=_filter_participants_cb,
-                    export_scheduled_aks_as_fixed=form.cleaned_data["export_scheduled_aks_as_fixed"],
-                    export_preferences=form.cleaned_data["export_preferences"],
-                    aks_to_ignore_category_for=set(aks_to_ignore_category_for),
-            )
-            serialized_event_data = serialized_event.data
+                serialized_event = ExportEventSerializer(
+                        context["event"],
+                        filter_slots_cb=_filter_slots_cb,
+                        filter_rooms_cb=_filter_rooms_cb,
+                        filter_participants_cb=_filter_participants_cb,
+                        export_scheduled_aks_as_fixed=form.cleaned_data["export_scheduled_aks_as_fixed"],
+                        export_preferences=form.cleaned_data["export_preferences"],
+                        export_options=serialize_export_options(form.cleaned_data),
+                        aks_to_ignore_category_for=set(aks_to_ignore_category_for),
+                )
+                serialized_event_data = serialized_event.data
 
-            if not serialized_event_data["timeslots"]["blocks"]:
-                messages.warning(self.request, _("No timeslots are exported"))
+                if not serialized_event_data["timeslots"]["blocks"]:
+                    export_warnings.append(_("No timeslots are exported"))
+                cache.set(cache_key, (serialized_event_data, export_warnings), settings.EXPORT_CACHE_TIMEOUT)
+            else:
+                serialized_event_data, export_warnings = cached_export
+
+            for warning in export_warnings:
+                messages.warning(self.request, warning)
             context["json_data_oneline"] = json.dumps(serialized_event_data, ensure_ascii=False)
             context["json_data"] = json.dumps(serialized_event_data, indent=2, ensure_ascii=False)
+            context["fingerprint"] = fingerprint
             context["is_valid"] = True
         except ValueError as ex:
             messages.add_message(
@@ -176,6 +221,81 @@ class AKJSONExportView(EventSlugMixin, AdminViewMixin, FormView):
             )
 
 
+class AKJSONExportDownloadView(AKJSONExportView):
+    """
+    View: Download the JSON export of all AK slots of this event as a file
+
+    Uses the same form and filter options as the export view, but instead of embedding the export in the page,
+    the JSON is serialized and streamed to the client chunk by chunk.
+    If the form is invalid, the export view is shown again.
+
+    Exports already cached by the export view are served from the cache. The response carries an ETag,
+    hence conditional GET requests are answered with 304 if the export did not change.
+    """
+
+    http_method_names = ["get", "post"]
+
+    def get(self, request, *args, **kwargs):
+        # the export can also be downloaded with the form data as query parameters (e.g., by scripts),
+        # then, unchanged exports are not downloaded again (cf. ETag)
+        return self.post(request, *args, **kwargs)
+
+    def get_form_kwargs(self):
+        form_kwargs = super().get_form_kwargs()
+        if self.request.method == "GET":
+            form_kwargs["data"] = self.request.GET
+        return form_kwargs
+
+    def get_form(self, form_class=None):
+        form = super().get_form(form_class)
+        # the export view only offers AKs with category mismatches, but any AK of the event may be ignored
+        form.fields["ignore_slot_category_mismatches"].choices = [
+            (ak.pk, f"{ak.name} ({ak.category})") for ak in self.event.ak_set.select_related("category")
+        ]
+        return form
+
+    def form_valid(self, form):
+        fingerprint = _export_fingerprint(self.event, form.cleaned_data)
+        etag = quote_etag(fingerprint)
+        conditional_response = get_conditional_response(self.request, etag=etag)
+        if conditional_response is not None:
+            conditional_response["ETag"] = etag
+            return conditional_response
+
+        cached_export = cache.get(_export_cache_key(self.event, fingerprint))
+        if cached_export is not None:
+            # export was already generated by the export view
+            response = HttpResponse(json.dumps(cached_export[0], ensure_ascii=False), content_type="application/json")
+        else:
+            try:
+                # errors cannot be reported once the streaming started,
+                # hence the discretization is done (and cached) in advance
+                for _block in self.event.discretize_timeslots():
+                    pass
+            except ValueError as ex:
+                messages.add_message(
+                        self.request,
+                        messages.ERROR,
+                        _("Exporting AKs for the solver failed! Reason: ") + str(ex),
+                )
+                return redirect("admin:ak_json_export", event_slug=self.event.slug)
+
+            serialized_event = ExportEventSerializer(
+                    self.event,
+                    filter_slots_cb=form.filter_exported_slots,
+                    export_scheduled_aks_as_fixed=form.cleaned_data["export_scheduled_aks_as_fixed"],
+                    export_preferences=form.cleaned_data["export_preferences"],
+                    export_options=serialize_export_options(form.cleaned_data),
+                    aks_to_ignore_category_for=set(self.event.ak_set.filter(
+                            pk__in=form.cleaned_data.get("ignore_slot_category_mismatches", [])
+                    )),
+            )
+            response = StreamingHttpResponse(serialized_event.iter_json(), content_type="application/json")
+        response["Content-Disposition"] = f'attachment; filename="{self.event.slug}_solver_input.json"'
+        response["ETag"] = etag
+        return response
+
+
 class AKScheduleJSONImportView(EventSlugMixin, IntermediateAdminView):
     """
     View: Import an AK schedule from a json file that can be pasted into this view.
@@ -187,10 +307,7 @@ class AKScheduleJSONImportView(EventSlugMixin, IntermediateAdminView):
 
     def form_valid(self, form):
         try:
-            number_of_slots_changed = self.event.schedule_from_json(
-                    form.cleaned_data["data"],
-                    check_for_data_inconsistency=False,  # TODO: Actually handle filtered export
-            )
+            number_of_slots_changed = self.event.schedule_from_json(form.cleaned_data["data"])
             messages.add_message(
                     self.request,
                     messages.SUCCESS,
@@ -204,5 +321,89 @@ class AKScheduleJSONImportView(EventSlugMixin, IntermediateAdminView):
                     messages.ERROR,
                     _("Importing an AK schedule failed! Reason: ") + str(ex),
             )
+        except ValidationError as ex:
+            # scheduled AKs of uploaded files are validated while they are imported
+            messages.add_message(
+                    self.request,
+                    messages.ERROR,
+                    _("Importing an AK schedule failed! Reason: ") + " ".join(ex.messages),
+            )
 
         return redirect("admin:event_status", self.event.slug)
+
+
+class SolverJobsView(EventSlugMixin, AdminViewMixin, FormView):
+    """
+    View: Run local solvers on the export of this event and list their jobs
+
+    The form combines the export options of :class:`AKJSONExportView` with the selection of the solvers to run
+    (cf. :mod:`AKSolverInterface.jobs`). Finished jobs can be imported from the list.
+    """
+
+    template_name = "admin/AKSolverInterface/solver_jobs.html"
+    form_class = SolverJobForm
+    title = _("Run solvers")
+
+    def get_form_kwargs(self):
+        form_kwargs = super().get_form_kwargs()
+        form_kwargs["event"] = self.event
+        return form_kwargs
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["jobs"] = SolverJob.objects.filter(event=self.event)
+        fail_stale_solver_jobs(context["jobs"])
+        context["has_active_jobs"] = any(job.is_active for job in context["jobs"])
+        return context
+
+    def form_valid(self, form):
+        try:
+            jobs = create_solver_jobs(self.event, form.cleaned_data["solvers"], form)
+        except ValueError as ex:
+            messages.add_message(
+                    self.request,
+                    messages.ERROR,
+                    _("Exporting AKs for the solver failed! Reason: ") + str(ex),
+            )
+        else:
+            for job in jobs:
+                submit_solver_job(job)
+            messages.add_message(
+                    self.request,
+                    messages.SUCCESS,
+                    _("Started {n} solver job(s)").format(n=len(jobs)),
+            )
+        return redirect("admin:solver_jobs", event_slug=self.event.slug)
+
+
+class SolverJobImportView(EventSlugMixin, View):
+    """
+    View: Import the schedule computed by a finished solver job
+    """
+
+    http_method_names = ["post"]
+
+    def post(self, request, *args, **kwargs):
+        job = get_object_or_404(SolverJob, pk=kwargs["pk"], event=self.event)
+        try:
+            number_of_slots_changed = import_solver_job(job)
+            messages.add_message(
+                    self.request,
+                    messages.SUCCESS,
+                    _("Successfully imported {n} slot(s)").format(
+                            n=number_of_slots_changed
+                    ),
+            )
+        except ValueError as ex:
+            messages.add_message(
+                    self.request,
+                    messages.ERROR,
+                    _("Importing an AK schedule failed! Reason: ") + str(ex),
+            )
+        except ValidationError as ex:
+            messages.add_message(
+                    self.request,
+                    messages.ERROR,
+                    _("Importing an AK schedule failed! Reason: ") + " ".join(ex.messages),
+            )
+        return redirect("admin:solver_jobs", event_slug=self.event.slug)